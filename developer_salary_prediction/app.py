@@ -1,6 +1,9 @@
 """Streamlit web app for salary prediction."""
 
+import statistics
 import sys
+import time
+from collections import OrderedDict
 from pathlib import Path
 
 # Ensure the 'developer_salary_prediction' directory is on sys.path
@@ -12,9 +15,65 @@ if str(_APP_DIR) not in sys.path:
 
 import streamlit as st
 
-from src.infer import predict_salary, get_local_currency, valid_categories
 from src.schema import SalaryInput
 
+# Start of this rerun, for the debug panel
+_rerun_start = time.perf_counter()
+
+# Default value of each select box, when the model has it
+DEFAULTS = {
+    "Country": "United States of America",
+    "EdLevel": "Bachelor's degree (B.A., B.S., B.Eng., etc.)",
+    "DevType": "Developer, back-end",
+    "Industry": "Software Development",
+    "Age": "25-34 years old",
+    "ICorPM": "Individual contributor",
+}
+
+# Distinct inputs whose predictions each session keeps (least recently used
+# go first)
+PREDICTION_CACHE_ENTRIES = 100
+
+# Reruns kept per session for the debug panel
+RERUN_HISTORY = 50
+
+
+@st.cache_resource
+def form_options() -> dict:
+    """Options of every select box and the index of its default value."""
+    from src.infer import valid_categories
+
+    options = {}
+    for feature, default in DEFAULTS.items():
+        values = valid_categories[feature]
+        options[feature] = {
+            "values": values,
+            "index": values.index(default) if default in values else 0,
+        }
+    return options
+
+
+def cached_prediction(inputs: dict) -> float:
+    """
+    Predicted salary of validated SalaryInput fields, memoized per session.
+
+    The last PREDICTION_CACHE_ENTRIES distinct inputs of this session are
+    kept in st.session_state, so one session cannot evict another's.
+    """
+    from src.infer import predict_salary
+
+    cache = st.session_state.setdefault("predictions", OrderedDict())
+    key = tuple(sorted(inputs.items()))
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+    salary = predict_salary(SalaryInput(**inputs))
+    cache[key] = salary
+    if len(cache) > PREDICTION_CACHE_ENTRIES:
+        cache.popitem(last=False)
+    return salary
+
+
 # Page configuration
 st.set_page_config(
     page_title="Developer Salary Predictor | AI-Powered Predictions",
@@ -596,6 +655,25 @@ code {
 </style>
 """, unsafe_allow_html=True)
 
+# Importing src.infer loads the model, category lists and currency table once
+# per server process (Python keeps the module); a failed import is retried on
+# the next rerun, e.g. after training
+try:
+    from src import infer as predictor
+except FileNotFoundError as e:
+    st.error(
+        f"""
+        ❌ **Model Not Found!** {e}
+
+        Please train the model first by running:
+        ```bash
+        python src/train.py
+        ```
+        """
+    )
+    st.stop()
+valid_categories = predictor.valid_categories
+
 # ─── Hero Section ─────────────────────────────────────────────────────────────
 st.markdown("<h1>💰 Developer Salary Predictor</h1>", unsafe_allow_html=True)
 st.markdown(
@@ -675,41 +753,8 @@ st.markdown("Fill in the details below to get your salary prediction")
 # Create tabs for better organization
 tab1, tab2, tab3 = st.tabs(["👤 Personal Info", "💼 Professional Info", "🎯 Generate Prediction"])
 
-# Get valid categories from training
-valid_countries = valid_categories["Country"]
-valid_education_levels = valid_categories["EdLevel"]
-valid_dev_types = valid_categories["DevType"]
-valid_industries = valid_categories["Industry"]
-valid_ages = valid_categories["Age"]
-valid_icorpm = valid_categories["ICorPM"]
-
-# Set default values (if available)
-default_country = (
-    "United States of America"
-    if "United States of America" in valid_countries
-    else valid_countries[0]
-)
-default_education = (
-    "Bachelor's degree (B.A., B.S., B.Eng., etc.)"
-    if "Bachelor's degree (B.A., B.S., B.Eng., etc.)" in valid_education_levels
-    else valid_education_levels[0]
-)
-default_dev_type = (
-    "Developer, back-end"
-    if "Developer, back-end" in valid_dev_types
-    else valid_dev_types[0]
-)
-default_industry = (
-    "Software Development"
-    if "Software Development" in valid_industries
-    else valid_industries[0]
-)
-default_age = "25-34 years old" if "25-34 years old" in valid_ages else valid_ages[0]
-default_icorpm = (
-    "Individual contributor"
-    if "Individual contributor" in valid_icorpm
-    else valid_icorpm[0]
-)
+# Valid categories from training and the default of each select box
+options = form_options()
 
 # Tab 1: Personal Information
 with tab1:
@@ -719,30 +764,30 @@ with tab1:
     with col1:
         country = st.selectbox(
             "🌍 Country",
-            options=valid_countries,
-            index=valid_countries.index(default_country),
+            options=options["Country"]["values"],
+            index=options["Country"]["index"],
             help="Your country of residence (impacts salary significantly)",
         )
         
         age = st.selectbox(
             "👤 Age Range",
-            options=valid_ages,
-            index=valid_ages.index(default_age),
+            options=options["Age"]["values"],
+            index=options["Age"]["index"],
             help="Your current age range",
         )
     
     with col2:
         education = st.selectbox(
             "🎓 Education Level",
-            options=valid_education_levels,
-            index=valid_education_levels.index(default_education),
+            options=options["EdLevel"]["values"],
+            index=options["EdLevel"]["index"],
             help="Your highest level of education completed",
         )
         
         ic_or_pm = st.selectbox(
             "👥 Role Type",
-            options=valid_icorpm,
-            index=valid_icorpm.index(default_icorpm),
+            options=options["ICorPM"]["values"],
+            index=options["ICorPM"]["index"],
             help="Are you an individual contributor or people manager?",
         )
 
@@ -764,8 +809,8 @@ with tab2:
         
         dev_type = st.selectbox(
             "🔧 Developer Type",
-            options=valid_dev_types,
-            index=valid_dev_types.index(default_dev_type),
+            options=options["DevType"]["values"],
+            index=options["DevType"]["index"],
             help="Your primary developer role or specialization",
         )
     
@@ -781,8 +826,8 @@ with tab2:
         
         industry = st.selectbox(
             "🏢 Industry",
-            options=valid_industries,
-            index=valid_industries.index(default_industry),
+            options=options["Industry"]["values"],
+            index=options["Industry"]["index"],
             help="The industry sector you work in",
         )
 
@@ -836,7 +881,7 @@ with tab3:
 
             # Make prediction
             with st.spinner("🤖 AI is analyzing your profile..."):
-                salary = predict_salary(input_data)
+                salary = cached_prediction(input_data.model_dump())
 
             # Display result with animation
             st.markdown("<div class='result-container'>", unsafe_allow_html=True)
@@ -846,7 +891,7 @@ with tab3:
             st.markdown("### 💵 Your Predicted Salary")
 
             # Show USD and local currency side by side
-            local = get_local_currency(country, salary)
+            local = predictor.get_local_currency(country, salary)
             if local and local["code"] != "USD":
                 col_usd, col_local = st.columns(2)
                 with col_usd:
@@ -933,3 +978,21 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# ─── Debug Panel ──────────────────────────────────────────────────────────────
+rerun_ms = (time.perf_counter() - _rerun_start) * 1000
+rerun_history = st.session_state.setdefault("rerun_ms", [])
+rerun_history.append(rerun_ms)
+del rerun_history[:-RERUN_HISTORY]
+with st.sidebar.expander("🛠️ Debug"):
+    st.markdown(f"**Last rerun:** `{rerun_ms:.1f} ms`")
+    st.markdown(
+        f"**Median of last {len(rerun_history)}:** "
+        f"`{statistics.median(rerun_history):.1f} ms`"
+    )
+    st.markdown(f"**Slowest:** `{max(rerun_history):.1f} ms`")
+    st.caption(
+        "Server time to run the script for this session, up to this panel. "
+        "The model and category lists are loaded once per process; "
+        f"predictions of this session's last {PREDICTION_CACHE_ENTRIES} "
+        "distinct inputs are reused."
+    )
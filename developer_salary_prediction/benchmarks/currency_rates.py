@@ -0,0 +1,93 @@
+"""Benchmark currency-rate derivation: per-country loop vs grouped passes.
+
+"Per-country loop" is the previous train.py implementation, which filters
+the whole frame for every country (three times). "Grouped" is
+src.currency.derive_currency_rates. Countries are split into regions to get
+hundreds of groups, as when cardinality is not reduced, and some respondents
+report a second currency so the modal currency has to be chosen.
+
+Usage:
+    uv run python -m benchmarks.currency_rates [--rows 1000000] [--regions 5]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_survey
+from src.cleaning import MAIN_LABEL
+from src.currency import derive_currency_rates
+
+
+def loop_currency_rates(df: pd.DataFrame, countries: list[str]) -> dict:
+    """Reference implementation: one scan of the frame per country."""
+    currency_df = df[["Country", "Currency", "CompTotal", MAIN_LABEL]].dropna()
+    currency_df = currency_df.copy()
+    currency_df["CurrencyCode"] = currency_df["Currency"].str.split(r"\s+", n=1).str[0]
+    currency_df["CurrencyName"] = currency_df["Currency"].str.split(r"\s+", n=1).str[1]
+    currency_df["rate"] = currency_df["CompTotal"] / currency_df[MAIN_LABEL]
+    currency_df = currency_df[
+        (currency_df["rate"] > 0.001) & (currency_df["rate"] < 100000)
+    ]
+
+    currency_rates = {}
+    for country in countries:
+        country_data = currency_df[currency_df["Country"] == country]
+        if country_data.empty:
+            continue
+        most_common = country_data["CurrencyCode"].mode()
+        if most_common.empty:
+            continue
+        code = most_common.iloc[0]
+        name_row = country_data[country_data["CurrencyCode"] == code].iloc[0]
+        rates = country_data[country_data["CurrencyCode"] == code]["rate"]
+        currency_rates[country] = {
+            "code": code,
+            "name": name_row["CurrencyName"],
+            "rate": round(float(rates.median()), 2),
+        }
+    return currency_rates
+
+
+def make_frame(n_rows: int, n_regions: int) -> pd.DataFrame:
+    """Synthetic survey with n_regions countries per synthetic country."""
+    rng = np.random.default_rng(2)
+    df = make_survey(n_rows)
+    df = df[df[MAIN_LABEL] > 1000].copy()
+    region = rng.integers(0, n_regions, len(df)).astype(str)
+    df["Country"] = df["Country"] + " / region " + region
+    # A fifth of respondents report USD instead of the local currency
+    usd = rng.random(len(df)) < 0.2
+    df.loc[usd, "Currency"] = "USD United States dollar"
+    df.loc[usd, "CompTotal"] = df.loc[usd, MAIN_LABEL]
+    return df
+
+
+def main():
+    """Time both implementations and check that they agree."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--regions", type=int, default=5)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, args.regions)
+    countries = sorted(df["Country"].unique())
+    print(f"Rows: {len(df):,}, countries: {len(countries)}\n")
+
+    results = {}
+    for name, func in [
+        ("Per-country loop", loop_currency_rates),
+        ("Grouped", derive_currency_rates),
+    ]:
+        start = time.perf_counter()
+        results[name] = func(df, countries)
+        print(f"{name + ':':18s} {time.perf_counter() - start:7.2f}s")
+
+    identical = results["Per-country loop"] == results["Grouped"]
+    print(f"Identical rates:   {identical}")
+
+
+if __name__ == "__main__":
+    main()
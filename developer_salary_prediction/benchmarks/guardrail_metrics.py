@@ -0,0 +1,91 @@
+"""Benchmark per-category guardrail metrics: per-category masks vs grouped sums.
+
+"Per-category loop" is the previous guardrail_evaluation.py implementation,
+which builds a boolean mask over all rows for every category of every
+feature and calls r2_score on the selection. "Grouped" is
+src.guardrails.category_metrics. Countries are split into regions to get
+hundreds of categories, as when cardinality is not reduced.
+
+Usage:
+    uv run python -m benchmarks.guardrail_metrics [--rows 5000000] [--regions 5]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import r2_score
+
+from benchmarks.synthetic import make_survey
+from src.cleaning import MAIN_LABEL
+from src.guardrails import category_metrics
+from src.preprocessing import CATEGORICAL_FEATURES
+
+
+def loop_category_metrics(
+    df: pd.DataFrame, actual: np.ndarray, predictions: np.ndarray
+) -> pd.DataFrame:
+    """Reference implementation: one mask over all rows per category."""
+    results = []
+    for feature in CATEGORICAL_FEATURES:
+        categories = df[feature].values
+        for cat in sorted(df[feature].unique()):
+            mask = categories == cat
+            cat_actual = actual[mask]
+            cat_pred = predictions[mask]
+            count = int(mask.sum())
+            cat_r2 = r2_score(cat_actual, cat_pred) if count >= 2 else float("nan")
+            mean_actual = cat_actual.mean()
+            mean_pred = cat_pred.mean()
+            results.append(
+                {
+                    "Feature": feature,
+                    "Category": cat,
+                    "Count": count,
+                    "R2": cat_r2,
+                    "Mean Actual ($)": mean_actual,
+                    "Mean Predicted ($)": mean_pred,
+                    "Abs % Diff": abs(mean_pred - mean_actual) / mean_actual * 100,
+                }
+            )
+    return pd.DataFrame(results)
+
+
+def main():
+    """Time both implementations and check that they agree."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--regions", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(3)
+    df = make_survey(args.rows)
+    df = df[df[MAIN_LABEL] > 1000].dropna(subset=CATEGORICAL_FEATURES)
+    region = rng.integers(0, args.regions, len(df)).astype(str)
+    df["Country"] = df["Country"] + " / region " + region
+    actual = df[MAIN_LABEL].to_numpy(dtype=np.float64)
+    predictions = actual * rng.lognormal(0, 0.3, len(df))
+    n_categories = sum(df[col].nunique() for col in CATEGORICAL_FEATURES)
+    print(f"Rows: {len(df):,}, categories: {n_categories}\n")
+
+    results = {}
+    for name, func in [
+        ("Per-category loop", loop_category_metrics),
+        ("Grouped", category_metrics),
+    ]:
+        start = time.perf_counter()
+        results[name] = func(df, actual, predictions)
+        print(f"{name + ':':19s} {time.perf_counter() - start:7.2f}s")
+
+    loop, grouped = results["Per-category loop"], results["Grouped"]
+    same_rows = loop[["Feature", "Category", "Count"]].equals(
+        grouped[["Feature", "Category", "Count"]]
+    )
+    r2_close = np.allclose(loop["R2"], grouped["R2"], rtol=1e-6, equal_nan=True)
+    print(f"Same categories:    {same_rows}")
+    print(f"Matching R2:        {r2_close}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark survey CSV ingestion: default parser vs src.ingest readers.
+
+Writes a wide synthetic survey CSV (the training columns plus ~90 unused
+text columns, like the real file), then reads it in a fresh process per
+reader so that peak RSS is measured independently. The CSV is also written
+by a child process, since a child inherits its parent's peak RSS.
+
+Usage:
+    uv run python -m benchmarks.ingest [--rows 300000] [--chunksize 50000]
+"""
+
+import argparse
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_survey
+from src.cache import RAW_COLUMNS
+from src.ingest import read_survey
+
+READERS = ["default", "pyarrow", "chunked"]
+
+
+def write_wide_csv(path: Path, n_rows: int) -> None:
+    """Synthetic survey with extra multi-select text columns."""
+    rng = np.random.default_rng(1)
+    df = make_survey(n_rows)
+    for i in range(90):
+        df[f"Unused{i}"] = rng.choice(
+            ["Python;SQL;Rust", "Go", "Java;Kotlin", ""], n_rows
+        )
+    years = df["YearsCode"].astype("Int64").astype(str)
+    years[::40] = "Less than 1 year"
+    df["YearsCode"] = years
+    df.to_csv(path, index=False)
+
+
+def run_reader(reader: str, path: Path, chunksize: int) -> None:
+    """Read once and print seconds, peak RSS and in-memory size."""
+    start = time.perf_counter()
+    if reader == "default":
+        df = pd.read_csv(path, usecols=RAW_COLUMNS)
+    else:
+        df = read_survey(
+            path, RAW_COLUMNS, chunksize=chunksize if reader == "chunked" else None
+        )
+    seconds = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    frame_mb = df.memory_usage(deep=True).sum() / 2**20
+    print(f"{reader:8s} {seconds:8.2f} {peak_mb:12.0f} {frame_mb:10.1f}")
+
+
+def _run_step(step: str, csv_path: Path, args: argparse.Namespace) -> None:
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.ingest",
+            "--step",
+            step,
+            "--csv",
+            str(csv_path),
+            "--rows",
+            str(args.rows),
+            "--chunksize",
+            str(args.chunksize),
+        ],
+        check=True,
+    )
+
+
+def main():
+    """Generate the CSV and compare readers."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--step", choices=["write", *READERS], help=argparse.SUPPRESS)
+    parser.add_argument("--csv", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.step == "write":
+        write_wide_csv(args.csv, args.rows)
+        return
+    if args.step:
+        run_reader(args.step, args.csv, args.chunksize)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "survey.csv"
+        _run_step("write", csv_path, args)
+        size_mb = csv_path.stat().st_size / 1e6
+        print(f"CSV: {args.rows:,} rows, {size_mb:.0f} MB\n")
+        print(f"{'reader':8s} {'seconds':>8s} {'peak RSS MB':>12s} {'frame MB':>10s}")
+        for reader in READERS:
+            _run_step(reader, csv_path, args)
+
+
+if __name__ == "__main__":
+    main()
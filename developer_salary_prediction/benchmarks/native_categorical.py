@@ -0,0 +1,100 @@
+"""Benchmark one-hot vs native categorical encoding.
+
+Compares training time, pickled model size, hold-out R2 and per-row
+inference latency (encoding + predict, as src/infer.py does it).
+
+Usage:
+    uv run python -m benchmarks.native_categorical [--rows 50000] [--rounds 500]
+"""
+
+import argparse
+import pickle
+import time
+from pathlib import Path
+
+import pandas as pd
+import yaml
+from sklearn.metrics import r2_score
+
+from benchmarks.synthetic import make_survey
+from src.model import build_regressor
+from src.preprocessing import (
+    CATEGORICAL_FEATURES,
+    prepare_features,
+    prepare_features_native,
+    reduce_cardinality,
+)
+
+
+def _encode(df: pd.DataFrame, encoding: str, categories: dict) -> pd.DataFrame:
+    if encoding == "native":
+        return prepare_features_native(df, categories)
+    return prepare_features(df)
+
+
+def main():
+    """Run the encoding benchmark and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--rounds", type=int, default=500)
+    parser.add_argument("--latency-samples", type=int, default=300)
+    args = parser.parse_args()
+
+    with open(Path("config/model_parameters.yaml"), "r") as f:
+        config = yaml.safe_load(f)
+
+    df = make_survey(args.rows).dropna(subset=["ConvertedCompYearly"])
+    for col in CATEGORICAL_FEATURES:
+        df[col] = reduce_cardinality(df[col])
+    categories = {col: sorted(df[col].unique()) for col in CATEGORICAL_FEATURES}
+    y = df["ConvertedCompYearly"]
+
+    n_train = int(len(df) * 0.8)
+    samples = df.iloc[n_train : n_train + args.latency_samples]
+
+    results = []
+    for encoding in ("onehot", "native"):
+        X = _encode(df, encoding, categories)
+        X_train, X_test = X.iloc[:n_train], X.iloc[n_train:]
+        y_train, y_test = y.iloc[:n_train], y.iloc[n_train:]
+
+        # Fixed number of rounds so both models do the same amount of work
+        model = build_regressor(
+            config["model"],
+            encoding,
+            n_estimators=args.rounds,
+            early_stopping_rounds=None,
+        )
+        start = time.perf_counter()
+        model.fit(X_train, y_train, verbose=False)
+        train_seconds = time.perf_counter() - start
+
+        size_bytes = len(pickle.dumps(model))
+        r2 = r2_score(y_test, model.predict(X_test))
+
+        feature_columns = list(X.columns)
+        start = time.perf_counter()
+        for i in range(len(samples)):
+            row = _encode(samples.iloc[[i]], encoding, categories)
+            if encoding == "onehot":
+                row = row.reindex(columns=feature_columns, fill_value=0)
+            model.predict(row)
+        latency_ms = (time.perf_counter() - start) / len(samples) * 1000
+
+        results.append(
+            {
+                "Encoding": encoding,
+                "Columns": X.shape[1],
+                "Train (s)": round(train_seconds, 2),
+                "Model size (KB)": round(size_bytes / 1024, 1),
+                "Row latency (ms)": round(latency_ms, 3),
+                "Hold-out R2": round(r2, 4),
+            }
+        )
+
+    print(f"Rows: {len(df):,}, boosting rounds: {args.rounds}\n")
+    print(pd.DataFrame(results).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
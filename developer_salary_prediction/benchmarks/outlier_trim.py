@@ -0,0 +1,75 @@
+"""Benchmark per-country percentile bounds: two groupby transforms vs one pass.
+
+"Two transforms" is the previous implementation, which sorts every country
+group once per bound. "Single pass" is src.cleaning.group_percentile_bounds.
+The salary threshold is applied first, as in clean_survey(), and the bounds
+of both methods are checked for exact equality.
+
+Usage:
+    uv run python -m benchmarks.outlier_trim [--rows 10000000] [--repeat 3]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_survey
+from src.cleaning import MAIN_LABEL, group_percentile_bounds
+
+
+def main():
+    """Time both implementations on the configured percentiles."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--lower", type=float, default=2.0)
+    parser.add_argument("--upper", type=float, default=98.0)
+    args = parser.parse_args()
+
+    df = make_survey(args.rows, categorical=True)
+    df = df[df[MAIN_LABEL] > 1000]
+    lower_pct, upper_pct = args.lower / 100, args.upper / 100
+
+    def two_transforms():
+        grouped = df.groupby("Country", observed=True)[MAIN_LABEL]
+        return (
+            grouped.transform("quantile", lower_pct).to_numpy(),
+            grouped.transform("quantile", upper_pct).to_numpy(),
+        )
+
+    def single_pass():
+        return group_percentile_bounds(
+            df[MAIN_LABEL], df["Country"], lower_pct, upper_pct
+        )
+
+    timings = {}
+    results = {}
+    for name, func in [
+        ("Two transforms", two_transforms),
+        ("Single pass", single_pass),
+    ]:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results[name] = func()
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+
+    identical = all(
+        np.array_equal(a, b)
+        for a, b in zip(results["Two transforms"], results["Single pass"], strict=True)
+    )
+    print(
+        f"Rows: {len(df):,}, countries: {df['Country'].nunique()}, "
+        f"percentiles: {args.lower:g}/{args.upper:g}\n"
+    )
+    for name, seconds in timings.items():
+        print(f"{name + ':':16s} {seconds:6.2f}s (best of {args.repeat})")
+    speedup = timings["Two transforms"] / timings["Single pass"]
+    print(f"Speed-up:        {speedup:6.2f}x")
+    print(f"Identical bounds: {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Benchmark sequential vs process-parallel cross-validation folds.
+
+Usage:
+    uv run python -m benchmarks.parallel_cv [--rows 50000] [--rounds 500] [--workers 5]
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+from benchmarks.synthetic import make_survey
+from src.cv import run_cross_validation
+from src.preprocessing import CATEGORICAL_FEATURES, prepare_features, reduce_cardinality
+
+
+def main():
+    """Run CV sequentially and in parallel and compare wall-clock times."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--rounds", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(Path("config/model_parameters.yaml"), "r") as f:
+        config = yaml.safe_load(f)
+    config["model"]["n_estimators"] = args.rounds
+
+    df = make_survey(args.rows).dropna(subset=["ConvertedCompYearly"])
+    for col in CATEGORICAL_FEATURES:
+        df[col] = reduce_cardinality(df[col])
+    X = prepare_features(df)
+    y = df["ConvertedCompYearly"]
+
+    print(f"Rows: {len(X):,}, columns: {X.shape[1]}, cores: {os.cpu_count()}\n")
+    sequential = run_cross_validation(X, y, config, workers=1)
+    parallel = run_cross_validation(X, y, config, workers=args.workers)
+
+    for name, result in (("sequential", sequential), ("parallel", parallel)):
+        print(
+            f"{name:10s}: {result['wall_seconds']:7.2f}s "
+            f"({result['workers']} worker(s) x {result['n_jobs_per_fold']} thread(s))"
+        )
+    print(f"Speed-up: {sequential['wall_seconds'] / parallel['wall_seconds']:.2f}x")
+
+    max_diff = np.abs(sequential["oof_predictions"] - parallel["oof_predictions"]).max()
+    print(f"Max OOF prediction difference: {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark data setup for CV: per-fold quantization vs one shared reference.
+
+"Per fold" mirrors XGBRegressor.fit(), which sketches quantiles and builds
+histogram bins from scratch for every fold and again for the final model.
+"Shared" sketches once over all rows and bins each subset with those cuts.
+Only matrix construction is timed; no boosting happens.
+
+Usage:
+    uv run python -m benchmarks.shared_quantiles [--rows 500000] [--encoding onehot]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import xgboost as xgb
+from sklearn.model_selection import KFold, train_test_split
+
+from benchmarks.synthetic import make_survey
+from src.model import build_reference_matrix, training_matrix
+from src.preprocessing import (
+    CATEGORICAL_FEATURES,
+    prepare_features,
+    prepare_features_native,
+    reduce_cardinality,
+)
+
+
+def main():
+    """Time both setup strategies over the 5 CV folds plus the final fit."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--encoding", choices=["onehot", "native"], default="onehot")
+    args = parser.parse_args()
+
+    df = make_survey(args.rows).dropna(subset=["ConvertedCompYearly"])
+    for col in CATEGORICAL_FEATURES:
+        df[col] = reduce_cardinality(df[col])
+    if args.encoding == "native":
+        categories = {col: sorted(df[col].unique()) for col in CATEGORICAL_FEATURES}
+        X = prepare_features_native(df, categories)
+    else:
+        X = prepare_features(df)
+    y = df["ConvertedCompYearly"]
+
+    row_sets = [
+        train_idx
+        for train_idx, _ in KFold(n_splits=5, shuffle=True, random_state=42).split(X)
+    ]
+    row_sets.append(
+        train_test_split(np.arange(len(X)), test_size=0.1, random_state=42)[0]
+    )
+
+    start = time.perf_counter()
+    for rows in row_sets:
+        xgb.QuantileDMatrix(
+            X.iloc[rows],
+            y.iloc[rows],
+            enable_categorical=args.encoding == "native",
+        )
+    per_fold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reference = build_reference_matrix(X, y, args.encoding)
+    for rows in row_sets:
+        training_matrix(X, y, rows, reference, args.encoding)
+    shared = time.perf_counter() - start
+
+    print(f"Rows: {len(X):,}, columns: {X.shape[1]}, matrices: {len(row_sets)}\n")
+    print(f"Per-fold quantization: {per_fold:6.2f}s")
+    print(f"Shared reference:      {shared:6.2f}s")
+    print(
+        f"Setup time saved:      {per_fold - shared:6.2f}s ({per_fold / shared:.2f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
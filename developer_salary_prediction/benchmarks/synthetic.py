@@ -0,0 +1,95 @@
+"""Synthetic Stack Overflow survey data for benchmarks.
+
+The real survey CSV is not in the repository, so benchmarks generate a frame
+with the same columns, similar cardinalities and a salary that depends on
+every feature. Values are drawn with skewed (Zipf-like) frequencies so that
+cardinality reduction and per-country trimming behave as on real data.
+"""
+
+import numpy as np
+import pandas as pd
+
+SURVEY_COLUMNS = [
+    "Country",
+    "YearsCode",
+    "WorkExp",
+    "EdLevel",
+    "DevType",
+    "Industry",
+    "Age",
+    "ICorPM",
+    "Currency",
+    "CompTotal",
+    "ConvertedCompYearly",
+]
+
+# (number of distinct values, label prefix) per categorical column
+_CARDINALITY = {
+    "Country": (60, "Country"),
+    "EdLevel": (9, "Education level"),
+    "DevType": (35, "Developer type"),
+    "Industry": (20, "Industry"),
+    "Age": (8, "Age range"),
+    "ICorPM": (3, "Role"),
+}
+
+
+def _skewed_choice(rng: np.random.Generator, n_values: int, size: int) -> np.ndarray:
+    """Draw value indices with frequencies proportional to 1 / rank."""
+    weights = 1.0 / np.arange(1, n_values + 1)
+    return rng.choice(n_values, size=size, p=weights / weights.sum())
+
+
+def make_survey(n_rows: int, seed: int = 0, categorical: bool = False) -> pd.DataFrame:
+    """
+    Generate a raw survey-like DataFrame.
+
+    Args:
+        n_rows: Number of responses to generate
+        seed: Random seed
+        categorical: Store text columns as pandas categoricals, as
+                     src.ingest.read_survey() does (much less memory)
+
+    Returns:
+        DataFrame with SURVEY_COLUMNS, including a few missing and
+        below-threshold salaries so the cleaning filters have work to do
+    """
+    rng = np.random.default_rng(seed)
+    data = {}
+    log_salary = np.full(n_rows, np.log(60_000.0))
+
+    value_idx = {}
+    for col, (n_values, prefix) in _CARDINALITY.items():
+        idx = value_idx[col] = _skewed_choice(rng, n_values, n_rows)
+        labels = np.array([f"{prefix} {i:02d}" for i in range(n_values)])
+        data[col] = (
+            pd.Categorical.from_codes(idx, labels) if categorical else labels[idx]
+        )
+        effects = rng.normal(0, 0.35 if col == "Country" else 0.12, n_values)
+        log_salary += effects[idx]
+
+    years_code = np.clip(rng.gamma(2.0, 6.0, n_rows).round(), 0, 50)
+    work_exp = np.clip(years_code - rng.integers(0, 6, n_rows), 0, 50)
+    data["YearsCode"] = years_code
+    data["WorkExp"] = work_exp
+    log_salary += 0.04 * work_exp - 0.0006 * work_exp**2
+    log_salary += rng.normal(0, 0.45, n_rows)
+
+    salary = np.exp(log_salary).round()
+    salary[rng.random(n_rows) < 0.02] = 500.0
+    salary[rng.random(n_rows) < 0.05] = np.nan
+    data["ConvertedCompYearly"] = salary
+
+    # One currency per country, with a stable per-country exchange rate
+    country_idx = value_idx["Country"]
+    codes = np.array([f"C{i:02d}" for i in range(_CARDINALITY["Country"][0])])
+    rates = np.exp(rng.normal(0, 1.5, len(codes))).round(2)
+    currency_labels = np.array([f"{code} Currency name" for code in codes])
+    data["Currency"] = (
+        pd.Categorical.from_codes(country_idx, currency_labels)
+        if categorical
+        else currency_labels[country_idx]
+    )
+    data["CompTotal"] = (salary * rates[country_idx]).round()
+
+    return pd.DataFrame(data)[SURVEY_COLUMNS]
@@ -1,85 +1,98 @@
 """Per-category guardrail evaluation for the salary prediction model.
 
-Runs cross-validation and computes R2 scores and predicted vs actual salary
-comparisons broken down by each categorical feature value. Flags categories
-that fall below configurable thresholds.
+Computes R2 scores and predicted vs actual salary comparisons broken down by
+each categorical feature value, from out-of-fold predictions. Flags
+categories that fall below configurable thresholds.
+
+The out-of-fold predictions saved by the last src.train run are used when
+they were made from the same data and settings (see src.guardrails);
+otherwise cross-validation is run here.
+
+With guardrails.bootstrap_resamples (or --bootstrap N), per-category R2
+and abs % diff get bootstrap confidence intervals, and a category is only
+flagged when its whole interval is past the threshold.
+
+With guardrails.interactions (or --interactions), the worst two-way
+slices (e.g. Country x DevType) are listed as well; they are reported for
+inspection and do not count as violations.
+
+Usage:
+    uv run python guardrail_evaluation.py [--bootstrap 1000] [--interactions]
 """
 
+import argparse
 import sys
+import time
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 import yaml
 from sklearn.metrics import r2_score
-from sklearn.model_selection import KFold
-from xgboost import XGBRegressor
-
-from src.preprocessing import prepare_features, reduce_cardinality
-
 
-CATEGORICAL_FEATURES = ["Country", "EdLevel", "DevType", "Industry", "Age", "ICorPM"]
-
-
-def load_and_preprocess(config: dict) -> tuple[pd.DataFrame, pd.DataFrame, pd.Series]:
-    """Load data and apply same preprocessing as train.py.
-
-    Returns:
-        (df, X, y) where df has original categorical columns (after cardinality
-        reduction), X is one-hot encoded features, y is the target.
-    """
-    data_path = Path("data/survey_results_public.csv")
-    if not data_path.exists():
-        print(f"Error: Data file not found at {data_path}")
+from src.cache import load_cleaned_survey, survey_paths
+from src.cleaning import MAIN_LABEL
+from src.cv import run_cross_validation
+from src.guardrails import (
+    bootstrap_intervals,
+    category_metrics,
+    flag_violations,
+    format_table,
+    interaction_metrics,
+    load_oof,
+    oof_config_hash,
+    oof_path,
+    worst_slices,
+)
+from src.preprocessing import (
+    CATEGORICAL_FEATURES,
+    prepare_features,
+    prepare_features_native,
+)
+
+
+def load_survey(config: dict) -> pd.DataFrame:
+    """Load the cleaned survey, the same frame train.py trains on."""
+    try:
+        data_paths = survey_paths(config)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
         sys.exit(1)
 
-    df = pd.read_csv(
-        data_path,
-        usecols=[
-            "Country",
-            "YearsCode",
-            "WorkExp",
-            "EdLevel",
-            "DevType",
-            "Industry",
-            "Age",
-            "ICorPM",
-            "ConvertedCompYearly",
-        ],
+    # Same cleaned frame as train.py, shared through data/cache/
+    return load_cleaned_survey(
+        config, data_paths, use_cache=config["data"].get("use_cache", True)
     )
 
-    main_label = "ConvertedCompYearly"
-    min_salary = config["data"]["min_salary"]
-    df = df[df[main_label] > min_salary]
-
-    # Per-country percentile outlier removal
-    lower_pct = config["data"]["lower_percentile"] / 100
-    upper_pct = config["data"]["upper_percentile"] / 100
-    lower_bound = df.groupby("Country")[main_label].transform("quantile", lower_pct)
-    upper_bound = df.groupby("Country")[main_label].transform("quantile", upper_pct)
-    df = df[(df[main_label] > lower_bound) & (df[main_label] < upper_bound)]
-
-    df = df.dropna(subset=[main_label])
-
-    # Cardinality reduction (same as train.py)
-    for col in CATEGORICAL_FEATURES:
-        df[col] = reduce_cardinality(df[col])
-
-    # Drop rows with "Other" in specified features (same as train.py)
-    other_name = config["features"]["cardinality"].get("other_category", "Other")
-    drop_other_from = config["features"]["cardinality"].get("drop_other_from", [])
-    if drop_other_from:
-        before_drop = len(df)
-        for col in drop_other_from:
-            df = df[df[col] != other_name]
-        print(
-            f"Dropped {before_drop - len(df):,} rows with '{other_name}' in {drop_other_from}"
-        )
 
-    X = prepare_features(df)
-    y = df[main_label]
+def encode_features(config: dict, df: pd.DataFrame) -> pd.DataFrame:
+    """Model input of the cleaned survey, encoded as in train.py."""
+    if config["features"]["encoding"].get("method", "onehot") == "native":
+        # Same category lists train.py writes to valid_categories.yaml
+        categories = {col: sorted(df[col].unique()) for col in CATEGORICAL_FEATURES}
+        return prepare_features_native(df, categories)
+    return prepare_features(df)
+
+
+def oof_predictions(config: dict, df: pd.DataFrame) -> np.ndarray:
+    """Out-of-fold predictions for the rows of df.
 
-    return df, X, y
+    Read from the last training run when its data and settings match the
+    current ones; otherwise computed with run_cv_predictions().
+    """
+    path = oof_path(config["training"]["model_path"])
+    try:
+        predictions = load_oof(path, oof_config_hash(config), df.index)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"{e}; running cross-validation instead\n")
+        X = encode_features(config, df)
+        print(f"Features: {X.shape[1]}")
+        return run_cv_predictions(X, df[MAIN_LABEL], config)
+
+    print(f"Using out-of-fold predictions saved by training ({path})")
+    overall_r2 = r2_score(df[MAIN_LABEL], predictions)
+    print(f"\nOverall OOF R2: {overall_r2:.4f}")
+    return predictions
 
 
 def run_cv_predictions(
@@ -93,40 +106,15 @@ def run_cv_predictions(
     test set).
     """
     n_splits = config["data"].get("cv_splits", 5)
-    random_state = config["data"]["random_state"]
-    model_config = config["model"]
-
-    kf = KFold(n_splits=n_splits, shuffle=True, random_state=random_state)
-    oof_predictions = np.empty(len(y))
-    oof_predictions[:] = np.nan
+    encoding = config["features"]["encoding"].get("method", "onehot")
 
     print(f"Running {n_splits}-fold cross-validation...")
-    for fold, (train_idx, test_idx) in enumerate(kf.split(X), 1):
-        X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
-        y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
-
-        model = XGBRegressor(
-            n_estimators=model_config["n_estimators"],
-            learning_rate=model_config["learning_rate"],
-            max_depth=model_config["max_depth"],
-            min_child_weight=model_config["min_child_weight"],
-            random_state=model_config["random_state"],
-            n_jobs=model_config["n_jobs"],
-            early_stopping_rounds=model_config["early_stopping_rounds"],
-        )
-        model.fit(
-            X_train,
-            y_train,
-            eval_set=[(X_test, y_test)],
-            verbose=False,
-        )
-
-        test_r2 = model.score(X_test, y_test)
+    cv_results = run_cross_validation(X, y, config, encoding)
+    for fold, result in enumerate(cv_results["folds"], 1):
         print(
-            f"  Fold {fold}: Test R2 = {test_r2:.4f} (best iter: {model.best_iteration + 1})"
+            f"  Fold {fold}: Test R2 = {result['test_r2']:.4f} (best iter: {result['best_iteration']})"
         )
-
-        oof_predictions[test_idx] = model.predict(X_test)
+    oof_predictions = cv_results["oof_predictions"]
 
     overall_r2 = r2_score(y, oof_predictions)
     print(f"\nOverall OOF R2: {overall_r2:.4f}")
@@ -134,71 +122,52 @@ def run_cv_predictions(
     return oof_predictions
 
 
-def compute_category_metrics(
-    df: pd.DataFrame,
-    y: pd.Series,
-    predictions: np.ndarray,
-    feature: str,
-) -> pd.DataFrame:
-    """Compute per-category R2, mean actual/predicted, and abs % diff."""
-    results = []
-    categories = df[feature].values
-    actuals = y.values
-
-    for cat in sorted(df[feature].unique()):
-        mask = categories == cat
-        cat_actual = actuals[mask]
-        cat_pred = predictions[mask]
-        count = int(mask.sum())
-
-        if count < 2:
-            cat_r2 = float("nan")
-        else:
-            cat_r2 = r2_score(cat_actual, cat_pred)
-
-        mean_actual = cat_actual.mean()
-        mean_pred = cat_pred.mean()
-        abs_pct_diff = abs(mean_pred - mean_actual) / mean_actual * 100
-
-        results.append(
-            {
-                "Category": cat,
-                "Count": count,
-                "R2": cat_r2,
-                "Mean Actual ($)": mean_actual,
-                "Mean Predicted ($)": mean_pred,
-                "Abs % Diff": abs_pct_diff,
-            }
-        )
-
-    return pd.DataFrame(results)
-
-
-def format_table(metrics_df: pd.DataFrame) -> str:
-    """Format metrics DataFrame as a markdown table."""
-    lines = []
-    header = (
-        "| Category | Count | R2 | Mean Actual ($) | Mean Predicted ($) | Abs % Diff |"
-    )
-    sep = (
-        "|----------|------:|----:|----------------:|-------------------:|-----------:|"
-    )
-    lines.append(header)
-    lines.append(sep)
-
-    for _, row in metrics_df.iterrows():
-        r2_str = f"{row['R2']:.2f}" if not np.isnan(row["R2"]) else "N/A"
+def format_slices(slices: pd.DataFrame) -> str:
+    """Format interaction_metrics() rows as a markdown table."""
+    lines = [
+        "| Slice | Count | R2 | Mean Actual ($) | Mean Predicted ($) | Abs % Diff |",
+        "|-------|------:|----:|----------------:|-------------------:|-----------:|",
+    ]
+    for (
+        feature_a,
+        cat_a,
+        feature_b,
+        cat_b,
+    ), count, r2, mean_actual, mean_pred, abs_pct_diff in zip(
+        slices.index,
+        slices["Count"],
+        slices["R2"],
+        slices["Mean Actual ($)"],
+        slices["Mean Predicted ($)"],
+        slices["Abs % Diff"],
+        strict=True,
+    ):
+        label = f"{feature_a}={cat_a[:30]} x {feature_b}={cat_b[:30]}"
         lines.append(
-            f"| {row['Category'][:45]:45s} | {row['Count']:5,d} | {r2_str:>4s} "
-            f"| {row['Mean Actual ($)']:>15,.0f} | {row['Mean Predicted ($)']:>18,.0f} "
-            f"| {row['Abs % Diff']:>9.1f}% |"
+            f"| {label:70s} | {count:5,d} | {r2:4.2f} "
+            f"| {mean_actual:>15,.0f} | {mean_pred:>18,.0f} "
+            f"| {abs_pct_diff:>9.1f}% |"
         )
-
     return "\n".join(lines)
 
 
 def main():
     """Run per-category guardrail evaluation."""
+    parser = argparse.ArgumentParser(description="Per-category guardrail evaluation")
+    parser.add_argument(
+        "--bootstrap",
+        type=int,
+        metavar="RESAMPLES",
+        help="Bootstrap resamples for confidence intervals "
+        "(default: guardrails.bootstrap_resamples)",
+    )
+    parser.add_argument(
+        "--interactions",
+        action="store_true",
+        help="Also list the worst two-way slices (default: guardrails.interactions)",
+    )
+    args = parser.parse_args()
+
     config_path = Path("config/model_parameters.yaml")
     with open(config_path, "r") as f:
         config = yaml.safe_load(f)
@@ -206,41 +175,83 @@ def main():
     guardrails = config.get("guardrails", {})
     min_r2 = guardrails.get("min_r2_per_category", 0.30)
     max_pct_diff = guardrails.get("max_abs_pct_diff", 10)
+    resamples = (
+        args.bootstrap
+        if args.bootstrap is not None
+        else guardrails.get("bootstrap_resamples", 0)
+    )
 
     print("=" * 80)
     print("GUARDRAIL EVALUATION - Per-Category Model Quality")
     print(f"Thresholds: min R2 = {min_r2}, max abs % diff = {max_pct_diff}%")
     print("=" * 80)
 
-    df, X, y = load_and_preprocess(config)
-    print(f"Dataset: {len(df):,} rows, {X.shape[1]} features\n")
-
-    predictions = run_cv_predictions(X, y, config)
+    df = load_survey(config)
+    y = df[MAIN_LABEL]
+    print(f"Dataset: {len(df):,} rows\n")
+
+    predictions = oof_predictions(config, df)
+
+    # All features at once: grouped sums over the category codes
+    metrics = category_metrics(df, y.to_numpy(), predictions)
+    if resamples:
+        confidence = guardrails.get("bootstrap_confidence", 0.95)
+        workers = guardrails.get("bootstrap_workers", 1)
+        start = time.perf_counter()
+        intervals = bootstrap_intervals(
+            df,
+            y.to_numpy(),
+            predictions,
+            resamples,
+            confidence,
+            seed=config["data"]["random_state"],
+            workers=workers,
+        )
+        metrics = metrics.merge(intervals, on=["Feature", "Category"], how="left")
+        print(
+            f"\n{confidence:.0%} bootstrap intervals from {resamples:,} resamples "
+            f"({workers} worker(s), {time.perf_counter() - start:.1f}s); "
+            "categories are flagged only when the whole interval is past a threshold"
+        )
+    metrics = flag_violations(metrics, min_r2, max_pct_diff)
 
-    # Reset index alignment: df and y may have non-contiguous indices
-    # predictions array is positional, so align everything by position
-    df_eval = df.reset_index(drop=True)
-    y_eval = y.reset_index(drop=True)
+    for feature, feature_metrics in metrics.groupby("Feature", sort=False):
+        print(f"\n## {feature}\n")
+        print(format_table(feature_metrics))
+
+    if args.interactions or guardrails.get("interactions", False):
+        min_count = guardrails.get("interaction_min_count", 50)
+        top = guardrails.get("interaction_top", 20)
+        start = time.perf_counter()
+        interactions = interaction_metrics(
+            df, y.to_numpy(), predictions, min_count=min_count
+        )
+        print(
+            f"\n## Two-way slices\n\n{len(interactions):,} slices with at least "
+            f"{min_count} rows over all feature pairs "
+            f"({time.perf_counter() - start:.2f}s)"
+        )
+        for by in ["R2", "Abs % Diff"]:
+            print(f"\nWorst {top} by {by}:\n")
+            print(format_slices(worst_slices(interactions, top, by)))
 
     warnings = []
-
-    for feature in CATEGORICAL_FEATURES:
-        print(f"\n## {feature}\n")
-        metrics = compute_category_metrics(df_eval, y_eval, predictions, feature)
-        print(format_table(metrics))
-
-        # Check guardrails
-        for _, row in metrics.iterrows():
-            cat = row["Category"]
-            if not np.isnan(row["R2"]) and row["R2"] < min_r2:
-                warnings.append(
-                    f'{feature} "{cat}": R2 = {row["R2"]:.2f} (threshold: {min_r2})'
-                )
-            if row["Abs % Diff"] > max_pct_diff:
-                warnings.append(
-                    f'{feature} "{cat}": Abs % Diff = {row["Abs % Diff"]:.1f}% '
-                    f"(threshold: {max_pct_diff}%)"
-                )
+    violations = metrics[metrics["Low R2"] | metrics["High Diff"]]
+    for row in violations.to_dict("records"):
+        label = f'{row["Feature"]} "{row["Category"]}"'
+        r2_ci = diff_ci = ""
+        if resamples:
+            r2_ci = f", CI {row['R2 Low']:.2f} to {row['R2 High']:.2f}"
+            diff_ci = f", CI {row['Diff Low']:.1f} to {row['Diff High']:.1f}%"
+        if row["Low R2"]:
+            warnings.append(
+                f"{label}: R2 = {row['R2']:.2f}{r2_ci} (threshold: {min_r2})"
+            )
+        if row["High Diff"]:
+            warnings.append(
+                f"{label}: Abs % Diff = {row['Abs % Diff']:.1f}%{diff_ci} "
+                f"(threshold: {max_pct_diff}%)"
+            )
 
     # Summary
     print("\n" + "=" * 80)
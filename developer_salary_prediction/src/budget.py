@@ -0,0 +1,230 @@
+"""Time-budgeted prediction: serve with a prefix of the trees under load.
+
+Boosted trees are additive, so predicting with only the first N trees
+(iteration_range=(0, N)) gives a coarser answer at a fraction of the cost.
+degraded_mode.levels lists the prefixes to serve, as shares of the model's
+trees, best first. choose_trees() picks a level per request:
+
+- from the queue depth: level i once the queue holds at least
+  degraded_mode.queue_depths[i] requests
+- from a deadline: the largest level whose estimated predict time (a fixed
+  overhead plus a per-tree cost, measured by calibrate()) fits in it
+
+and serves the smaller of the two. src.infer.predict_salary_within_budget()
+applies it and reports the trees used.
+
+To pick the levels, print R2 and predict time against tree count for the
+deployed model. Without --data it is scored on its own training rows, which
+overstates R2; pass newly collected responses for an honest table:
+
+Usage:
+    uv run python -m src.budget [--data CSV ...] [--rows 50000]
+"""
+
+import argparse
+import pickle
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+import yaml
+from sklearn.metrics import r2_score
+
+from src.cache import load_cleaned_survey, survey_paths
+from src.cleaning import MAIN_LABEL
+from src.incremental import align_features, load_new_rows
+from src.model import (
+    artifact_booster,
+    model_trees,
+    per_call_seconds,
+    predict_frame,
+)
+
+# Shares of the trees scored by the offline table, besides the levels
+TABLE_FRACTIONS = [1.0, 0.75, 0.5, 0.35, 0.25, 0.15, 0.1, 0.05, 0.02]
+
+
+# Settings without a degraded_mode section: always the full model
+FULL_MODEL_ONLY = {"levels": [1.0], "queue_depths": [0]}
+
+
+def check_settings(settings: dict) -> None:
+    """
+    Validate the degraded_mode section before serving with it.
+
+    Raises:
+        ValueError: If levels is empty, not in (0, 1] or not decreasing, or
+            queue_depths does not hold one ascending depth per level
+    """
+    levels, depths = settings["levels"], settings["queue_depths"]
+    if not levels or any(not 0 < level <= 1 for level in levels):
+        raise ValueError(f"degraded_mode.levels must be shares in (0, 1]: {levels}")
+    if list(levels) != sorted(levels, reverse=True):
+        raise ValueError(f"degraded_mode.levels must be best first: {levels}")
+    if len(depths) != len(levels):
+        raise ValueError(
+            f"degraded_mode.queue_depths needs one depth per level: "
+            f"{len(depths)} depths for {len(levels)} levels"
+        )
+    if list(depths) != sorted(depths):
+        raise ValueError(f"degraded_mode.queue_depths must be ascending: {depths}")
+
+
+def level_trees(n_trees: int, fractions: list[float]) -> list[int]:
+    """Tree counts of the levels (at least one tree each), in the given order."""
+    return [max(1, round(fraction * n_trees)) for fraction in fractions]
+
+
+def calibrate(
+    booster: xgb.Booster, row: pd.DataFrame, encoding: str, repeats: int = 20
+) -> dict:
+    """
+    Single-row predict cost as a fixed overhead plus a cost per tree.
+
+    Fitted from timings with one tree and with all trees.
+
+    Returns:
+        Dict with overhead_seconds and tree_seconds
+    """
+    n_trees = model_trees(booster)
+    one = per_call_seconds(lambda: predict_frame(booster, row, encoding, 1), repeats)
+    full = per_call_seconds(lambda: predict_frame(booster, row, encoding), repeats)
+    tree_seconds = max(full - one, 0.0) / max(n_trees - 1, 1)
+    return {"overhead_seconds": one - tree_seconds, "tree_seconds": tree_seconds}
+
+
+def choose_trees(
+    levels: list[int],
+    settings: dict,
+    latency: dict | None = None,
+    queue_depth: int | None = None,
+    deadline_ms: float | None = None,
+) -> int:
+    """
+    Trees to predict with under the current load.
+
+    Args:
+        levels: level_trees() of degraded_mode.levels, most trees first
+        settings: degraded_mode section of model_parameters.yaml
+        latency: calibrate() result, needed with deadline_ms
+        queue_depth: Requests waiting, including this one
+        deadline_ms: Time left for this prediction
+
+    Returns:
+        One of `levels`; levels[0] when neither signal is given or there is
+        only one level
+    """
+    if len(levels) == 1:
+        return levels[0]
+    index = 0
+    if queue_depth is not None:
+        reached = np.asarray(settings["queue_depths"]) <= queue_depth
+        index = int(np.flatnonzero(reached)[-1]) if reached.any() else 0
+    if deadline_ms is not None:
+        estimates = [
+            latency["overhead_seconds"] + trees * latency["tree_seconds"]
+            for trees in levels
+        ]
+        fitting = [
+            i for i, seconds in enumerate(estimates) if seconds * 1000 <= deadline_ms
+        ]
+        index = max(index, fitting[0] if fitting else len(levels) - 1)
+    return levels[index]
+
+
+def r2_by_trees(
+    booster: xgb.Booster,
+    X: pd.DataFrame,
+    y: pd.Series,
+    encoding: str,
+    tree_counts: list[int],
+) -> pd.DataFrame:
+    """
+    R2 and single-row predict time of every tree prefix.
+
+    Returns:
+        DataFrame with Trees, Share, R2, R2 Loss (vs. all trees) and Row ms,
+        most trees first
+    """
+    rows = []
+    row = X.iloc[:1]
+    for trees in sorted(set(tree_counts), reverse=True):
+        predictions = predict_frame(booster, X, encoding, trees)
+        rows.append(
+            {
+                "Trees": trees,
+                "Share": trees / model_trees(booster),
+                "R2": r2_score(y, predictions),
+                "Row ms": per_call_seconds(
+                    lambda trees=trees: predict_frame(booster, row, encoding, trees),
+                    20,
+                )
+                * 1000,
+            }
+        )
+    table = pd.DataFrame(rows)
+    table.insert(3, "R2 Loss", table["R2"].iloc[0] - table["R2"])
+    return table
+
+
+def format_table(table: pd.DataFrame, levels: list[int]) -> str:
+    """The R2 table as text, marking the configured levels."""
+    lines = [f"{'trees':>7s} {'share':>6s} {'R2':>7s} {'R2 loss':>8s} {'row ms':>7s}"]
+    for _, row in table.iterrows():
+        marker = "  <- level" if row["Trees"] in levels else ""
+        lines.append(
+            f"{row['Trees']:7.0f} {row['Share']:6.0%} {row['R2']:7.4f} "
+            f"{row['R2 Loss']:8.4f} {row['Row ms']:7.3f}{marker}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    """Print R2 and predict time against tree count for the deployed model."""
+    parser = argparse.ArgumentParser(description="R2 versus tree count")
+    parser.add_argument(
+        "--data", type=Path, nargs="+", help="Survey CSVs (default: training data)"
+    )
+    parser.add_argument("--rows", type=int, default=50_000, help="Rows to score")
+    args = parser.parse_args()
+
+    with open("config/model_parameters.yaml", "r") as f:
+        config = yaml.safe_load(f)
+    with open(config["training"]["model_path"], "rb") as f:
+        artifacts = pickle.load(f)
+    booster = artifact_booster(artifacts)
+    encoding = artifacts.get("encoding", "onehot")
+
+    start = time.perf_counter()
+    if args.data:
+        # New responses are cleaned against the model, as in src.monitor
+        df, _ = load_new_rows(config, args.data, artifacts)
+    else:
+        df = load_cleaned_survey(
+            config,
+            survey_paths(config),
+            use_cache=config["data"].get("use_cache", True),
+            verbose=False,
+        )
+    X, known = align_features(df, artifacts)
+    X, y = X[known], df[MAIN_LABEL][known]
+    if len(X) > args.rows:
+        sample = np.random.default_rng(config["data"]["random_state"]).choice(
+            len(X), args.rows, replace=False
+        )
+        X, y = X.iloc[np.sort(sample)], y.iloc[np.sort(sample)]
+    print(f"Scoring {len(X):,} rows{'' if args.data else ' (training data)'}")
+
+    n_trees = model_trees(booster)
+    levels = level_trees(n_trees, config["degraded_mode"]["levels"])
+    table = r2_by_trees(
+        booster, X, y, encoding, level_trees(n_trees, TABLE_FRACTIONS) + levels
+    )
+    print(format_table(table, levels))
+    print(f"({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Content-addressed cache of the cleaned survey dataset.
+
+Reading the full survey CSV and cleaning it (salary filters, per-country
+trimming, cardinality reduction, dropping "Other") is repeated by every
+training and guardrail run. The cleaned frame is stored as Parquet under
+data/cache/, keyed by a hash of the contents of every CSV, the survey
+schema mappings, the config sections that affect cleaning and
+CLEANING_VERSION. Any change to those gives a new key, so stale entries
+are never read.
+
+Usage:
+    uv run python -m src.cache list
+    uv run python -m src.cache purge [--key KEY]
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+import pandas as pd
+
+from src.cleaning import MAIN_LABEL, clean_survey
+from src.ingest import load_schema, read_surveys
+
+CACHE_DIR = Path("data/cache")
+
+# Bump when clean_survey() changes in a way that alters its output
+CLEANING_VERSION = 3
+
+# Survey columns kept in the cleaned frame
+RAW_COLUMNS = [
+    "Country",
+    "YearsCode",
+    "WorkExp",
+    "EdLevel",
+    "DevType",
+    "Industry",
+    "Age",
+    "ICorPM",
+    "Currency",
+    "CompTotal",
+    "ConvertedCompYearly",
+]
+
+_DIGESTS_FILE = "digests.json"
+
+# Survey used when data.survey_files is not configured
+DEFAULT_SURVEY = "data/survey_results_public.csv"
+
+
+def cleaning_config(config: dict) -> dict:
+    """Select the configuration that influences clean_survey()."""
+    data = config["data"]
+    return {
+        "min_salary": data["min_salary"],
+        "lower_percentile": data["lower_percentile"],
+        "upper_percentile": data["upper_percentile"],
+        "cardinality": config["features"]["cardinality"],
+    }
+
+
+def file_digest(path: Path) -> str:
+    """
+    SHA-256 of a file's contents.
+
+    Digests are remembered per (path, size, mtime) in data/cache/digests.json,
+    so an unchanged CSV is not re-read just to compute its key.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    stamp = f"{stat.st_size}:{stat.st_mtime_ns}"
+    digests_path = CACHE_DIR / _DIGESTS_FILE
+    digests = {}
+    if digests_path.exists():
+        with open(digests_path, "r") as f:
+            digests = json.load(f)
+
+    entry = digests.get(str(path))
+    if entry and entry["stamp"] == stamp:
+        return entry["sha256"]
+
+    with open(path, "rb") as f:
+        digest = hashlib.file_digest(f, "sha256").hexdigest()
+    digests[str(path)] = {"stamp": stamp, "sha256": digest}
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(digests_path, "w") as f:
+        json.dump(digests, f, indent=2)
+    return digest
+
+
+def survey_paths(config: dict) -> list[Path]:
+    """
+    Survey CSVs listed in data.survey_files, with glob patterns expanded.
+
+    Raises:
+        FileNotFoundError: A path or pattern matches no file
+    """
+    paths = []
+    for pattern in config["data"].get("survey_files", [DEFAULT_SURVEY]):
+        matches = sorted(Path().glob(pattern)) if glob.has_magic(pattern) else []
+        if not matches and not Path(pattern).exists():
+            raise FileNotFoundError(f"No survey file matches {pattern}")
+        paths.extend(matches or [Path(pattern)])
+    return paths
+
+
+def _as_paths(data_path: Path | list[Path]) -> list[Path]:
+    if isinstance(data_path, (str, Path)):
+        return [Path(data_path)]
+    return [Path(path) for path in data_path]
+
+
+def cache_key(data_path: Path | list[Path], config: dict) -> str:
+    """Key for the cleaned version of the survey file(s) under `config`."""
+    payload = json.dumps(
+        {
+            "csv_sha256": [file_digest(path) for path in _as_paths(data_path)],
+            "schema": load_schema(),
+            "config": cleaning_config(config),
+            "columns": RAW_COLUMNS,
+            "version": CLEANING_VERSION,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def load_cleaned_survey(
+    config: dict,
+    data_path: Path | list[Path] = Path(DEFAULT_SURVEY),
+    use_cache: bool = True,
+    verbose: bool = True,
+) -> pd.DataFrame:
+    """
+    Return the cleaned survey frame, from the cache when possible.
+
+    Args:
+        config: Full model_parameters.yaml configuration
+        data_path: Survey CSV, or several (e.g. survey years) to combine
+        use_cache: Read and write data/cache/ (False always rebuilds)
+        verbose: Print progress
+
+    Returns:
+        Output of clean_survey() for RAW_COLUMNS of the CSV(s), plus
+        SurveyYear; the index holds the original CSV row positions for a
+        single file
+    """
+    if use_cache:
+        key = cache_key(data_path, config)
+        parquet_path = CACHE_DIR / f"{key}.parquet"
+        if parquet_path.exists():
+            start = time.perf_counter()
+            df = pd.read_parquet(parquet_path)
+            if verbose:
+                print(
+                    f"Loaded {len(df):,} cleaned rows from cache {key} "
+                    f"in {time.perf_counter() - start:.2f}s"
+                )
+            return df
+
+    start = time.perf_counter()
+    # Rows at or below the salary threshold (or without one) are dropped
+    # while reading, which is also the first step of clean_survey()
+    min_salary = config["data"]["min_salary"]
+    df = read_surveys(
+        _as_paths(data_path),
+        RAW_COLUMNS,
+        load_schema(),
+        chunksize=config["data"].get("read_chunksize"),
+        row_filter=lambda chunk: chunk[chunk[MAIN_LABEL] > min_salary],
+        workers=config["data"].get("read_workers", 4),
+    )
+    if verbose:
+        print(f"Loaded {len(df):,} rows with a salary above {min_salary:,}")
+        print("Removing null, extremely small and large reported salaries")
+    df = clean_survey(df, config, verbose=verbose)
+    seconds = time.perf_counter() - start
+
+    if use_cache:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write under a temporary name so a crash never leaves a partial entry
+        tmp_path = parquet_path.with_suffix(".parquet.tmp")
+        df.to_parquet(tmp_path)
+        tmp_path.replace(parquet_path)
+        metadata = {
+            "key": key,
+            "source": ", ".join(str(p.resolve()) for p in _as_paths(data_path)),
+            "csv_sha256": [file_digest(path) for path in _as_paths(data_path)],
+            "config": cleaning_config(config),
+            "version": CLEANING_VERSION,
+            "rows": len(df),
+            "build_seconds": round(seconds, 2),
+            "created": datetime.now(UTC).isoformat(timespec="seconds"),
+        }
+        with open(CACHE_DIR / f"{key}.json", "w") as f:
+            json.dump(metadata, f, indent=2)
+        if verbose:
+            print(f"Cached cleaned dataset as {key} ({seconds:.1f}s to build)")
+
+    return df
+
+
+def cleaned_survey_path(
+    config: dict,
+    data_path: Path | list[Path] = Path(DEFAULT_SURVEY),
+    verbose: bool = True,
+) -> Path:
+    """
+    Parquet file of the cleaned survey, built first if it is not cached.
+
+    For readers that stream the cleaned rows in batches (src.external_memory)
+    instead of loading the whole frame.
+    """
+    parquet_path = CACHE_DIR / f"{cache_key(data_path, config)}.parquet"
+    if not parquet_path.exists():
+        load_cleaned_survey(config, data_path, use_cache=True, verbose=verbose)
+    return parquet_path
+
+
+def list_entries() -> list[dict]:
+    """Metadata of every cache entry, newest first."""
+    entries = []
+    for meta_path in CACHE_DIR.glob("*.json"):
+        if meta_path.name == _DIGESTS_FILE:
+            continue
+        with open(meta_path, "r") as f:
+            entry = json.load(f)
+        parquet_path = meta_path.with_suffix(".parquet")
+        entry["size_bytes"] = (
+            parquet_path.stat().st_size if parquet_path.exists() else 0
+        )
+        entries.append(entry)
+    return sorted(entries, key=lambda e: e["created"], reverse=True)
+
+
+def purge(key: str | None = None) -> int:
+    """
+    Delete cache entries.
+
+    Args:
+        key: Entry to delete (default: all entries and remembered digests)
+
+    Returns:
+        Number of files removed
+    """
+    pattern = f"{key}.*" if key else "*"
+    removed = 0
+    for path in CACHE_DIR.glob(pattern):
+        if path.is_file():
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def main():
+    """Inspect or purge the cleaned dataset cache."""
+    parser = argparse.ArgumentParser(description="Cleaned survey dataset cache")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="Show cache entries")
+    purge_parser = subparsers.add_parser("purge", help="Delete cache entries")
+    purge_parser.add_argument("--key", help="Only delete this entry")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        entries = list_entries()
+        if not entries:
+            print(f"No cache entries in {CACHE_DIR}")
+            return
+        for entry in entries:
+            print(
+                f"{entry['key']}  {entry['created']}  {entry['rows']:>9,} rows  "
+                f"{entry['size_bytes'] / 1e6:7.1f} MB  {entry['source']}"
+            )
+    else:
+        print(f"Removed {purge(args.key)} file(s) from {CACHE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Survey row filtering and category cleanup shared by training and evaluation."""
+
+import numpy as np
+import pandas as pd
+
+from src.preprocessing import CATEGORICAL_FEATURES, reduce_cardinality
+
+# Target column in the Stack Overflow survey
+MAIN_LABEL = "ConvertedCompYearly"
+
+
+def _linear_quantile(partitioned: np.ndarray, q: float) -> float:
+    """Linear-interpolated quantile, computed exactly as pandas groupby does."""
+    position = q * (len(partitioned) - 1)
+    idx = int(position)
+    frac = position % 1
+    if frac == 0:
+        return partitioned[idx]
+    return partitioned[idx] + frac * (partitioned[idx + 1] - partitioned[idx])
+
+
+def group_percentile_bounds(
+    values: pd.Series, groups: pd.Series, lower_pct: float, upper_pct: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Per-group lower and upper quantiles, broadcast back to every row.
+
+    Equivalent to two `values.groupby(groups).transform("quantile", q)` calls
+    (linear interpolation, NaN values ignored, NaN groups give NaN bounds),
+    but rows are grouped once with a linear-time stable sort of the group
+    codes, and each group is only partially ordered with np.partition to
+    find the few order statistics the two quantiles need.
+
+    Args:
+        values: Numeric values (e.g. salaries)
+        groups: Group labels aligned with `values` (e.g. countries)
+        lower_pct: Lower quantile as a fraction in [0, 1]
+        upper_pct: Upper quantile as a fraction in [0, 1]
+
+    Returns:
+        (lower, upper) float arrays with one entry per row
+    """
+    codes, uniques = pd.factorize(groups)
+    vals = values.to_numpy(dtype="float64")
+    valid = (codes >= 0) & ~np.isnan(vals)
+    codes_valid = codes[valid]
+
+    # numpy uses an O(n) radix sort for stable sorts of 8/16-bit integers
+    code_dtype = np.min_scalar_type(len(uniques))
+    order = np.argsort(codes_valid.astype(code_dtype), kind="stable")
+    grouped = vals[valid][order]
+    counts = np.bincount(codes_valid, minlength=len(uniques))
+    ends = np.cumsum(counts)
+
+    lower = np.full(len(uniques) + 1, np.nan)
+    upper = np.full(len(uniques) + 1, np.nan)
+    for code, (count, end) in enumerate(zip(counts, ends, strict=True)):
+        if count == 0:
+            continue
+        kth = set()
+        for q in (lower_pct, upper_pct):
+            idx = int(q * (count - 1))
+            kth.update((idx, min(idx + 1, count - 1)))
+        partitioned = np.partition(grouped[end - count : end], sorted(kth))
+        lower[code] = _linear_quantile(partitioned, lower_pct)
+        upper[code] = _linear_quantile(partitioned, upper_pct)
+
+    # Code -1 (missing group) indexes the trailing NaN entry
+    return lower[codes], upper[codes]
+
+
+def clean_survey(df: pd.DataFrame, config: dict, verbose: bool = True) -> pd.DataFrame:
+    """
+    Turn raw survey rows into the cleaned training frame.
+
+    Steps, in order:
+        1. Keep rows with salary above data.min_salary
+        2. Drop per-country outliers outside the configured percentile bounds
+        3. Drop rows with a missing target
+        4. Normalize Unicode apostrophes in categorical columns
+        5. Reduce cardinality of each categorical column
+        6. Drop rows whose value is "Other" in features.cardinality.drop_other_from
+
+    Args:
+        df: Raw survey rows (at least the categorical features and MAIN_LABEL)
+        config: Full model_parameters.yaml configuration
+        verbose: Print row counts after each filtering step
+
+    Returns:
+        Filtered copy of the input; the categorical columns hold the
+        cardinality-reduced values used for both training and valid_categories.yaml
+    """
+    # select records with main label more than min_salary threshold
+    min_salary = config["data"]["min_salary"]
+    df = df[df[MAIN_LABEL] > min_salary]
+    # Exclude outliers based on percentile bounds PER COUNTRY
+    # This preserves records from lower-paid and higher-paid countries
+    # that would otherwise be removed by global percentile filtering
+    lower_pct = config["data"]["lower_percentile"] / 100
+    upper_pct = config["data"]["upper_percentile"] / 100
+    lower_bound, upper_bound = group_percentile_bounds(
+        df[MAIN_LABEL], df["Country"], lower_pct, upper_pct
+    )
+    df = df[(df[MAIN_LABEL] > lower_bound) & (df[MAIN_LABEL] < upper_bound)]
+
+    if verbose:
+        print(df.shape)
+
+    # Drop rows with missing target
+    df = df.dropna(subset=[MAIN_LABEL]).copy()
+    if verbose:
+        print(f"After removing missing targets: {len(df):,} rows")
+
+    # Normalize Unicode apostrophes before counting, so that both spellings
+    # of a category are counted together by cardinality reduction
+    for col in CATEGORICAL_FEATURES:
+        df[col] = df[col].str.replace("\u2019", "'", regex=False)
+        df[col] = reduce_cardinality(df[col])
+
+    # Drop rows with "Other" in specified features (low-quality catch-all categories)
+    other_name = config["features"]["cardinality"].get("other_category", "Other")
+    drop_other_from = config["features"]["cardinality"].get("drop_other_from", [])
+    if drop_other_from:
+        before_drop = len(df)
+        for col in drop_other_from:
+            df = df[df[col] != other_name]
+        if verbose:
+            print(
+                f"Dropped {before_drop - len(df):,} rows with '{other_name}' in {drop_other_from}"
+            )
+            print(f"After dropping 'Other': {len(df):,} rows")
+
+    return df
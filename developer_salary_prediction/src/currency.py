@@ -0,0 +1,84 @@
+"""Per-country local currency and conversion rate derived from survey answers.
+
+Respondents report their compensation in local currency (CompTotal, with a
+"Currency" answer like "EUR European Euro") and the survey provides the
+converted USD value. The ratio of the two is an implied exchange rate; the
+app uses the median rate of each country's most common currency to show
+predictions in local currency.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.cleaning import MAIN_LABEL
+
+# Implied rates outside this open interval are treated as data entry errors
+MIN_RATE = 0.001
+MAX_RATE = 100000
+
+
+def derive_currency_rates(df: pd.DataFrame, countries: list[str]) -> dict:
+    """
+    Most common currency and its median conversion rate for each country.
+
+    Countries and currency codes are factorized to integers, so two grouped
+    passes replace a per-country scan of the whole frame: a count per
+    (country, code) selects each country's modal currency, then the rows of
+    the selected pairs give the first reported currency name and the median
+    rate. Ties go to the alphabetically first code, as with Series.mode().
+    The "Currency" answer is split once per distinct value, not per row.
+
+    Args:
+        df: Cleaned survey rows with Country, Currency, CompTotal and MAIN_LABEL
+        countries: Countries to include (e.g. the valid Country categories)
+
+    Returns:
+        Dict mapping country to {"code", "name", "rate"} (rate rounded to 2
+        decimals), in `countries` order; countries without usable rows are
+        omitted
+    """
+    rows = df[["Country", "Currency", "CompTotal", MAIN_LABEL]].dropna()
+    rows = rows[rows["Country"].isin(countries)]
+    # Conversion rate: local currency / USD
+    rate = (rows["CompTotal"] / rows[MAIN_LABEL]).to_numpy(dtype="float64")
+    # Filter out unreasonable rates (negative, zero, or extreme)
+    usable = (rate > MIN_RATE) & (rate < MAX_RATE)
+    rows = rows[usable]
+    rate = rate[usable]
+    if rows.empty:
+        return {}
+
+    country_ids, country_values = pd.factorize(rows["Country"])
+    value_ids, values = pd.factorize(rows["Currency"])
+    # Split values like "EUR European Euro" into code and name
+    parts = pd.Series(values, dtype=object).str.split(r"\s+", n=1)
+    names = parts.str[1].to_numpy()
+    # Sorted factorization: a smaller code id is an alphabetically smaller code
+    code_of_value, codes = pd.factorize(parts.str[0], sort=True)
+    code_ids = code_of_value[value_ids]
+
+    # Row counts per (country, code); argmax keeps the first (smallest) code
+    counts = np.bincount(
+        country_ids * len(codes) + code_ids,
+        minlength=len(country_values) * len(codes),
+    ).reshape(len(country_values), len(codes))
+    modal_code = counts.argmax(axis=1)
+
+    selected = np.flatnonzero(code_ids == modal_code[country_ids])
+    selected_countries = country_ids[selected]
+    # Index of the first matching record of each country
+    _, first = np.unique(selected_countries, return_index=True)
+    median_rates = pd.Series(rate[selected]).groupby(selected_countries).median()
+
+    lookup = {country: i for i, country in enumerate(country_values)}
+    currency_rates = {}
+    for country in countries:
+        if country not in lookup:
+            continue
+        i = lookup[country]
+        currency_rates[country] = {
+            "code": codes[modal_code[i]],
+            "name": names[value_ids[selected[first[i]]]],
+            "rate": round(float(median_rates[i]), 2),
+        }
+    return currency_rates
@@ -0,0 +1,210 @@
+"""Cross-validation shared by training and guardrail evaluation."""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import r2_score
+from sklearn.model_selection import KFold
+
+from src.model import (
+    build_reference_matrix,
+    collapsed_training_matrix,
+    evaluation_matrix,
+    fit_booster,
+    predict_best,
+    training_matrix,
+)
+from src.telemetry import RoundTimer
+
+# Data handed to each worker process once by the pool initializer
+_worker_data = {}
+
+
+def plan_thread_budget(model_config: dict, n_folds: int, workers: int) -> tuple:
+    """
+    Split the XGBoost thread budget across concurrently fitted folds.
+
+    The budget is the model's n_jobs, or every core when n_jobs is -1.
+
+    Returns:
+        (workers, n_jobs_per_fold) with workers * n_jobs_per_fold <= budget
+    """
+    budget = model_config["n_jobs"]
+    if budget is None or budget < 1:
+        budget = os.cpu_count() or 1
+    workers = max(1, min(workers, n_folds, budget))
+    return workers, max(1, budget // workers)
+
+
+def worker_context() -> multiprocessing.context.BaseContext:
+    """
+    Start method for worker process pools: forkserver, or spawn without it.
+
+    By the time workers start, XGBoost's OpenMP threads have usually run in
+    this process (e.g. quantizing the reference matrix), and forking a
+    multi-threaded process can deadlock the child.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods else "spawn"
+    )
+
+
+def _fit_fold(
+    X: pd.DataFrame,
+    y: pd.Series,
+    reference: xgb.QuantileDMatrix,
+    train_idx: np.ndarray,
+    test_idx: np.ndarray,
+    model_config: dict,
+    encoding: str,
+    n_jobs: int,
+    keep_model: bool = False,
+    groups: np.ndarray | None = None,
+) -> dict:
+    """Fit one fold and return its scores and out-of-fold predictions."""
+    start = time.perf_counter()
+    # Fold matrices reuse the reference bin cuts instead of re-sketching
+    if groups is None:
+        dtrain = training_matrix(X, y, train_idx, reference, encoding)
+        train_order = np.arange(len(train_idx))
+    else:
+        dtrain, train_order = collapsed_training_matrix(
+            X, y, train_idx, groups, reference, encoding
+        )
+    dtest = evaluation_matrix(X, y, test_idx, encoding)
+    setup_seconds = time.perf_counter() - start
+
+    timer = RoundTimer()
+    booster = fit_booster(model_config, dtrain, dtest, n_jobs=n_jobs, callbacks=[timer])
+
+    test_pred = predict_best(booster, dtest)
+    train_pred = predict_best(booster, dtrain)[train_order]
+    result = {
+        "train_r2": r2_score(y.iloc[train_idx], train_pred),
+        "test_r2": r2_score(y.iloc[test_idx], test_pred),
+        "best_iteration": booster.best_iteration + 1,
+        "test_predictions": test_pred,
+        "train_rows": len(train_idx),
+        "test_rows": len(test_idx),
+        "train_matrix_rows": dtrain.num_row(),
+        "training": timer.summary(
+            booster.best_iteration + 1, model_config["n_estimators"]
+        ),
+        "setup_seconds": setup_seconds,
+        "seconds": time.perf_counter() - start,
+    }
+    if keep_model:
+        # Serialized so it can be returned from a worker process
+        result["model"] = booster.save_raw("ubj")
+    return result
+
+
+def _init_worker(X: pd.DataFrame, y: pd.Series, encoding: str) -> None:
+    # QuantileDMatrix cannot be pickled and XGBoost cannot rebuild one from
+    # saved cut points, so each worker sketches all rows once more. The
+    # sketch is deterministic, so the cuts match the parent's reference; the
+    # cost is one extra quantization per worker, run concurrently
+    _worker_data["X"] = X
+    _worker_data["y"] = y
+    _worker_data["reference"] = build_reference_matrix(X, y, encoding)
+
+
+def _fit_fold_in_worker(args: tuple) -> dict:
+    return _fit_fold(
+        _worker_data["X"], _worker_data["y"], _worker_data["reference"], *args
+    )
+
+
+def run_cross_validation(
+    X: pd.DataFrame,
+    y: pd.Series,
+    config: dict,
+    encoding: str = "onehot",
+    workers: int | None = None,
+    reference: xgb.QuantileDMatrix | None = None,
+    keep_models: bool = False,
+    groups: np.ndarray | None = None,
+) -> dict:
+    """
+    Run shuffled KFold CV, optionally fitting folds concurrently.
+
+    Feature quantiles are sketched once over all rows; every fold's training
+    matrix is binned with those cuts rather than re-sketching its subset.
+
+    Args:
+        X: Model input
+        y: Target
+        config: Full model_parameters.yaml configuration
+        encoding: Categorical encoding of X ("onehot" or "native")
+        workers: Folds fitted at once in separate processes
+                 (default: training.cv_workers, 1 = sequential)
+        reference: Quantized full data from build_reference_matrix(), to
+                   share with a later fit (built here when omitted). Only
+                   used sequentially: worker processes cannot receive it and
+                   build their own, with the same cuts
+        keep_models: Also return each fold's booster, as "model" (raw UBJSON
+                     bytes; load with xgboost.Booster(model_file=...))
+        groups: duplicate_groups() of X, to train each fold on its rows with
+                duplicate feature vectors collapsed into weighted rows
+                (scores and predictions stay per original row)
+
+    Returns:
+        Dict with "folds" (per-fold train_r2, test_r2, best_iteration,
+        train_rows, test_rows, train_matrix_rows, training (RoundTimer
+        summary), setup_seconds and seconds, in fold order),
+        "oof_predictions" (one prediction per row, from the fold where it
+        was held out), "workers", "n_jobs_per_fold", "reference_seconds"
+        and "wall_seconds"
+    """
+    n_splits = config["data"].get("cv_splits", 5)
+    random_state = config["data"]["random_state"]
+    model_config = config["model"]
+    if workers is None:
+        workers = config["training"].get("cv_workers", 1)
+
+    kf = KFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    splits = list(kf.split(X))
+    workers, n_jobs = plan_thread_budget(model_config, n_splits, workers)
+
+    tasks = [
+        (train_idx, test_idx, model_config, encoding, n_jobs, keep_models, groups)
+        for train_idx, test_idx in splits
+    ]
+
+    start = time.perf_counter()
+    reference_seconds = 0.0
+    if workers == 1:
+        if reference is None:
+            reference = build_reference_matrix(X, y, encoding)
+            reference_seconds = time.perf_counter() - start
+        folds = [_fit_fold(X, y, reference, *task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=worker_context(),
+            initializer=_init_worker,
+            initargs=(X, y, encoding),
+        ) as executor:
+            # map() yields results in submission order, so the merge below
+            # is deterministic whichever fold finishes first
+            folds = list(executor.map(_fit_fold_in_worker, tasks))
+    wall_seconds = time.perf_counter() - start
+
+    oof_predictions = np.full(len(y), np.nan)
+    for (_, test_idx), fold in zip(splits, folds):
+        oof_predictions[test_idx] = fold.pop("test_predictions")
+
+    return {
+        "folds": folds,
+        "oof_predictions": oof_predictions,
+        "workers": workers,
+        "n_jobs_per_fold": n_jobs,
+        "reference_seconds": reference_seconds,
+        "wall_seconds": wall_seconds,
+    }
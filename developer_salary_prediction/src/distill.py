@@ -0,0 +1,218 @@
+"""Distill the final model into a small, fast student model.
+
+With learning_rate 0.01 the final model can reach thousands of trees. The
+student is a shallow booster with a few hundred trees, trained to reproduce
+the final model's (the teacher's) predictions rather than the salaries.
+Its training rows are the survey rows plus synthetic grid points: random
+combinations of every valid category with years of experience across the
+observed range, so that combinations rare in the survey are covered too.
+
+A random distillation.gate_fraction of the survey rows is kept out of the
+student's training. On these rows, the student's R2 against the actual
+salaries, overall and per category of each categorical feature, must stay
+within the configured deltas of the teacher's, and so must its guardrail
+abs % diff. Only then is the student saved with the artifacts (as
+"fast_model"); src.infer.predict_salary(..., fast=True) uses it.
+The teacher was trained on the gate rows, so its scores there are
+optimistic and the gate errs on the strict side.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import r2_score
+from sklearn.model_selection import train_test_split
+
+from src.cleaning import MAIN_LABEL
+from src.guardrails import category_metrics
+from src.incremental import align_features
+from src.model import compact_model, fit_booster, per_call_seconds, predict_frame
+from src.preprocessing import CATEGORICAL_FEATURES
+
+
+def grid_points(
+    categories: dict, df: pd.DataFrame, n_rows: int, seed: int
+) -> pd.DataFrame:
+    """
+    Synthetic survey rows covering the feature space.
+
+    Each categorical value is drawn uniformly from the category lists;
+    YearsCode is a whole number up to the largest in `df`, and WorkExp a
+    whole number up to YearsCode.
+    """
+    rng = np.random.default_rng(seed)
+    grid = {col: rng.choice(categories[col], n_rows) for col in CATEGORICAL_FEATURES}
+    years_code = rng.integers(0, int(df["YearsCode"].max()) + 1, n_rows)
+    grid["YearsCode"] = years_code.astype(float)
+    grid["WorkExp"] = np.floor(rng.random(n_rows) * (years_code + 1))
+    return pd.DataFrame(grid)
+
+
+def category_scores(
+    df: pd.DataFrame, actual: np.ndarray, predictions: np.ndarray, min_rows: int
+) -> pd.DataFrame:
+    """
+    R2 and guardrail abs % diff per category of every categorical feature.
+
+    Categories with fewer than `min_rows` rows are left out.
+
+    Returns:
+        DataFrame indexed by (feature, category) with Count, R2 and Abs % Diff
+    """
+    metrics = category_metrics(df, actual, predictions)
+    metrics = metrics[metrics["Count"] >= min_rows]
+    return metrics.set_index(["Feature", "Category"]).rename_axis(
+        ["feature", "category"]
+    )[["Count", "R2", "Abs % Diff"]]
+
+
+def check_gate(teacher: pd.DataFrame, student: pd.DataFrame, settings: dict) -> list:
+    """
+    Categories where the student falls short of the teacher.
+
+    Returns:
+        One message per (feature, category) whose R2 dropped by more than
+        max_category_r2_drop or whose abs % diff rose by more than
+        max_pct_diff_increase
+    """
+    r2_drop = teacher["R2"] - student["R2"]
+    pct_increase = student["Abs % Diff"] - teacher["Abs % Diff"]
+    failed = (r2_drop > settings["max_category_r2_drop"]) | (
+        pct_increase > settings["max_pct_diff_increase"]
+    )
+    return [
+        f'{feature} "{category}": R2 {teacher["R2"][feature, category]:.3f} -> '
+        f"{student['R2'][feature, category]:.3f}, abs % diff "
+        f"{teacher['Abs % Diff'][feature, category]:.1f}% -> "
+        f"{student['Abs % Diff'][feature, category]:.1f}%"
+        for feature, category in failed[failed].index
+    ]
+
+
+def distill(
+    config: dict,
+    df: pd.DataFrame,
+    X: pd.DataFrame,
+    teacher: xgb.Booster,
+    categories: dict,
+    verbose: bool = True,
+) -> tuple:
+    """
+    Train a student model on the teacher's predictions and gate it.
+
+    Args:
+        config: Full model_parameters.yaml configuration
+        df: Cleaned survey rows (categorical columns and salaries) behind X
+        X: Encoded model input of df
+        teacher: Final model booster
+        categories: Category lists X was encoded with
+        verbose: Print progress
+
+    Returns:
+        (student, report) where student is the compact model bytes, or None
+        when the gate failed, and report holds the sizes, timings and gate
+        metrics
+    """
+    settings = config["distillation"]
+    encoding = config["features"]["encoding"].get("method", "onehot")
+    random_state = config["data"]["random_state"]
+    student_config = {**config["model"], **settings["student"]}
+    actual = df[MAIN_LABEL].to_numpy()
+
+    start = time.perf_counter()
+    pool_rows, gate_rows = train_test_split(
+        np.arange(len(X)),
+        test_size=settings["gate_fraction"],
+        random_state=random_state,
+    )
+    grid = grid_points(categories, df, settings["synthetic_rows"], random_state)
+    layout = {
+        "categories": categories,
+        "feature_columns": list(X.columns),
+        "encoding": encoding,
+    }
+    X_grid, _ = align_features(grid, layout)
+    X_pool = pd.concat([X.iloc[pool_rows], X_grid], ignore_index=True)
+    y_pool = predict_frame(teacher, X_pool, encoding)
+
+    train_rows, es_rows = train_test_split(
+        np.arange(len(X_pool)), test_size=0.1, random_state=random_state
+    )
+    dtrain = xgb.QuantileDMatrix(
+        X_pool.iloc[train_rows],
+        y_pool[train_rows],
+        enable_categorical=encoding == "native",
+    )
+    dvalid = xgb.DMatrix(
+        X_pool.iloc[es_rows],
+        y_pool[es_rows],
+        enable_categorical=encoding == "native",
+    )
+    booster = fit_booster(student_config, dtrain, dvalid)
+    student = compact_model(booster)
+    student_booster = xgb.Booster(model_file=bytearray(student))
+    seconds = time.perf_counter() - start
+
+    X_gate = X.iloc[gate_rows]
+    teacher_pred = predict_frame(teacher, X_gate, encoding)
+    student_pred = predict_frame(student_booster, X_gate, encoding)
+    teacher_r2 = r2_score(actual[gate_rows], teacher_pred)
+    student_r2 = r2_score(actual[gate_rows], student_pred)
+    df_gate = df.iloc[gate_rows]
+    failures = check_gate(
+        category_scores(
+            df_gate, actual[gate_rows], teacher_pred, settings["min_category_rows"]
+        ),
+        category_scores(
+            df_gate, actual[gate_rows], student_pred, settings["min_category_rows"]
+        ),
+        settings,
+    )
+    if teacher_r2 - student_r2 > settings["max_r2_drop"]:
+        failures.insert(0, f"overall R2 {teacher_r2:.4f} -> {student_r2:.4f}")
+
+    row = X_gate.iloc[:1]
+    report = {
+        "enabled": True,
+        "passed": not failures,
+        "failures": failures,
+        "teacher_trees": teacher.best_iteration + 1,
+        "student_trees": student_booster.num_boosted_rounds(),
+        "student_bytes": len(student),
+        "synthetic_rows": len(X_grid),
+        "gate_rows": len(gate_rows),
+        "teacher_r2": teacher_r2,
+        "student_r2": student_r2,
+        "teacher_row_seconds": per_call_seconds(
+            lambda: predict_frame(teacher, row, encoding), 50
+        ),
+        "student_row_seconds": per_call_seconds(
+            lambda: predict_frame(student_booster, row, encoding), 50
+        ),
+        "teacher_batch_seconds": per_call_seconds(
+            lambda: predict_frame(teacher, X_gate, encoding), 5
+        ),
+        "student_batch_seconds": per_call_seconds(
+            lambda: predict_frame(student_booster, X_gate, encoding), 5
+        ),
+        "seconds": round(seconds, 2),
+    }
+    if verbose:
+        print(
+            f"Student: {report['student_trees']} trees (teacher "
+            f"{report['teacher_trees']}), trained on {len(train_rows):,} rows "
+            f"incl. {len(X_grid):,} synthetic in {seconds:.1f}s"
+        )
+        print(
+            f"  Gate R2 on {len(gate_rows):,} held-out rows: teacher "
+            f"{teacher_r2:.4f}, student {student_r2:.4f}"
+        )
+        print(
+            f"  Predict: 1 row {report['student_row_seconds'] * 1000:.2f} ms "
+            f"(teacher {report['teacher_row_seconds'] * 1000:.2f} ms), "
+            f"{len(gate_rows):,} rows {report['student_batch_seconds'] * 1000:.1f} ms "
+            f"(teacher {report['teacher_batch_seconds'] * 1000:.1f} ms)"
+        )
+    return (student if not failures else None), report
@@ -0,0 +1,266 @@
+"""Out-of-core training: stream encoded chunks into XGBoost external memory.
+
+src.train one-hot encodes the whole cleaned survey into one DataFrame,
+which does not fit in memory once several survey years are concatenated.
+This mode never builds that matrix. The cleaned survey comes from the
+Parquet cache (src.cache; cleaning itself works on the compact categorical
+frame, exactly as in src.train). It is read back in batches of
+external_memory.chunk_rows rows. Each batch is encoded into the fixed
+feature layout of the full category lists and handed to XGBoost through a
+DataIter. XGBoost sketches bin cuts over the batches and keeps the binned
+pages in an on-disk cache, so the encoded data in memory is bounded by the
+chunk size.
+
+A random external_memory.validation_fraction of the rows (fixed per batch
+by a seeded generator) is streamed the same way for early stopping. CV and
+currency rates are not computed in this mode; the saved artifact is
+otherwise the same as src.train's.
+
+Usage:
+    uv run python -m src.external_memory [--data CSV ...] [--chunk-rows 100000]
+"""
+
+import argparse
+import pickle
+import time
+from pathlib import Path
+
+import numpy as np
+import pyarrow.parquet as pq
+import xgboost as xgb
+import yaml
+
+from src.cache import RAW_COLUMNS, cleaned_survey_path, survey_paths
+from src.cleaning import MAIN_LABEL
+from src.incremental import align_features
+from src.model import compact_model, fit_booster
+from src.pipeline import peak_rss_mb, reset_peak_rss
+from src.preprocessing import CATEGORICAL_FEATURES, FEATURE_COLUMNS
+from src.telemetry import RoundTimer
+
+
+def category_lists(path: Path, chunk_rows: int) -> dict:
+    """Sorted values of each categorical feature, scanned batch by batch."""
+    values = {col: set() for col in CATEGORICAL_FEATURES}
+    for batch in pq.ParquetFile(path).iter_batches(
+        batch_size=chunk_rows, columns=CATEGORICAL_FEATURES
+    ):
+        df = batch.to_pandas()
+        for col in CATEGORICAL_FEATURES:
+            values[col].update(df[col].dropna().unique())
+    return {col: sorted(values[col]) for col in CATEGORICAL_FEATURES}
+
+
+def feature_layout(categories: dict, encoding: str, drop_first: bool) -> list[str]:
+    """
+    Model columns for the given category lists.
+
+    For one-hot encoding these are the columns prepare_features() creates
+    when every category occurs in the data, so a model trained from chunks
+    has the same layout as one trained on the whole frame.
+    """
+    if encoding == "native":
+        return list(FEATURE_COLUMNS)
+    onehot = ["YearsCode", "WorkExp"]
+    for col in CATEGORICAL_FEATURES:
+        values = categories[col][1:] if drop_first else categories[col]
+        onehot.extend(f"{col}_{value}" for value in values)
+    return onehot
+
+
+def holdout_mask(n_rows: int, batch: int, fraction: float, seed: int) -> np.ndarray:
+    """Rows of a batch held out for early stopping, the same on every pass."""
+    return np.random.default_rng([seed, batch]).random(n_rows) < fraction
+
+
+class SurveyChunks(xgb.DataIter):
+    """
+    Encoded batches of the cleaned survey Parquet file.
+
+    XGBoost calls next() until it returns False and reset() before every
+    pass over the data (it makes several while building the matrix).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        layout: dict,
+        chunk_rows: int,
+        holdout: bool,
+        fraction: float,
+        seed: int,
+        cache_prefix: str,
+    ):
+        self._path = path
+        self._layout = layout
+        self._chunk_rows = chunk_rows
+        self._holdout = holdout
+        self._fraction = fraction
+        self._seed = seed
+        self._batches = None
+        self._batch = 0
+        self.rows = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def reset(self) -> None:
+        self._batches = None
+        self._batch = 0
+        self.rows = 0
+
+    def next(self, input_data) -> bool:
+        if self._batches is None:
+            self._batches = pq.ParquetFile(self._path).iter_batches(
+                batch_size=self._chunk_rows, columns=RAW_COLUMNS
+            )
+        for batch in self._batches:
+            df = batch.to_pandas()
+            held_out = holdout_mask(len(df), self._batch, self._fraction, self._seed)
+            self._batch += 1
+            df = df[held_out if self._holdout else ~held_out]
+            if df.empty:
+                continue
+            X, _ = align_features(df, self._layout)
+            input_data(data=X, label=df[MAIN_LABEL].to_numpy())
+            self.rows += len(df)
+            return True
+        return False
+
+
+def train_external(
+    config: dict,
+    path: Path,
+    categories: dict,
+    chunk_rows: int | None = None,
+    verbose: bool = True,
+) -> tuple:
+    """
+    Train with early stopping from batches of the cleaned survey Parquet file.
+
+    Args:
+        config: Full model_parameters.yaml configuration
+        path: Cleaned survey Parquet file (cache.cleaned_survey_path())
+        categories: Category lists defining the feature layout
+        chunk_rows: Rows per batch (default: external_memory.chunk_rows)
+        verbose: Print progress
+
+    Returns:
+        (booster, layout, info) where layout holds the categories,
+        feature_columns and encoding of the model input, and info the row
+        counts, chunk size and timings
+    """
+    settings = config["external_memory"]
+    chunk_rows = chunk_rows or settings["chunk_rows"]
+    encoding = config["features"]["encoding"].get("method", "onehot")
+    drop_first = config["features"]["encoding"]["drop_first"]
+    layout = {
+        "categories": categories,
+        "feature_columns": feature_layout(categories, encoding, drop_first),
+        "encoding": encoding,
+    }
+
+    cache_dir = Path(settings["cache_dir"])
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    chunks = {
+        name: SurveyChunks(
+            path,
+            layout,
+            chunk_rows,
+            holdout=name == "validation",
+            fraction=settings["validation_fraction"],
+            seed=config["data"]["random_state"],
+            cache_prefix=str(cache_dir / name),
+        )
+        for name in ("train", "validation")
+    }
+
+    start = time.perf_counter()
+    dtrain = xgb.ExtMemQuantileDMatrix(
+        chunks["train"], enable_categorical=encoding == "native"
+    )
+    dvalid = xgb.ExtMemQuantileDMatrix(
+        chunks["validation"], ref=dtrain, enable_categorical=encoding == "native"
+    )
+    matrix_seconds = time.perf_counter() - start
+    if verbose:
+        print(
+            f"Streamed {chunks['train'].rows:,} training and "
+            f"{chunks['validation'].rows:,} validation rows in chunks of "
+            f"{chunk_rows:,} ({len(layout['feature_columns'])} features, "
+            f"{matrix_seconds:.1f}s)"
+        )
+
+    timer = RoundTimer()
+    booster = fit_booster(
+        config["model"],
+        dtrain,
+        dvalid,
+        verbose=config["training"]["verbose"],
+        callbacks=[timer],
+    )
+    info = {
+        "strategy": "external_memory",
+        "trees": booster.best_iteration + 1,
+        "chunk_rows": chunk_rows,
+        "train_rows": chunks["train"].rows,
+        "validation_rows": chunks["validation"].rows,
+        "matrix_seconds": round(matrix_seconds, 2),
+        "seconds": round(time.perf_counter() - start, 2),
+        "training": timer.summary(
+            booster.best_iteration + 1, config["model"]["n_estimators"]
+        ),
+    }
+    return booster, layout, info
+
+
+def main():
+    """Train out of core and save the model artifacts."""
+    parser = argparse.ArgumentParser(description="Train from on-disk chunks")
+    parser.add_argument(
+        "--data", type=Path, nargs="+", help="Survey CSVs (default: data.survey_files)"
+    )
+    parser.add_argument("--chunk-rows", type=int, help="external_memory.chunk_rows")
+    parser.add_argument("--output", type=Path, help="Default: training.model_path")
+    args = parser.parse_args()
+
+    with open("config/model_parameters.yaml", "r") as f:
+        config = yaml.safe_load(f)
+    chunk_rows = args.chunk_rows or config["external_memory"]["chunk_rows"]
+
+    reset_peak_rss()
+    path = cleaned_survey_path(config, args.data or survey_paths(config))
+    categories = category_lists(path, chunk_rows)
+    with open("config/valid_categories.yaml", "w") as f:
+        yaml.dump(categories, f, default_flow_style=False, sort_keys=False)
+    print(f"Cleaned survey: {path} ({pq.ParquetFile(path).metadata.num_rows:,} rows)")
+
+    booster, layout, info = train_external(config, path, categories, chunk_rows)
+    # The page cache is only needed while training
+    cache_dir = Path(config["external_memory"]["cache_dir"])
+    for name in ("train", "validation"):
+        for cache_file in cache_dir.glob(f"{name}*"):
+            cache_file.unlink()
+
+    artifacts = {
+        "model": compact_model(booster),
+        "feature_columns": layout["feature_columns"],
+        "encoding": layout["encoding"],
+        "final_strategy": info,
+    }
+    if layout["encoding"] == "native":
+        artifacts["categories"] = categories
+    output = args.output or Path(config["training"]["model_path"])
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "wb") as f:
+        pickle.dump(artifacts, f)
+
+    training = info["training"]
+    print(
+        f"Best iteration {info['trees']} after {training['rounds']} rounds "
+        f"({training['seconds_per_round'] * 1000:.1f} ms/round); "
+        f"{info['seconds']:.1f}s in total, peak RSS {peak_rss_mb():.0f} MB"
+    )
+    print(f"Model saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,586 @@
+"""Guardrail metrics and the out-of-fold predictions they are computed on.
+
+category_metrics() scores predictions per category of every categorical
+feature with grouped sums: one bincount per feature and statistic over the
+category codes, instead of a boolean mask over all rows per category. R2
+comes from the per-category sums of squared errors and of squared
+(centered) targets, so no per-category arrays are materialized, and
+flag_violations() checks the thresholds on the whole table at once.
+interaction_metrics() does the same for two-way slices (every pair of
+features, one grouped reduction over the combined codes per pair), where
+errors hidden by the single-feature view show up.
+
+bootstrap_intervals() adds confidence intervals for small categories whose
+point estimates are noisy. Each block of resamples draws its row indices as
+one NumPy array, turns them into per-row resample counts, and computes the
+same grouped sums for every category of every feature at once, so the cost
+grows with rows x resamples, not with categories. Blocks are independent
+(seeded by their position) and are spread across worker processes.
+
+src.train's cv stage predicts every row from the fold where it was held
+out. The save stage writes these predictions next to the model (as
+<model>.oof.parquet), keyed by the row labels of the cleaned survey frame,
+with a hash of everything that determines them: the cleaned data (its cache
+key), the feature, model and compression settings and the CV split.
+guardrail_evaluation.py reads them back instead of repeating the CV when
+the hash of the current configuration matches.
+"""
+
+import hashlib
+import json
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.cache import cache_key, survey_paths
+from src.cv import worker_context
+from src.preprocessing import CATEGORICAL_FEATURES
+
+_HASH_KEY = b"config_hash"
+
+# Largest resamples x rows array of one bootstrap block (bounds the memory
+# per worker at a few hundred MB)
+BLOCK_ELEMENTS = 2**22
+
+# Data handed to each worker process once by the pool initializer
+_worker_data = {}
+
+
+def oof_config_hash(config: dict) -> str:
+    """
+    Hash of the data and settings the out-of-fold predictions depend on.
+
+    Raises:
+        FileNotFoundError: A data.survey_files entry matches no file
+    """
+    payload = json.dumps(
+        {
+            "data": cache_key(survey_paths(config), config),
+            "features": config["features"],
+            "model": config["model"],
+            "compression": config.get("compression", {}),
+            "cv_splits": config["data"].get("cv_splits", 5),
+            "random_state": config["data"]["random_state"],
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def oof_path(model_path: Path) -> Path:
+    """OOF file next to a saved model (model.pkl -> model.oof.parquet)."""
+    model_path = Path(model_path)
+    return model_path.with_name(f"{model_path.stem}.oof.parquet")
+
+
+def write_oof(
+    path: Path, rows: pd.Index, predictions: np.ndarray, config_hash: str
+) -> None:
+    """Save out-of-fold predictions keyed by cleaned-survey row labels."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.table({"row": np.asarray(rows), "prediction": predictions})
+    table = table.replace_schema_metadata({_HASH_KEY: config_hash.encode()})
+    pq.write_table(table, path)
+
+
+def load_oof(path: Path, config_hash: str, rows: pd.Index) -> np.ndarray:
+    """
+    Out-of-fold predictions saved by training, in the order of `rows`.
+
+    Args:
+        path: oof_path() of the model
+        config_hash: oof_config_hash() of the current configuration
+        rows: Index of the cleaned survey frame to align to
+
+    Raises:
+        FileNotFoundError: No predictions were saved
+        ValueError: They were made with other data or settings, or do not
+                    cover exactly these rows
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"No out-of-fold predictions at {path}")
+    table = pq.read_table(path)
+    saved_hash = (table.schema.metadata or {}).get(_HASH_KEY, b"").decode()
+    if saved_hash != config_hash:
+        raise ValueError(
+            f"Out-of-fold predictions at {path} were made with other data or "
+            f"settings (hash {saved_hash or 'missing'}, now {config_hash})"
+        )
+    saved = pd.Series(
+        table.column("prediction").to_numpy(), index=table.column("row").to_numpy()
+    )
+    if len(saved) != len(rows):
+        raise ValueError(
+            f"Out-of-fold predictions at {path} cover {len(saved):,} rows, "
+            f"not {len(rows):,}"
+        )
+    predictions = saved.reindex(rows).to_numpy()
+    if np.isnan(predictions).any():
+        raise ValueError(f"Out-of-fold predictions at {path} miss some rows")
+    return predictions
+
+
+def _category_codes(series: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """Integer codes (-1 for missing) and the sorted values they index."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categorical = series.array
+        order = np.argsort(categorical.categories.astype(str))
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        codes = np.where(categorical.codes >= 0, rank[categorical.codes], -1)
+        return codes, np.asarray(categorical.categories[order], dtype=object)
+    codes, values = pd.factorize(series, sort=True)
+    return codes, np.asarray(values, dtype=object)
+
+
+def _feature_codes(df: pd.DataFrame, features: list[str]) -> tuple[list, list]:
+    """Codes of each feature, with missing values in an extra last slot."""
+    codes, values = [], []
+    for feature in features:
+        feature_codes, feature_values = _category_codes(df[feature])
+        codes.append(np.where(feature_codes >= 0, feature_codes, len(feature_values)))
+        values.append(feature_values)
+    return codes, values
+
+
+def _statistics(
+    actual: np.ndarray, predictions: np.ndarray, shift: float | None = None
+) -> dict:
+    """
+    Per-row values whose grouped sums give every guardrail metric.
+
+    `shift` (default: the mean salary) is subtracted before squaring, which
+    keeps the per-category sums of squares from cancelling. Any constant
+    gives the same metrics, so chunks can share one and add their sums.
+    """
+    actual = np.asarray(actual, dtype=np.float64)
+    predictions = np.asarray(predictions, dtype=np.float64)
+    centered = actual - (actual.mean() if shift is None else shift)
+    return {
+        "actual": actual,
+        "predicted": predictions,
+        "centered": centered,
+        "centered_sq": centered**2,
+        "error_sq": (actual - predictions) ** 2,
+    }
+
+
+def _grouped_metrics(count: np.ndarray, sums: dict) -> dict:
+    """R2, means and abs % diff per group from its (weighted) row sums."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total_sq = sums["centered_sq"] - sums["centered"] ** 2 / count
+        # A constant target (up to rounding of the shifted sums) has no
+        # variance to explain: R2 is 1 for exact predictions, else 0, as
+        # r2_score() gives
+        constant = total_sq <= 1e-10 * sums["centered_sq"]
+        r2 = np.where(
+            constant,
+            np.where(sums["error_sq"] == 0, 1.0, 0.0),
+            1 - sums["error_sq"] / total_sq,
+        )
+        mean_actual = sums["actual"] / count
+        mean_predicted = sums["predicted"] / count
+        return {
+            "Count": count,
+            "R2": np.where(count >= 2, r2, np.nan),
+            "Mean Actual ($)": mean_actual,
+            "Mean Predicted ($)": mean_predicted,
+            "Abs % Diff": np.abs(mean_predicted - mean_actual) / mean_actual * 100,
+        }
+
+
+def _group_sums(key: np.ndarray, n_groups: int, statistics: dict) -> dict:
+    """One bincount per statistic over the group keys of the rows."""
+    return {
+        name: np.bincount(key, weights=column, minlength=n_groups)
+        for name, column in statistics.items()
+    }
+
+
+def _feature_sums(codes: list, values: list, statistics: dict) -> list[dict]:
+    """Row count and statistic sums per category slot of each feature."""
+    sums = []
+    for feature_codes, feature_values in zip(codes, values, strict=True):
+        slots = len(feature_values) + 1
+        sums.append(
+            {
+                "count": np.bincount(feature_codes, minlength=slots),
+                **_group_sums(feature_codes, slots, statistics),
+            }
+        )
+    return sums
+
+
+def _metrics_table(features: list[str], values: list, sums: list[dict]) -> pd.DataFrame:
+    """category_metrics() table of per-feature sums, without empty categories."""
+    frames = []
+    for feature, feature_values, feature_sums in zip(
+        features, values, sums, strict=True
+    ):
+        count = feature_sums["count"]
+        frame = pd.DataFrame(
+            {
+                "Feature": feature,
+                "Category": np.append(feature_values, None),
+                **_grouped_metrics(count, feature_sums),
+            }
+        )
+        # The last slot holds rows with a missing (or unlisted) value
+        frames.append(frame[:-1][count[:-1] > 0])
+    return pd.concat(frames, ignore_index=True)
+
+
+def category_metrics(
+    df: pd.DataFrame,
+    actual: np.ndarray,
+    predictions: np.ndarray,
+    features: list[str] = CATEGORICAL_FEATURES,
+) -> pd.DataFrame:
+    """
+    Per-category R2, mean actual/predicted salary and abs % diff.
+
+    Args:
+        df: Rows with the categorical feature columns
+        actual: Salary of each row
+        predictions: Predicted salary of each row (e.g. out-of-fold)
+        features: Columns to break the rows down by
+
+    Returns:
+        DataFrame with Feature, Category, Count, R2 (NaN below two rows or
+        for a constant salary), Mean Actual ($), Mean Predicted ($) and
+        Abs % Diff; one row per category present, features in the given
+        order and categories sorted
+    """
+    codes, values = _feature_codes(df, features)
+    sums = _feature_sums(codes, values, _statistics(actual, predictions))
+    return _metrics_table(features, values, sums)
+
+
+def category_sums(
+    df: pd.DataFrame,
+    actual: np.ndarray,
+    predictions: np.ndarray,
+    categories: dict,
+    shift: float,
+    features: list[str] = CATEGORICAL_FEATURES,
+) -> list[dict]:
+    """
+    Per-category sums of one chunk of rows, to add up over a stream.
+
+    Categories are coded by fixed lists (e.g. the model's), so the sums of
+    all chunks line up; add them with add_sums() and turn the total into
+    the category_metrics() table with metrics_from_sums().
+
+    Args:
+        categories: Category list of each feature
+        shift: Constant subtracted from salaries, the same for every chunk
+    """
+    codes = []
+    for feature in features:
+        feature_codes = pd.Categorical(
+            df[feature], categories=categories[feature]
+        ).codes.astype(np.int64)
+        codes.append(
+            np.where(feature_codes >= 0, feature_codes, len(categories[feature]))
+        )
+    values = [categories[feature] for feature in features]
+    return _feature_sums(codes, values, _statistics(actual, predictions, shift))
+
+
+def add_sums(total: list[dict] | None, sums: list[dict]) -> list[dict]:
+    """Add category_sums() of another chunk to a running total (or None)."""
+    if total is None:
+        return sums
+    return [
+        {name: column + chunk[name] for name, column in feature.items()}
+        for feature, chunk in zip(total, sums, strict=True)
+    ]
+
+
+def metrics_from_sums(
+    sums: list[dict], categories: dict, features: list[str] = CATEGORICAL_FEATURES
+) -> pd.DataFrame:
+    """category_metrics() table of summed category_sums()."""
+    values = [np.asarray(categories[feature], dtype=object) for feature in features]
+    return _metrics_table(features, values, sums)
+
+
+def interaction_metrics(
+    df: pd.DataFrame,
+    actual: np.ndarray,
+    predictions: np.ndarray,
+    features: list[str] = CATEGORICAL_FEATURES,
+    min_count: int = 1,
+) -> pd.DataFrame:
+    """
+    Guardrail metrics of every two-way slice, e.g. Country x DevType.
+
+    Each pair of features is one grouped reduction over the combined codes
+    of its two columns (all 15 pairs of the six categorical features by
+    default), so the cost is a few passes over the rows per pair whatever
+    the number of slices.
+
+    Args:
+        df: Rows with the categorical feature columns
+        actual: Salary of each row
+        predictions: Predicted salary of each row (e.g. out-of-fold)
+        features: Columns whose pairs are evaluated
+        min_count: Leave out slices with fewer rows
+
+    Returns:
+        DataFrame indexed by (Feature A, Category A, Feature B, Category B)
+        with the category_metrics() columns; rows with a missing value in
+        either feature are left out
+    """
+    statistics = _statistics(actual, predictions)
+    codes, values = _feature_codes(df, features)
+
+    frames = []
+    for a, b in combinations(range(len(features)), 2):
+        slots_a, slots_b = len(values[a]) + 1, len(values[b]) + 1
+        key = codes[a] * slots_b + codes[b]
+        count = np.bincount(key, minlength=slots_a * slots_b)
+        metrics = _grouped_metrics(
+            count, _group_sums(key, slots_a * slots_b, statistics)
+        )
+        cell_a, cell_b = np.divmod(np.arange(slots_a * slots_b), slots_b)
+        keep = (
+            (count >= max(min_count, 1))
+            & (cell_a < slots_a - 1)
+            & (cell_b < slots_b - 1)
+        )
+        frames.append(
+            pd.DataFrame(
+                {
+                    "Feature A": features[a],
+                    "Category A": values[a][cell_a[keep]],
+                    "Feature B": features[b],
+                    "Category B": values[b][cell_b[keep]],
+                    **{name: column[keep] for name, column in metrics.items()},
+                }
+            )
+        )
+    return pd.concat(frames, ignore_index=True).set_index(
+        ["Feature A", "Category A", "Feature B", "Category B"]
+    )
+
+
+def worst_slices(
+    interactions: pd.DataFrame, top: int = 20, by: str = "R2"
+) -> pd.DataFrame:
+    """
+    The `top` slices of interaction_metrics() with the worst `by` metric.
+
+    Lowest first for R2 (slices without an R2 are skipped), highest first
+    for Abs % Diff.
+    """
+    ranked = interactions.dropna(subset=[by])
+    if by == "R2":
+        return ranked.nsmallest(top, by)
+    return ranked.nlargest(top, by)
+
+
+def flag_violations(
+    metrics: pd.DataFrame, min_r2: float, max_abs_pct_diff: float
+) -> pd.DataFrame:
+    """
+    category_metrics() with the guardrail thresholds checked.
+
+    With bootstrap_intervals() columns, a category is only flagged when
+    its whole interval is past the threshold.
+
+    Returns:
+        Copy with boolean columns Low R2 (R2, or the upper R2 bound, below
+        min_r2; never for NaN) and High Diff (Abs % Diff, or its lower
+        bound, above max_abs_pct_diff)
+    """
+    r2 = metrics["R2 High"] if "R2 High" in metrics else metrics["R2"]
+    diff = metrics["Diff Low"] if "Diff Low" in metrics else metrics["Abs % Diff"]
+    return metrics.assign(
+        **{"Low R2": r2 < min_r2, "High Diff": diff > max_abs_pct_diff}
+    )
+
+
+def format_table(metrics_df: pd.DataFrame) -> str:
+    """Format metrics DataFrame as a markdown table.
+
+    Bootstrap intervals, when present, are appended as two more columns.
+    """
+    lines = []
+    header = (
+        "| Category | Count | R2 | Mean Actual ($) | Mean Predicted ($) | Abs % Diff |"
+    )
+    sep = (
+        "|----------|------:|----:|----------------:|-------------------:|-----------:|"
+    )
+    intervals = "R2 Low" in metrics_df
+    if intervals:
+        header += " R2 CI | Abs % Diff CI |"
+        sep += "--------------:|----------------:|"
+    lines.append(header)
+    lines.append(sep)
+
+    for category, count, r2, mean_actual, mean_pred, abs_pct_diff in zip(
+        metrics_df["Category"],
+        metrics_df["Count"],
+        metrics_df["R2"],
+        metrics_df["Mean Actual ($)"],
+        metrics_df["Mean Predicted ($)"],
+        metrics_df["Abs % Diff"],
+        strict=True,
+    ):
+        r2_str = f"{r2:.2f}" if not np.isnan(r2) else "N/A"
+        lines.append(
+            f"| {category[:45]:45s} | {count:5,d} | {r2_str:>4s} "
+            f"| {mean_actual:>15,.0f} | {mean_pred:>18,.0f} "
+            f"| {abs_pct_diff:>9.1f}% |"
+        )
+
+    if intervals:
+        for i, (r2_low, r2_high, diff_low, diff_high) in enumerate(
+            zip(
+                metrics_df["R2 Low"],
+                metrics_df["R2 High"],
+                metrics_df["Diff Low"],
+                metrics_df["Diff High"],
+                strict=True,
+            ),
+            start=2,
+        ):
+            r2_ci = f"{r2_low:.2f} to {r2_high:.2f}" if not np.isnan(r2_low) else "N/A"
+            diff_ci = f"{diff_low:.1f} to {diff_high:.1f}%"
+            lines[i] += f" {r2_ci:>13s} | {diff_ci:>15s} |"
+
+    return "\n".join(lines)
+
+
+def _resample_block(
+    codes: list, sizes: list, statistics: dict, seed: int, block: int, size: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    R2 and abs % diff of every category in `size` bootstrap resamples.
+
+    Returns:
+        (r2, abs_pct_diff), each resamples x categories (all features, with
+        the missing-value slots)
+    """
+    n = len(statistics["centered"])
+    rng = np.random.default_rng([seed, block])
+    # Row indices of all resamples of the block, as per-row draw counts
+    indices = rng.integers(0, n, (size, n)) + (np.arange(size) * n)[:, None]
+    weights = np.bincount(indices.ravel(), minlength=size * n).astype(np.float64)
+    weighted = {
+        name: weights * np.tile(column, size) for name, column in statistics.items()
+    }
+
+    r2, pct_diff = [], []
+    for feature_codes, n_values in zip(codes, sizes, strict=True):
+        slots = n_values + 1
+        key = (feature_codes + (np.arange(size) * slots)[:, None]).ravel()
+        count = np.bincount(key, weights=weights, minlength=size * slots)
+        metrics = _grouped_metrics(count, _group_sums(key, size * slots, weighted))
+        r2.append(metrics["R2"].reshape(size, slots))
+        pct_diff.append(metrics["Abs % Diff"].reshape(size, slots))
+    return np.hstack(r2), np.hstack(pct_diff)
+
+
+def _init_worker(codes: list, sizes: list, statistics: dict) -> None:
+    _worker_data.update(codes=codes, sizes=sizes, statistics=statistics)
+
+
+def _resample_block_in_worker(task: tuple) -> tuple:
+    return _resample_block(
+        _worker_data["codes"], _worker_data["sizes"], _worker_data["statistics"], *task
+    )
+
+
+def bootstrap_intervals(
+    df: pd.DataFrame,
+    actual: np.ndarray,
+    predictions: np.ndarray,
+    resamples: int,
+    confidence: float = 0.95,
+    features: list[str] = CATEGORICAL_FEATURES,
+    seed: int = 0,
+    workers: int = 1,
+) -> pd.DataFrame:
+    """
+    Percentile bootstrap intervals of per-category R2 and abs % diff.
+
+    Rows are resampled with replacement from all of df, so category sizes
+    vary between resamples as they would between surveys. Results do not
+    depend on `workers`.
+
+    Args:
+        df: Rows with the categorical feature columns
+        actual: Salary of each row
+        predictions: Predicted salary of each row
+        resamples: Bootstrap resamples
+        confidence: Coverage of the intervals
+        features: Columns to break the rows down by
+        seed: Seed of the resampling
+        workers: Processes computing blocks of resamples at once
+
+    Returns:
+        DataFrame with Feature, Category, R2 Low, R2 High, Diff Low and
+        Diff High, in the row order of category_metrics()
+    """
+    statistics = _statistics(actual, predictions)
+    codes, values = _feature_codes(df, features)
+    sizes = [len(feature_values) for feature_values in values]
+
+    block_size = max(1, min(resamples, BLOCK_ELEMENTS // len(actual)))
+    tasks = [
+        (seed, block, min(block_size, resamples - start))
+        for block, start in enumerate(range(0, resamples, block_size))
+    ]
+    if workers == 1:
+        blocks = [_resample_block(codes, sizes, statistics, *task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=worker_context(),
+            initializer=_init_worker,
+            initargs=(codes, sizes, statistics),
+        ) as executor:
+            blocks = list(executor.map(_resample_block_in_worker, tasks))
+    r2 = np.vstack([block[0] for block in blocks])
+    pct_diff = np.vstack([block[1] for block in blocks])
+
+    tail = (1 - confidence) / 2 * 100
+    with warnings.catch_warnings():
+        # Categories without an R2 in any resample (single rows) stay NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        r2_low, r2_high = np.nanpercentile(r2, [tail, 100 - tail], axis=0)
+        diff_low, diff_high = np.nanpercentile(pct_diff, [tail, 100 - tail], axis=0)
+
+    # Keep the categories category_metrics() reports: present in df, not
+    # the missing-value slots
+    counts = np.concatenate(
+        [
+            np.bincount(feature_codes, minlength=n_values + 1)
+            for feature_codes, n_values in zip(codes, sizes, strict=True)
+        ]
+    )
+    keep = counts > 0
+    keep[np.cumsum(np.array(sizes) + 1) - 1] = False
+    return pd.DataFrame(
+        {
+            "Feature": np.repeat(features, np.array(sizes) + 1),
+            "Category": np.concatenate(
+                [np.append(feature_values, None) for feature_values in values]
+            ),
+            "R2 Low": r2_low,
+            "R2 High": r2_high,
+            "Diff Low": diff_low,
+            "Diff High": diff_high,
+        }
+    )[keep].reset_index(drop=True)
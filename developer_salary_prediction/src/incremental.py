@@ -0,0 +1,362 @@
+"""Warm-start training: continue boosting the deployed model on new survey data.
+
+A full retrain grows up to model.n_estimators trees from scratch. When a new
+batch of responses (or a new survey year) arrives, this module loads the
+booster from the saved artifacts, keeps its trees up to the best iteration
+and adds trees fitted on the new data (or on old and new data combined),
+again with early stopping. The result is saved as a new model version; the
+deployed model is not replaced.
+
+The new data is cleaned and encoded against the model, not on its own: a
+small batch would lose most of its rows to per-country trimming and
+cardinality reduction. Only the row-by-row steps of training's cleaning are
+applied (see clean_new_rows()), then the rows are encoded into the model's
+own feature layout: the category lists the model was trained on (the
+artifact's "categories", or config/valid_categories.yaml for one-hot models)
+and its feature columns. Rows with categories the model has never seen are
+dropped; if there are too many of them the data is incompatible and a full
+retrain is required.
+
+Usage:
+    uv run python -m src.incremental --data data/new_responses.csv
+    uv run python -m src.incremental --data NEW.csv --combine --compare
+"""
+
+import argparse
+import pickle
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+import yaml
+from sklearn.metrics import r2_score
+from sklearn.model_selection import train_test_split
+
+from src.cache import load_cleaned_survey, survey_paths
+from src.cleaning import MAIN_LABEL
+from src.ingest import load_schema, read_surveys
+from src.model import (
+    artifact_booster,
+    booster_params,
+    build_reference_matrix,
+    compact_model,
+    evaluation_matrix,
+    fit_booster,
+    predict_best,
+    training_matrix,
+)
+from src.preprocessing import (
+    CATEGORICAL_FEATURES,
+    FEATURE_COLUMNS,
+    normalize_other_categories,
+    prepare_features_native,
+)
+
+
+def model_categories(artifacts: dict) -> dict:
+    """Category lists the saved model was trained on."""
+    if "categories" in artifacts:
+        return artifacts["categories"]
+    # One-hot artifacts rely on the categories file written by the same run
+    with open("config/valid_categories.yaml", "r") as f:
+        return yaml.safe_load(f)
+
+
+def map_unseen(
+    df: pd.DataFrame,
+    categories: dict,
+    other_name: str,
+    drop_other_from: list[str] = (),
+) -> pd.DataFrame:
+    """
+    Normalize category spellings and map unlisted values to `other_name`.
+
+    Values are mapped for features whose category list has `other_name`
+    and for those in `drop_other_from`, whose rare values training turned
+    into Other and dropped; elsewhere they stay unlisted and the rows
+    cannot be encoded.
+    """
+    df = df.copy()
+    for col in CATEGORICAL_FEATURES:
+        values = normalize_other_categories(
+            df[col].astype("str").str.replace("’", "'", regex=False)
+        ).where(df[col].notna())
+        if other_name in categories[col] or col in drop_other_from:
+            unseen = values.notna() & ~values.isin(categories[col])
+            values = values.mask(unseen, other_name)
+        df[col] = values
+    return df
+
+
+def clean_new_rows(df: pd.DataFrame, artifacts: dict, config: dict) -> tuple:
+    """
+    Clean new survey rows against a saved model, one row at a time.
+
+    Salaries at or below data.min_salary or outside the training range
+    (from the saved data profile, if any) are dropped, categories are
+    mapped onto the model's lists with map_unseen(), and rows with Other
+    in features.cardinality.drop_other_from are dropped. Nothing is derived
+    from the batch itself, so the result does not depend on its size.
+
+    Args:
+        df: Raw survey rows (FEATURE_COLUMNS and MAIN_LABEL)
+        artifacts: Unpickled model artifacts
+        config: Full model_parameters.yaml configuration
+
+    Returns:
+        (df, rows) where rows counts the rows dropped as out_of_range and
+        as other
+    """
+    cardinality = config["features"]["cardinality"]
+    other_name = cardinality.get("other_category", "Other")
+    drop_other_from = cardinality.get("drop_other_from", [])
+    salary = artifacts.get("profile", {}).get("numeric", {}).get(MAIN_LABEL, {})
+    in_range = (df[MAIN_LABEL] > config["data"]["min_salary"]) & df[MAIN_LABEL].between(
+        salary.get("min", -np.inf), salary.get("max", np.inf)
+    )
+
+    df = map_unseen(
+        df[in_range], model_categories(artifacts), other_name, drop_other_from
+    )
+    other = np.zeros(len(df), dtype=bool)
+    for col in drop_other_from:
+        other |= (df[col] == other_name).to_numpy()
+    rows = {"out_of_range": int((~in_range).sum()), "other": int(other.sum())}
+    return df[~other], rows
+
+
+def load_new_rows(config: dict, paths: Path | list[Path], artifacts: dict) -> tuple:
+    """Read new survey CSVs and clean them with clean_new_rows()."""
+    paths = [paths] if isinstance(paths, Path) else list(paths)
+    df = read_surveys(paths, [*FEATURE_COLUMNS, MAIN_LABEL], load_schema())
+    return clean_new_rows(df, artifacts, config)
+
+
+def align_features(df: pd.DataFrame, artifacts: dict) -> tuple:
+    """
+    Encode survey rows into the feature layout of a saved model.
+
+    Categorical values are cast to the model's category lists first, so
+    one-hot columns are created for exactly the model's categories
+    (independent of which values this batch happens to contain) and then
+    reindexed to the model's feature columns.
+
+    Returns:
+        (X, known) where known is a boolean array marking rows whose
+        categorical values are all in the model's category lists
+    """
+    native = prepare_features_native(df, model_categories(artifacts))
+    known = native[CATEGORICAL_FEATURES].notna().all(axis=1).to_numpy()
+    if artifacts.get("encoding", "onehot") == "native":
+        return native, known
+    X = pd.get_dummies(native).reindex(
+        columns=artifacts["feature_columns"], fill_value=0
+    )
+    return X, known
+
+
+def check_compatibility(
+    artifacts: dict, X: pd.DataFrame, known: np.ndarray, max_unseen: float
+) -> None:
+    """
+    Raise ValueError if the new data cannot be used to continue the model.
+
+    The booster must expect exactly the artifact's feature columns, and at
+    most `max_unseen` of the rows may have categories the model never saw.
+    """
+    booster = artifact_booster(artifacts)
+    if list(booster.feature_names or []) != list(artifacts["feature_columns"]):
+        raise ValueError(
+            "Saved booster features do not match the artifact's feature_columns"
+        )
+    if list(X.columns) != list(artifacts["feature_columns"]):
+        raise ValueError("New data could not be encoded into the model's features")
+    unseen = 1 - known.mean() if len(known) else 1.0
+    if unseen > max_unseen:
+        raise ValueError(
+            f"{unseen:.1%} of the new rows have categories the model was not "
+            f"trained on (limit {max_unseen:.0%}); run a full retrain "
+            "with python -m src.train instead"
+        )
+
+
+def continue_training(
+    booster: xgb.Booster,
+    model_config: dict,
+    dtrain: xgb.DMatrix,
+    dvalid: xgb.DMatrix,
+    max_rounds: int,
+) -> xgb.Booster:
+    """
+    Add up to max_rounds trees to booster, with early stopping on dvalid.
+
+    Trees after the booster's best iteration are dropped before continuing.
+    The returned booster's best_iteration counts all trees, old and new.
+    """
+    base = booster[: booster.best_iteration + 1]
+    return xgb.train(
+        booster_params(model_config),
+        dtrain,
+        num_boost_round=max_rounds,
+        evals=[(dvalid, "validation")],
+        early_stopping_rounds=model_config["early_stopping_rounds"],
+        xgb_model=base,
+        verbose_eval=False,
+    )
+
+
+def main():
+    """Warm-start the deployed model on new data and save a new version."""
+    parser = argparse.ArgumentParser(description="Continue training on new data")
+    parser.add_argument("--data", type=Path, required=True, help="New survey CSV")
+    parser.add_argument(
+        "--combine",
+        action="store_true",
+        help="Train on the configured survey files plus the new data",
+    )
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="Also retrain from scratch on the same rows and compare",
+    )
+    parser.add_argument("--output", type=Path, help="Default: models/model_v<N>.pkl")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Overwrite an existing models/model_v<N>.pkl",
+    )
+    args = parser.parse_args()
+
+    with open("config/model_parameters.yaml", "r") as f:
+        config = yaml.safe_load(f)
+    settings = config["incremental"]
+    model_config = config["model"]
+    random_state = config["data"]["random_state"]
+
+    model_path = Path(config["training"]["model_path"])
+    with open(model_path, "rb") as f:
+        artifacts = pickle.load(f)
+    encoding = artifacts.get("encoding", "onehot")
+    version = artifacts.get("version", 1)
+    print(f"Loaded model version {version} ({encoding} encoding) from {model_path}")
+    output = args.output or model_path.with_name(f"model_v{version + 1}.pkl")
+    if output.exists() and not (args.output or args.force):
+        parser.error(
+            f"{output} exists (from an earlier run?); "
+            "pass --force to overwrite it or --output for another path"
+        )
+
+    new_df, dropped = load_new_rows(config, args.data, artifacts)
+    X_new, known = align_features(new_df, artifacts)
+    check_compatibility(artifacts, X_new, known, settings["max_unseen_fraction"])
+    X_new, y_new = X_new[known], new_df[MAIN_LABEL][known]
+    print(
+        f"New data: {len(X_new):,} usable rows "
+        f"({(~known).sum():,} dropped with unseen categories, "
+        f"{dropped['other']:,} as Other, {dropped['out_of_range']:,} with "
+        "salaries outside the training range)"
+    )
+
+    # The holdout always comes from the new data: that is what the model
+    # has to get right after the update
+    pool_rows, test_rows = train_test_split(
+        np.arange(len(X_new)), test_size=0.1, random_state=random_state
+    )
+    X_test, y_test = X_new.iloc[test_rows], y_new.iloc[test_rows]
+    X_pool, y_pool = X_new.iloc[pool_rows], y_new.iloc[pool_rows]
+    if args.combine:
+        base_df = load_cleaned_survey(
+            config,
+            survey_paths(config),
+            use_cache=config["data"].get("use_cache", True),
+        )
+        X_base, base_known = align_features(base_df, artifacts)
+        X_pool = pd.concat([X_base[base_known], X_pool])
+        y_pool = pd.concat([base_df[MAIN_LABEL][base_known], y_pool])
+    train_rows, es_rows = train_test_split(
+        np.arange(len(X_pool)), test_size=0.1, random_state=random_state
+    )
+    print(
+        f"Training on {len(train_rows):,} rows ({'old + new' if args.combine else 'new'}), "
+        f"early stopping on {len(es_rows):,}, evaluating on {len(test_rows):,} new rows"
+    )
+
+    booster = artifact_booster(artifacts)
+    dtest = evaluation_matrix(X_test, y_test, np.arange(len(X_test)), encoding)
+    previous_r2 = r2_score(y_test, predict_best(booster, dtest))
+
+    start = time.perf_counter()
+    reference = build_reference_matrix(X_pool, y_pool, encoding)
+    dtrain = training_matrix(X_pool, y_pool, train_rows, reference, encoding)
+    dvalid = evaluation_matrix(X_pool, y_pool, es_rows, encoding)
+    updated = continue_training(
+        booster, model_config, dtrain, dvalid, settings["max_rounds"]
+    )
+    warm_seconds = time.perf_counter() - start
+    warm_r2 = r2_score(y_test, predict_best(updated, dtest))
+    base_trees = booster.best_iteration + 1
+    added_trees = updated.best_iteration + 1 - base_trees
+
+    print(f"\n{'model':22s} {'trees':>6s} {'seconds':>8s} {'holdout R2':>11s}")
+    print(
+        f"{'previous (v' + str(version) + ')':22s} {base_trees:6d} {'-':>8s} {previous_r2:11.4f}"
+    )
+    print(
+        f"{'warm start':22s} {updated.best_iteration + 1:6d} "
+        f"{warm_seconds:8.1f} {warm_r2:11.4f}"
+    )
+
+    comparison = None
+    if args.compare:
+        start = time.perf_counter()
+        full = fit_booster(model_config, dtrain, dvalid)
+        full_seconds = time.perf_counter() - start
+        full_r2 = r2_score(y_test, predict_best(full, dtest))
+        print(
+            f"{'full retrain':22s} {full.best_iteration + 1:6d} "
+            f"{full_seconds:8.1f} {full_r2:11.4f}"
+        )
+        print(
+            f"\nTime saved: {full_seconds - warm_seconds:.1f}s "
+            f"({full_seconds / warm_seconds:.1f}x faster); "
+            f"R2 change vs full retrain: {warm_r2 - full_r2:+.4f}"
+        )
+        comparison = {
+            "full_retrain_seconds": round(full_seconds, 2),
+            "full_retrain_r2": full_r2,
+        }
+
+    # Only what still describes the updated model is carried over: the
+    # student, guardrail baseline, data profile, compaction and final-fit
+    # details belong to the previous version, and a stale fast_model would
+    # keep serving predictions of the old teacher
+    new_artifacts = {
+        "model": compact_model(updated),
+        "feature_columns": artifacts["feature_columns"],
+        "encoding": encoding,
+        "version": version + 1,
+        "parent_version": version,
+        "warm_start": {
+            "data": str(args.data),
+            "combined": args.combine,
+            "base_trees": base_trees,
+            "added_trees": added_trees,
+            "seconds": round(warm_seconds, 2),
+            "holdout_r2": warm_r2,
+            "previous_holdout_r2": previous_r2,
+            "comparison": comparison,
+        },
+    }
+    if "categories" in artifacts:
+        new_artifacts["categories"] = artifacts["categories"]
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "wb") as f:
+        pickle.dump(new_artifacts, f)
+    print(f"\nSaved model version {version + 1} ({added_trees:+d} trees) to {output}")
+    print(f"Deploy it by copying it to {model_path}")
+
+
+if __name__ == "__main__":
+    main()
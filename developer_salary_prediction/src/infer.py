@@ -6,8 +6,16 @@ from pathlib import Path
 import pandas as pd
 import yaml
 
+from src.budget import (
+    FULL_MODEL_ONLY,
+    calibrate,
+    check_settings,
+    choose_trees,
+    level_trees,
+)
+from src.model import artifact_booster, model_trees, predict_frame
 from src.schema import SalaryInput
-from src.preprocessing import prepare_features
+from src.preprocessing import prepare_features, prepare_features_native
 
 # Resolve paths relative to this file's location (works regardless of CWD)
 _BASE_DIR = Path(__file__).resolve().parent.parent
@@ -22,8 +30,17 @@ if not model_path.exists():
 
 with open(model_path, "rb") as f:
     artifacts = pickle.load(f)
-    model = artifacts["model"]
+    # Compact booster (trees up to the best iteration); older artifacts hold
+    # an XGBRegressor, whose booster is used the same way
+    model = artifact_booster(artifacts)
+    # Distilled student for latency-critical callers (src.distill), if the
+    # last training run produced one that passed its accuracy gate
+    fast_model = (
+        artifact_booster(artifacts, "fast_model") if "fast_model" in artifacts else None
+    )
     feature_columns = artifacts["feature_columns"]
+    # Models trained before the encoding switch existed are one-hot
+    encoding = artifacts.get("encoding", "onehot")
 
 # Load valid categories for input validation
 valid_categories_path = _BASE_DIR / "config" / "valid_categories.yaml"
@@ -36,6 +53,9 @@ if not valid_categories_path.exists():
 with open(valid_categories_path, "r") as f:
     valid_categories = yaml.safe_load(f)
 
+# Native categorical models carry the exact category lists they were trained on
+model_categories = artifacts.get("categories", valid_categories)
+
 # Load currency conversion rates
 currency_rates_path = _BASE_DIR / "config" / "currency_rates.yaml"
 currency_rates = {}
@@ -43,6 +63,15 @@ if currency_rates_path.exists():
     with open(currency_rates_path, "r") as f:
         currency_rates = yaml.safe_load(f) or {}
 
+# Degraded mode levels (src.budget); without the section, always the full model
+with open(_BASE_DIR / "config" / "model_parameters.yaml", "r") as f:
+    degraded_mode = yaml.safe_load(f).get("degraded_mode") or FULL_MODEL_ONLY
+check_settings(degraded_mode)
+_total_trees = model_trees(model)
+_levels = level_trees(_total_trees, degraded_mode["levels"])
+# Per-tree cost for deadlines, measured by warm_up() before the first one
+_latency = None
+
 
 def get_local_currency(country: str, salary_usd: float) -> dict | None:
     """Convert USD salary to local currency for a given country.
@@ -61,14 +90,8 @@ def get_local_currency(country: str, salary_usd: float) -> dict | None:
     }
 
 
-def predict_salary(data: SalaryInput) -> float:
-    """Predict salary based on input features.
-
-    Args:
-        data: SalaryInput model with developer information
-
-    Returns:
-        Predicted annual salary in USD
+def _encode_input(data: SalaryInput) -> pd.DataFrame:
+    """Validate a request and encode it as one model input row.
 
     Raises:
         ValueError: If country or education_level is not in valid categories
@@ -131,14 +154,103 @@ def predict_salary(data: SalaryInput) -> float:
     )
 
     # Apply the same preprocessing as training
-    input_encoded = prepare_features(input_df)
+    if encoding == "native":
+        input_encoded = prepare_features_native(input_df, model_categories)
+    else:
+        input_encoded = prepare_features(input_df)
+
+        # Ensure all feature columns from training are present and in correct order
+        # Use reindex to add missing columns with 0s and reorder in one operation
+        input_encoded = input_encoded.reindex(columns=feature_columns, fill_value=0)
 
-    # Ensure all feature columns from training are present and in correct order
-    # Use reindex to add missing columns with 0s and reorder in one operation
-    input_encoded = input_encoded.reindex(columns=feature_columns, fill_value=0)
+    return input_encoded
+
+
+def predict_salary(data: SalaryInput, fast: bool = False) -> float:
+    """Predict salary based on input features.
+
+    Args:
+        data: SalaryInput model with developer information
+        fast: Use the distilled fast model (fewer, shallower trees) when the
+              artifacts have one; otherwise the full model is used
+
+    Returns:
+        Predicted annual salary in USD
+
+    Raises:
+        ValueError: If country or education_level is not in valid categories
+    """
+    input_encoded = _encode_input(data)
 
     # Make prediction
-    prediction = model.predict(input_encoded)[0]
+    booster = fast_model if fast and fast_model is not None else model
+    prediction = predict_frame(booster, input_encoded, encoding)[0]
 
     # Ensure non-negative salary
     return max(0.0, float(prediction))
+
+
+def predict_salary_within_budget(
+    data: SalaryInput,
+    queue_depth: int | None = None,
+    deadline_ms: float | None = None,
+) -> dict:
+    """Predict salary with fewer trees when the service is under load.
+
+    The level (a prefix of the model's trees, degraded_mode.levels) is chosen
+    from the queue depth and/or the time left for this request; see
+    src/budget.py. Deadlines use the per-tree cost measured by warm_up(),
+    which runs before the first deadline request unless it was called
+    earlier (for example when a server starts).
+
+    Args:
+        data: SalaryInput model with developer information
+        queue_depth: Requests waiting, including this one
+        deadline_ms: Time left for this prediction in milliseconds
+
+    Returns:
+        Dict with salary (USD), trees used, total_trees of the model and
+        degraded (True when fewer than all trees were used)
+
+    Raises:
+        ValueError: If country or education_level is not in valid categories
+    """
+    if deadline_ms is not None and _latency is None:
+        warm_up()
+    input_encoded = _encode_input(data)
+    trees = choose_trees(
+        _levels,
+        degraded_mode,
+        _latency,
+        queue_depth=queue_depth,
+        deadline_ms=deadline_ms,
+    )
+    prediction = predict_frame(model, input_encoded, encoding, trees)[0]
+    return {
+        "salary": max(0.0, float(prediction)),
+        "trees": trees,
+        "total_trees": _total_trees,
+        "degraded": trees < _total_trees,
+    }
+
+
+def warm_up() -> None:
+    """Measure the single-row predict cost per tree for deadline requests.
+
+    Times a row of the first valid category of every feature. Skipped when
+    there is only one level.
+    """
+    global _latency
+    if len(_levels) < 2:
+        return
+    row = SalaryInput(
+        country=valid_categories["Country"][0],
+        years_code=5.0,
+        work_exp=3.0,
+        education_level=valid_categories["EdLevel"][0],
+        dev_type=valid_categories["DevType"][0],
+        industry=valid_categories["Industry"][0],
+        age=valid_categories["Age"][0],
+        ic_or_pm=valid_categories["ICorPM"][0],
+    )
+    _latency = calibrate(model, _encode_input(row), encoding)
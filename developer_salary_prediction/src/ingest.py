@@ -0,0 +1,298 @@
+"""Survey CSV ingestion with explicit dtypes and bounded memory.
+
+The survey CSV is hundreds of MB with 100+ columns. Only the requested
+columns are parsed, categorical text is stored as pandas categoricals, and
+the year columns are coerced to floats, including the text values some
+survey years use ("Less than 1 year", "More than 50 years").
+
+With the pyarrow package installed the multi-threaded pyarrow parser is
+used. Passing `chunksize` (or running without pyarrow) reads the file in
+chunks with the C parser instead, optionally filtering each chunk, so peak
+memory is bounded by the chunk size plus the rows that are kept.
+
+Several survey years can be read together (read_surveys, iter_surveys).
+Each file's year comes from its path, and config/survey_schema.yaml maps
+that year's column names and category spellings onto the current schema.
+Rows are tagged with their year in the SurveyYear column.
+"""
+
+import importlib.util
+import re
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+from pandas.api.types import union_categoricals
+
+from src.preprocessing import CATEGORICAL_FEATURES
+
+# Columns holding years of experience, numeric apart from a few text answers
+YEARS_COLUMNS = ["YearsCode", "YearsCodePro", "WorkExp"]
+
+# Text answers for the year columns and the value each one maps to
+YEARS_TEXT_VALUES = {
+    "Less than 1 year": 0.5,
+    "More than 50 years": 51.0,
+}
+
+# Free-text columns with few distinct values, stored as categoricals
+CATEGORY_COLUMNS = [*CATEGORICAL_FEATURES, "Currency"]
+
+# Plain numeric columns
+FLOAT_COLUMNS = ["CompTotal", "ConvertedCompYearly"]
+
+# Mapping of older survey years onto the current schema
+SCHEMA_PATH = Path("config/survey_schema.yaml")
+
+# Column added by read_surveys() with the survey year of each row
+YEAR_COLUMN = "SurveyYear"
+
+# A four-digit year in a file path, e.g. data/2023/... or survey_2023.csv
+_YEAR_PATTERN = re.compile(r"(?<!\d)(19|20)\d{2}(?!\d)")
+
+
+def has_pyarrow() -> bool:
+    """Whether the pyarrow CSV engine can be used."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def coerce_years(series: pd.Series) -> pd.Series:
+    """
+    Convert a years-of-experience column to float64 without a Python loop.
+
+    Numeric strings are parsed directly; the text answers in
+    YEARS_TEXT_VALUES are looked up; anything else becomes NaN.
+    """
+    numeric = pd.to_numeric(series, errors="coerce").astype("float64")
+    if series.dtype.kind in "fiu":
+        return numeric
+    text = series.map(YEARS_TEXT_VALUES).astype("float64")
+    return numeric.fillna(text)
+
+
+def _read_dtypes(columns: list[str]) -> dict:
+    dtypes = {}
+    for col in columns:
+        if col in CATEGORY_COLUMNS:
+            dtypes[col] = "category"
+        elif col in YEARS_COLUMNS:
+            dtypes[col] = "string"
+        elif col in FLOAT_COLUMNS:
+            dtypes[col] = "float64"
+    return dtypes
+
+
+def _finish(df: pd.DataFrame) -> pd.DataFrame:
+    return df.assign(
+        **{col: coerce_years(df[col]) for col in YEARS_COLUMNS if col in df.columns}
+    )
+
+
+def _concat_chunks(chunks: list[pd.DataFrame], columns: list[str]) -> pd.DataFrame:
+    """Concatenate chunks, merging per-chunk category sets without going via object."""
+    if not chunks:
+        return pd.DataFrame(columns=columns)
+    categorical = [col for col in columns if col in CATEGORY_COLUMNS]
+    merged = {
+        col: union_categoricals([chunk[col] for chunk in chunks]) for col in categorical
+    }
+    df = pd.concat([chunk.drop(columns=categorical) for chunk in chunks])
+    for col in categorical:
+        df[col] = merged[col]
+    return df[columns]
+
+
+def _source_columns(columns: list[str], rename: dict) -> tuple[list, dict]:
+    """CSV column names and dtypes to read for `columns` under a rename map."""
+    source = {new: old for old, new in rename.items()}
+    dtypes = {
+        source.get(col, col): dtype for col, dtype in _read_dtypes(columns).items()
+    }
+    return [source.get(col, col) for col in columns], dtypes
+
+
+def read_survey(
+    path: Path,
+    columns: list[str],
+    chunksize: int | None = None,
+    row_filter: Callable[[pd.DataFrame], pd.DataFrame] | None = None,
+    rename: dict | None = None,
+) -> pd.DataFrame:
+    """
+    Read the requested survey columns with explicit dtypes.
+
+    Args:
+        path: Survey CSV
+        columns: Columns to parse; all others are skipped by the parser
+        chunksize: Rows per chunk for the bounded-memory reader; None uses
+                   the pyarrow engine when installed
+        row_filter: Optional function applied to every chunk (or to the whole
+                    frame) to drop unneeded rows as early as possible
+        rename: CSV column name -> name in `columns`, for files that use
+                older names
+
+    Returns:
+        DataFrame with `columns` in order; text categories as "category",
+        year columns as float64; the index is the CSV row position
+    """
+    rename = rename or {}
+    usecols, dtypes = _source_columns(columns, rename)
+
+    if chunksize is None and has_pyarrow():
+        df = pd.read_csv(path, usecols=usecols, dtype=dtypes, engine="pyarrow")
+        df = _finish(df.rename(columns=rename)[columns])
+        return row_filter(df) if row_filter else df
+
+    chunks = []
+    reader = pd.read_csv(
+        path, usecols=usecols, dtype=dtypes, chunksize=chunksize or 100_000
+    )
+    for chunk in reader:
+        chunk = _finish(chunk.rename(columns=rename)[columns])
+        chunks.append(row_filter(chunk) if row_filter else chunk)
+    return _concat_chunks(chunks, columns)
+
+
+def load_schema(path: Path = SCHEMA_PATH) -> dict:
+    """Survey year mappings (see config/survey_schema.yaml)."""
+    with open(path, "r") as f:
+        schema = yaml.safe_load(f)
+    schema["years"] = schema.get("years") or {}
+    return schema
+
+
+def survey_year(path: Path, schema: dict) -> int:
+    """Year of a survey file from its path, or the schema's current_year."""
+    matches = [m.group(0) for m in _YEAR_PATTERN.finditer(str(path))]
+    return int(matches[-1]) if matches else schema["current_year"]
+
+
+def _recode(series: pd.Series, mapping: dict) -> pd.Series:
+    """Replace category spellings, merging categories that become equal."""
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series.replace(mapping)
+    new_values = series.cat.categories.map(lambda value: mapping.get(value, value))
+    codes, uniques = pd.factorize(new_values)
+    old_codes = series.cat.codes.to_numpy()
+    merged = np.where(old_codes >= 0, codes[old_codes], -1)
+    return pd.Series(
+        pd.Categorical.from_codes(merged, uniques), index=series.index, name=series.name
+    )
+
+
+def harmonize(df: pd.DataFrame, year: int, schema: dict) -> pd.DataFrame:
+    """Apply a year's category spellings and add the SurveyYear column."""
+    spec = schema["years"].get(year, {})
+    for col, mapping in (spec.get("values") or {}).items():
+        if col in df.columns:
+            df[col] = _recode(df[col], mapping)
+    df[YEAR_COLUMN] = np.int16(year)
+    return df
+
+
+def _year_columns(path: Path, columns: list[str], rename: dict) -> list[str]:
+    """Requested columns the file has, under the current names."""
+    header = set(pd.read_csv(path, nrows=0).columns)
+    source = {new: old for old, new in rename.items()}
+    return [col for col in columns if source.get(col, col) in header]
+
+
+def _fill_missing(df: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+    """Add columns a survey year does not have, as missing values."""
+    for col in columns:
+        if col not in df.columns:
+            df[col] = (
+                pd.Categorical.from_codes(
+                    np.full(len(df), -1), categories=pd.Index([], dtype="str")
+                )
+                if col in CATEGORY_COLUMNS
+                else np.nan
+            )
+    return df[[*columns, YEAR_COLUMN]]
+
+
+def _read_year(
+    path: Path,
+    columns: list[str],
+    schema: dict,
+    chunksize: int | None,
+    row_filter: Callable[[pd.DataFrame], pd.DataFrame] | None,
+) -> pd.DataFrame:
+    year = survey_year(path, schema)
+    rename = schema["years"].get(year, {}).get("columns") or {}
+    present = _year_columns(path, columns, rename)
+    df = read_survey(path, present, chunksize, row_filter, rename)
+    return _fill_missing(harmonize(df, year, schema), columns)
+
+
+def read_surveys(
+    paths: list[Path],
+    columns: list[str],
+    schema: dict,
+    chunksize: int | None = None,
+    row_filter: Callable[[pd.DataFrame], pd.DataFrame] | None = None,
+    workers: int = 4,
+) -> pd.DataFrame:
+    """
+    Read several survey files concurrently into one harmonized frame.
+
+    Files are parsed in a thread pool; the pyarrow parser releases the GIL,
+    so files are parsed in parallel. Each file is mapped onto the current
+    schema for its year (see harmonize()); columns a year does not have are
+    left missing.
+
+    Args:
+        paths: Survey CSVs
+        columns: Current column names to read
+        schema: Output of load_schema()
+        chunksize: As for read_survey()
+        row_filter: As for read_survey(), applied after harmonizing names
+        workers: Files parsed at once
+
+    Returns:
+        DataFrame with `columns` and SurveyYear, files in the given order;
+        the index is the CSV row position for a single file, a fresh
+        RangeIndex for several
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths)))) as pool:
+        frames = list(
+            pool.map(
+                lambda path: _read_year(path, columns, schema, chunksize, row_filter),
+                paths,
+            )
+        )
+    if len(frames) == 1:
+        return frames[0]
+    df = _concat_chunks(frames, [*columns, YEAR_COLUMN])
+    return df.reset_index(drop=True)
+
+
+def iter_surveys(
+    paths: list[Path],
+    columns: list[str],
+    schema: dict,
+    chunksize: int = 100_000,
+    row_filter: Callable[[pd.DataFrame], pd.DataFrame] | None = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield harmonized chunks of several survey files, file by file.
+
+    The bounded-memory counterpart of read_surveys(): every chunk has
+    `columns` and SurveyYear, and its index is the CSV row position within
+    its file.
+    """
+    for path in paths:
+        year = survey_year(path, schema)
+        rename = schema["years"].get(year, {}).get("columns") or {}
+        present = _year_columns(path, columns, rename)
+        usecols, dtypes = _source_columns(present, rename)
+        for chunk in pd.read_csv(
+            path, usecols=usecols, dtype=dtypes, chunksize=chunksize
+        ):
+            chunk = _finish(chunk.rename(columns=rename)[present])
+            if row_filter:
+                chunk = row_filter(chunk)
+            yield _fill_missing(harmonize(chunk, year, schema), columns)
@@ -0,0 +1,366 @@
+"""XGBoost model construction shared by training, evaluation and benchmarks."""
+
+import json
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from xgboost import XGBRegressor
+
+# Booster parameters that are only passed when set in the `model` config
+# (same names for XGBRegressor and xgboost.train)
+OPTIONAL_PARAMS = ["subsample", "colsample_bytree", "gamma", "reg_alpha", "reg_lambda"]
+
+
+def build_regressor(model_config: dict, encoding: str = "onehot", **overrides):
+    """
+    Create an XGBRegressor from the `model` section of model_parameters.yaml.
+
+    Args:
+        model_config: The `model` section of the configuration
+        encoding: "onehot" for get_dummies input, "native" for pandas
+                  categorical columns (enables XGBoost native categorical
+                  splits, which require the histogram tree method)
+        **overrides: Keyword arguments that take precedence over the config
+                     (e.g. n_jobs for a per-fold thread budget)
+
+    Returns:
+        Unfitted XGBRegressor
+    """
+    params = {
+        "n_estimators": model_config["n_estimators"],
+        "learning_rate": model_config["learning_rate"],
+        "max_depth": model_config["max_depth"],
+        "min_child_weight": model_config["min_child_weight"],
+        "random_state": model_config["random_state"],
+        "n_jobs": model_config["n_jobs"],
+        "early_stopping_rounds": model_config["early_stopping_rounds"],
+    }
+    params.update(
+        {key: model_config[key] for key in OPTIONAL_PARAMS if key in model_config}
+    )
+    if encoding == "native":
+        params["enable_categorical"] = True
+        params["tree_method"] = "hist"
+    params.update(overrides)
+    return XGBRegressor(**params)
+
+
+def booster_params(model_config: dict, n_jobs: int | None = None) -> dict:
+    """
+    Translate the `model` config section into xgboost.train() parameters.
+
+    Matches what build_regressor() passes to the booster, so models trained
+    through either API are interchangeable.
+    """
+    params = {
+        "objective": "reg:squarederror",
+        "tree_method": "hist",
+        "learning_rate": model_config["learning_rate"],
+        "max_depth": model_config["max_depth"],
+        "min_child_weight": model_config["min_child_weight"],
+        "seed": model_config["random_state"],
+        "nthread": model_config["n_jobs"] if n_jobs is None else n_jobs,
+    }
+    params.update(
+        {key: model_config[key] for key in OPTIONAL_PARAMS if key in model_config}
+    )
+    return params
+
+
+def build_reference_matrix(
+    X: pd.DataFrame, y: pd.Series, encoding: str = "onehot"
+) -> xgb.QuantileDMatrix:
+    """
+    Quantize all rows once so every fold can reuse the histogram bin cuts.
+
+    Returns:
+        QuantileDMatrix over the full data; pass it as `reference` to
+        training_matrix() to skip re-sketching quantiles for each subset
+    """
+    return xgb.QuantileDMatrix(X, y, enable_categorical=encoding == "native")
+
+
+def training_matrix(
+    X: pd.DataFrame,
+    y: pd.Series,
+    rows: np.ndarray,
+    reference: xgb.QuantileDMatrix,
+    encoding: str = "onehot",
+) -> xgb.QuantileDMatrix:
+    """Bin the selected rows with the cuts of a reference matrix."""
+    return xgb.QuantileDMatrix(
+        X.iloc[rows],
+        y.iloc[rows],
+        ref=reference,
+        enable_categorical=encoding == "native",
+    )
+
+
+def duplicate_groups(X: pd.DataFrame) -> np.ndarray:
+    """
+    Number the distinct feature vectors of X.
+
+    Returns:
+        One group id per row; rows with identical features (all columns,
+        missing values equal) share an id, numbered in order of first
+        appearance
+    """
+    return (
+        X.groupby(list(X.columns), sort=False, observed=True, dropna=False)
+        .ngroup()
+        .to_numpy()
+    )
+
+
+def collapsed_training_matrix(
+    X: pd.DataFrame,
+    y: pd.Series,
+    rows: np.ndarray,
+    groups: np.ndarray,
+    reference: xgb.QuantileDMatrix,
+    encoding: str = "onehot",
+) -> tuple[xgb.QuantileDMatrix, np.ndarray]:
+    """
+    Bin the selected rows with duplicate feature vectors collapsed.
+
+    Each distinct vector becomes one row whose label is the mean target of
+    its copies and whose weight is their count. For reg:squarederror this
+    gives the same gradient and hessian sums per node (and the same
+    weighted-mean base score) as the uncompressed rows, so with the same
+    bin cuts the trees are the same up to float summation order.
+
+    Args:
+        groups: duplicate_groups() of the full X
+
+    Returns:
+        (matrix, inverse) where matrix row inverse[i] holds rows[i]
+    """
+    _, first, inverse, counts = np.unique(
+        groups[rows], return_index=True, return_inverse=True, return_counts=True
+    )
+    target = np.bincount(inverse, weights=y.to_numpy()[rows]) / counts
+    matrix = xgb.QuantileDMatrix(
+        X.iloc[rows[first]],
+        target,
+        weight=counts,
+        ref=reference,
+        enable_categorical=encoding == "native",
+    )
+    return matrix, inverse
+
+
+def evaluation_matrix(
+    X: pd.DataFrame, y: pd.Series, rows: np.ndarray, encoding: str = "onehot"
+) -> xgb.DMatrix:
+    """Wrap the selected rows for early stopping and prediction (no binning)."""
+    return xgb.DMatrix(
+        X.iloc[rows], y.iloc[rows], enable_categorical=encoding == "native"
+    )
+
+
+def fit_booster(
+    model_config: dict,
+    dtrain: xgb.DMatrix,
+    dvalid: xgb.DMatrix,
+    n_jobs: int | None = None,
+    verbose: bool = False,
+    callbacks: list | None = None,
+) -> xgb.Booster:
+    """Train with early stopping on `dvalid`, mirroring XGBRegressor.fit()."""
+    return xgb.train(
+        booster_params(model_config, n_jobs),
+        dtrain,
+        num_boost_round=model_config["n_estimators"],
+        evals=[(dvalid, "validation")],
+        early_stopping_rounds=model_config["early_stopping_rounds"],
+        verbose_eval=verbose,
+        callbacks=callbacks,
+    )
+
+
+def predict_best(booster: xgb.Booster, data: xgb.DMatrix) -> np.ndarray:
+    """Predict with the trees up to the early-stopping best iteration."""
+    return booster.predict(data, iteration_range=(0, booster.best_iteration + 1))
+
+
+def average_boosters(boosters: list[xgb.Booster]) -> xgb.Booster:
+    """
+    Merge boosters into one whose prediction is the mean of theirs.
+
+    Each booster is cut at its best iteration; the trees of all of them are
+    concatenated with leaf values divided by their number, and the base
+    score becomes the mean base score. This is exact for the identity link
+    of reg:squarederror (up to float32 summation order), and the merged
+    booster predicts the ensemble in a single predict() call.
+    """
+    n_models = len(boosters)
+    merged = None
+    trees = []
+    base_scores = []
+    for booster in boosters:
+        model = json.loads(
+            booster[: booster.best_iteration + 1].save_raw("json").decode()
+        )
+        learner = model["learner"]
+        base_scores.append(
+            float(learner["learner_model_param"]["base_score"].strip("[]"))
+        )
+        trees.extend(learner["gradient_booster"]["model"]["trees"])
+        if merged is None:
+            merged = model
+
+    for tree_id, tree in enumerate(trees):
+        tree["id"] = tree_id
+        tree["base_weights"] = [w / n_models for w in tree["base_weights"]]
+        # Leaf values are stored in split_conditions of nodes without children
+        tree["split_conditions"] = [
+            value / n_models if left == -1 else value
+            for value, left in zip(tree["split_conditions"], tree["left_children"])
+        ]
+
+    learner = merged["learner"]
+    learner["learner_model_param"]["base_score"] = f"[{np.mean(base_scores):.9E}]"
+    gbtree = learner["gradient_booster"]["model"]
+    gbtree["trees"] = trees
+    gbtree["tree_info"] = [0] * len(trees)
+    gbtree["iteration_indptr"] = list(range(len(trees) + 1))
+    gbtree["gbtree_model_param"]["num_trees"] = str(len(trees))
+    learner["attributes"] = {"best_iteration": str(len(trees) - 1)}
+
+    ensemble = xgb.Booster()
+    ensemble.load_model(bytearray(json.dumps(merged).encode()))
+    return ensemble
+
+
+def to_regressor(
+    booster: xgb.Booster, model_config: dict, encoding: str = "onehot"
+) -> XGBRegressor:
+    """
+    Wrap a trained booster in the XGBRegressor used by the saved artifact.
+
+    The best iteration is stored on the booster, so predict() on the
+    wrapper keeps using only the trees up to early stopping.
+    """
+    model = build_regressor(model_config, encoding)
+    model.load_model(bytearray(booster.save_raw("ubj")))
+    return model
+
+
+def compact_model(booster: xgb.Booster) -> bytes:
+    """
+    Serialize only what prediction needs.
+
+    The trees after the best iteration are dropped, and so are the training
+    configuration and the sklearn wrapper; the result is the UBJSON model
+    with best_iteration set to its last tree. Load it with artifact_booster().
+    """
+    pruned = booster[: booster.best_iteration + 1]
+    pruned.set_attr(best_iteration=str(booster.best_iteration))
+    return bytes(pruned.save_raw("ubj"))
+
+
+def artifact_booster(artifacts: dict, key: str = "model") -> xgb.Booster:
+    """
+    Booster of saved model artifacts (compact, or an older XGBRegressor).
+
+    Args:
+        artifacts: Unpickled model artifacts
+        key: "model", or "fast_model" for the distilled student
+    """
+    model = artifacts[key]
+    if isinstance(model, XGBRegressor):
+        return model.get_booster()
+    return xgb.Booster(model_file=bytearray(model))
+
+
+def model_trees(booster: xgb.Booster) -> int:
+    """
+    Trees the booster predicts with: up to its best iteration, or all of
+    them for boosters saved without one (older XGBRegressor artifacts
+    trained without early stopping).
+    """
+    try:
+        return booster.best_iteration + 1
+    except AttributeError:
+        return booster.num_boosted_rounds()
+
+
+def predict_frame(
+    booster: xgb.Booster,
+    X: pd.DataFrame,
+    encoding: str = "onehot",
+    trees: int | None = None,
+) -> np.ndarray:
+    """
+    Predict encoded rows with the trees up to the best iteration, no DMatrix.
+
+    One-hot input is passed as a float32 array in X's column order (the
+    booster's feature order); converting a frame of bool columns costs more
+    than the tree walk for a single row. Native categorical input stays a
+    DataFrame so XGBoost reads the category codes. `trees` predicts with
+    only that many leading trees instead (see src.budget).
+    """
+    data = X if encoding == "native" else X.to_numpy(dtype=np.float32)
+    return booster.inplace_predict(
+        data, iteration_range=(0, trees or model_trees(booster))
+    )
+
+
+def per_call_seconds(predict, repeats: int) -> float:
+    """Mean wall time of predict() over `repeats` calls, after one warm-up call."""
+    predict()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        predict()
+    return (time.perf_counter() - start) / repeats
+
+
+def compare_compact_model(
+    model: XGBRegressor,
+    compact: bytes,
+    X: pd.DataFrame,
+    encoding: str = "onehot",
+    batch_rows: int = 10_000,
+    repeats: int = 20,
+) -> dict:
+    """
+    Check a compact model against the wrapped model it was made from.
+
+    Args:
+        model: Fitted XGBRegressor (the unpruned final model)
+        compact: compact_model() of its booster
+        X: Encoded rows to predict; the first batch_rows are used
+        encoding: Categorical encoding of X
+
+    Returns:
+        Dict with trees before and after pruning, pickled sizes in bytes and
+        per-call single-row and batch predict seconds of both
+
+    Raises:
+        ValueError: If the predictions are not bit-identical
+    """
+    booster = xgb.Booster(model_file=bytearray(compact))
+    batch = X.iloc[:batch_rows]
+    expected = model.predict(batch)
+    if not np.array_equal(predict_frame(booster, batch, encoding), expected):
+        raise ValueError("Compact model predictions differ from the full model")
+
+    row = X.iloc[:1]
+    return {
+        "trees": model.get_booster().num_boosted_rounds(),
+        "pruned_trees": booster.num_boosted_rounds(),
+        "bytes": len(pickle.dumps(model)),
+        "compact_bytes": len(compact),
+        "row_seconds": per_call_seconds(lambda: model.predict(row), repeats),
+        "compact_row_seconds": per_call_seconds(
+            lambda: predict_frame(booster, row, encoding), repeats
+        ),
+        "batch_rows": len(batch),
+        "batch_seconds": per_call_seconds(lambda: model.predict(batch), repeats),
+        "compact_batch_seconds": per_call_seconds(
+            lambda: predict_frame(booster, batch, encoding), repeats
+        ),
+    }
@@ -0,0 +1,282 @@
+"""Offline monitoring: score new labelled responses with the deployed model.
+
+guardrail_evaluation.py judges the model on its own training data. When a
+new batch of responses with salaries arrives, this module measures the
+deployed model on it without training anything: the CSVs are streamed in
+chunks of monitoring.chunk_rows rows, each chunk is encoded into the
+model's feature layout (src.incremental.align_features, the batch
+counterpart of src.infer's encoding) and predicted with the saved booster,
+and only per-category sums are kept (src.guardrails.category_sums), so
+memory does not grow with the number of rows.
+
+Cleaning follows training where it can be done row by row
+(src.incremental.clean_new_rows(), shared with warm-start training):
+salaries at or below data.min_salary are dropped, values the model has no
+category for become the "Other" category where the model has one (as
+cardinality reduction does), and rows with "Other" in
+features.cardinality.drop_other_from are dropped (including values that
+training reduced to Other there). Per-country percentile trimming needs
+all rows, so instead salaries outside the training range (from the saved
+data profile) are left out. Rows with categories the model cannot encode
+are counted and skipped.
+
+The result is the guardrail table of guardrail_evaluation.py. Categories are
+flagged when they break the guardrails thresholds, or when they regressed
+against the training baseline (the per-category metrics of the CV
+out-of-fold predictions, saved in the artifacts as "guardrail_baseline"):
+an R2 drop above monitoring.max_r2_drop or an abs % diff increase above
+monitoring.max_pct_diff_increase, for categories with at least
+monitoring.min_category_rows new rows. The exit status is 1 if anything
+was flagged.
+
+Usage:
+    uv run python -m src.monitor --data data/new_responses.csv [--output report.csv]
+"""
+
+import argparse
+import pickle
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from src.cleaning import MAIN_LABEL
+from src.guardrails import (
+    add_sums,
+    category_sums,
+    flag_violations,
+    format_table,
+    metrics_from_sums,
+)
+from src.incremental import align_features, clean_new_rows, model_categories
+from src.ingest import iter_surveys, load_schema
+from src.model import artifact_booster, predict_frame
+from src.preprocessing import (
+    FEATURE_COLUMNS,
+)
+
+
+def score_chunks(
+    chunks,
+    artifacts: dict,
+    config: dict,
+    verbose: bool = True,
+) -> tuple:
+    """
+    Predict every chunk with the saved model and add up per-category sums.
+
+    Args:
+        chunks: Iterable of raw survey frames (FEATURE_COLUMNS and MAIN_LABEL)
+        artifacts: Unpickled model artifacts
+        config: Full model_parameters.yaml configuration
+        verbose: Print progress per chunk
+
+    Returns:
+        (sums, rows) where sums is the added category_sums() (None when no
+        row was scored) and rows counts read, scored and skipped rows
+    """
+    booster = artifact_booster(artifacts)
+    encoding = artifacts.get("encoding", "onehot")
+    categories = model_categories(artifacts)
+    salary = artifacts.get("profile", {}).get("numeric", {}).get(MAIN_LABEL, {})
+    shift = salary.get("mean")
+
+    total = None
+    rows = {"read": 0, "out_of_range": 0, "other": 0, "unknown": 0, "scored": 0}
+    for chunk in chunks:
+        rows["read"] += len(chunk)
+        chunk, dropped = clean_new_rows(chunk, artifacts, config)
+        rows["out_of_range"] += dropped["out_of_range"]
+        rows["other"] += dropped["other"]
+
+        X, known = align_features(chunk, artifacts)
+        rows["unknown"] += int((~known).sum())
+        if not known.any():
+            continue
+        chunk = chunk[known]
+        actual = chunk[MAIN_LABEL].to_numpy(dtype=np.float64)
+        if shift is None:
+            shift = float(actual.mean())
+        predictions = predict_frame(booster, X[known], encoding)
+        total = add_sums(
+            total, category_sums(chunk, actual, predictions, categories, shift)
+        )
+        rows["scored"] += len(chunk)
+        if verbose:
+            print(f"  {rows['read']:,} rows read, {rows['scored']:,} scored")
+    return total, rows
+
+
+def compare_to_baseline(
+    metrics: pd.DataFrame, baseline: list[dict], settings: dict
+) -> pd.DataFrame:
+    """
+    Add the training baseline and flag regressed categories.
+
+    Args:
+        metrics: Guardrail table of the new data
+        baseline: Artifact "guardrail_baseline" records
+        settings: monitoring section of model_parameters.yaml
+
+    Returns:
+        Copy with Baseline R2, Baseline Abs % Diff and a boolean Regressed
+        column (False for categories without a baseline or with fewer than
+        min_category_rows rows)
+    """
+    baseline = pd.DataFrame(baseline)[["Feature", "Category", "R2", "Abs % Diff"]]
+    merged = metrics.merge(
+        baseline.rename(
+            columns={"R2": "Baseline R2", "Abs % Diff": "Baseline Abs % Diff"}
+        ),
+        on=["Feature", "Category"],
+        how="left",
+    )
+    regressed = (merged["Baseline R2"] - merged["R2"] > settings["max_r2_drop"]) | (
+        merged["Abs % Diff"] - merged["Baseline Abs % Diff"]
+        > settings["max_pct_diff_increase"]
+    )
+    return merged.assign(
+        Regressed=regressed & (merged["Count"] >= settings["min_category_rows"])
+    )
+
+
+def monitor(
+    config: dict,
+    paths: list[Path],
+    artifacts: dict,
+    chunk_rows: int | None = None,
+    verbose: bool = True,
+) -> tuple:
+    """
+    Guardrail table of the deployed model on new labelled responses.
+
+    Args:
+        config: Full model_parameters.yaml configuration
+        paths: Survey CSVs with the new responses
+        artifacts: Unpickled model artifacts
+        chunk_rows: Rows per chunk (default: monitoring.chunk_rows)
+        verbose: Print progress
+
+    Returns:
+        (metrics, report) where metrics is the per-category table with the
+        flag_violations() columns, plus the compare_to_baseline() columns
+        when the artifacts have a baseline (None if no row could be
+        scored), and report holds the row counts and timing
+    """
+    settings = config["monitoring"]
+    min_salary = config["data"]["min_salary"]
+    guardrails = config.get("guardrails", {})
+    chunks = iter_surveys(
+        paths,
+        [*FEATURE_COLUMNS, MAIN_LABEL],
+        load_schema(),
+        chunksize=chunk_rows or settings["chunk_rows"],
+        row_filter=lambda chunk: chunk[chunk[MAIN_LABEL] > min_salary],
+    )
+
+    start = time.perf_counter()
+    sums, rows = score_chunks(chunks, artifacts, config, verbose)
+    report = {"rows": rows, "seconds": round(time.perf_counter() - start, 2)}
+    if sums is None:
+        return None, report
+
+    categories = model_categories(artifacts)
+    metrics = flag_violations(
+        metrics_from_sums(sums, categories),
+        guardrails.get("min_r2_per_category", 0.30),
+        guardrails.get("max_abs_pct_diff", 10),
+    )
+    if "guardrail_baseline" in artifacts:
+        metrics = compare_to_baseline(
+            metrics, artifacts["guardrail_baseline"], settings
+        )
+    # Every row falls in one slot of each feature, so the slots of any
+    # feature add up to the overall sums (the empty last slot stands for
+    # missing values)
+    overall = metrics_from_sums(
+        [{name: np.array([column.sum(), 0]) for name, column in sums[0].items()}],
+        {"All": ["All"]},
+        ["All"],
+    )
+    report["r2"] = float(overall["R2"].iloc[0])
+    return metrics, report
+
+
+def main():
+    """Score new labelled responses and print the guardrail table."""
+    parser = argparse.ArgumentParser(description="Score new labelled responses")
+    parser.add_argument("--data", type=Path, nargs="+", required=True)
+    parser.add_argument("--chunk-rows", type=int, help="monitoring.chunk_rows")
+    parser.add_argument(
+        "--model", type=Path, help="Model artifacts (default: training.model_path)"
+    )
+    parser.add_argument("--output", type=Path, help="Write the table as CSV")
+    args = parser.parse_args()
+
+    with open("config/model_parameters.yaml", "r") as f:
+        config = yaml.safe_load(f)
+    model_path = args.model or Path(config["training"]["model_path"])
+    with open(model_path, "rb") as f:
+        artifacts = pickle.load(f)
+    guardrails = config.get("guardrails", {})
+    min_r2 = guardrails.get("min_r2_per_category", 0.30)
+    max_pct_diff = guardrails.get("max_abs_pct_diff", 10)
+
+    print(f"Scoring {', '.join(str(path) for path in args.data)} with {model_path}")
+    metrics, report = monitor(config, args.data, artifacts, args.chunk_rows)
+    rows = report["rows"]
+    print(
+        f"\n{rows['read']:,} rows read in {report['seconds']:.1f}s: "
+        f"{rows['scored']:,} scored, {rows['out_of_range']:,} outside the "
+        f"training salary range, {rows['other']:,} dropped as Other, "
+        f"{rows['unknown']:,} with categories the model cannot encode"
+    )
+    if metrics is None:
+        print("No rows could be scored.")
+        sys.exit(1)
+    print(f"Overall R2: {report['r2']:.4f}")
+
+    for feature, feature_metrics in metrics.groupby("Feature", sort=False):
+        print(f"\n## {feature}\n")
+        print(format_table(feature_metrics))
+
+    warnings = []
+    for row in metrics.to_dict("records"):
+        label = f'{row["Feature"]} "{row["Category"]}"'
+        if row["Low R2"]:
+            warnings.append(f"{label}: R2 = {row['R2']:.2f} (threshold: {min_r2})")
+        if row["High Diff"]:
+            warnings.append(
+                f"{label}: Abs % Diff = {row['Abs % Diff']:.1f}% "
+                f"(threshold: {max_pct_diff}%)"
+            )
+        if row.get("Regressed", False):
+            warnings.append(
+                f"{label}: regressed from training, R2 {row['Baseline R2']:.2f} -> "
+                f"{row['R2']:.2f}, abs % diff {row['Baseline Abs % Diff']:.1f}% -> "
+                f"{row['Abs % Diff']:.1f}%"
+            )
+    if "guardrail_baseline" not in artifacts:
+        print("\nThe artifacts have no training baseline; retrain to compare.")
+
+    if args.output:
+        metrics.to_csv(args.output, index=False)
+        print(f"\nTable written to {args.output}")
+
+    print("\n" + "=" * 80)
+    if warnings:
+        print("### Monitoring Warnings\n")
+        for w in warnings:
+            print(f"  - {w}")
+        print(f"\n{len(warnings)} flag(s) raised.")
+    else:
+        print("All categories pass the guardrails and match the training baseline.")
+    print("=" * 80)
+    sys.exit(1 if warnings else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""Run a sequence of named stages with checkpoints, resume and per-stage metrics.
+
+A stage is a dict:
+
+    {
+        "name": "cv",
+        "run": cross_validate,          # called as run(config, **inputs)
+        "inputs": ["X", "y"],           # outputs of earlier stages
+        "outputs": ["cv_results"],      # keys of the dict run() returns
+        "checkpoint": True,             # optional, default True
+    }
+
+After a checkpointed stage finishes, its outputs are pickled to
+`<run_dir>/<name>.pkl` and the stage is marked done in
+`<run_dir>/manifest.json`, together with its wall time and peak memory.
+A resumed run skips completed stages and loads their outputs from disk
+only when a later stage needs them. Stages with "checkpoint": False produce
+values that cannot be pickled (e.g. XGBoost matrices); they are rerun
+whenever a stage that runs needs their outputs.
+"""
+
+import hashlib
+import json
+import pickle
+import resource
+import sys
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+MANIFEST_FILE = "manifest.json"
+
+
+def reset_peak_rss() -> bool:
+    """
+    Reset the process's peak resident set size, where the OS allows it.
+
+    Returns:
+        True on Linux (via /proc/self/clear_refs), False elsewhere, in which
+        case peak_rss_mb() keeps reporting the peak since process start
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (since the last reset)."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB on Linux
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def config_digest(config: dict) -> str:
+    """Short hash of a configuration, to detect changes between runs."""
+    payload = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _validate(stages: list[dict]) -> dict:
+    """Check names and data flow; return the producing stage of each output."""
+    producers = {}
+    names = set()
+    for stage in stages:
+        if stage["name"] in names:
+            raise ValueError(f"Duplicate stage name: {stage['name']}")
+        names.add(stage["name"])
+        for name in stage["inputs"]:
+            if name not in producers:
+                raise ValueError(
+                    f"Stage '{stage['name']}' needs '{name}', "
+                    "which no earlier stage produces"
+                )
+        for name in stage["outputs"]:
+            producers[name] = stage
+    return producers
+
+
+def _load_manifest(run_dir: Path) -> dict:
+    manifest_path = run_dir / MANIFEST_FILE
+    if not manifest_path.exists():
+        return {"config_digest": None, "stages": {}}
+    with open(manifest_path, "r") as f:
+        return json.load(f)
+
+
+def _save_manifest(run_dir: Path, manifest: dict) -> None:
+    tmp_path = run_dir / f"{MANIFEST_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    tmp_path.replace(run_dir / MANIFEST_FILE)
+
+
+def load_checkpoint(run_dir: Path, name: str) -> dict:
+    """Outputs of a checkpointed stage from an earlier run in run_dir."""
+    checkpoint = Path(run_dir) / f"{name}.pkl"
+    if not checkpoint.exists():
+        raise FileNotFoundError(
+            f"No checkpoint for stage '{name}' in {run_dir}; "
+            "run the pipeline from an earlier stage"
+        )
+    with open(checkpoint, "rb") as f:
+        return pickle.load(f)
+
+
+def run_pipeline(
+    stages: list[dict],
+    config: dict,
+    run_dir: Path,
+    resume: bool = False,
+    from_stage: str | None = None,
+) -> dict:
+    """
+    Run stages in order, checkpointing each one to run_dir.
+
+    Args:
+        stages: Stage dicts (see module docstring), in execution order
+        config: Configuration passed to every stage
+        run_dir: Directory for checkpoints and manifest.json
+        resume: Skip stages completed by a previous run with the same config
+        from_stage: Rerun this stage and all later ones, loading the
+                    earlier stages' outputs from their checkpoints (the
+                    config may have changed, e.g. to retune the model)
+
+    Returns:
+        The manifest: config digest and, per stage, status, seconds and
+        peak_rss_mb; "ran" lists the stages executed by this call
+
+    Raises:
+        ValueError: Unknown from_stage, or resume with a changed config
+        FileNotFoundError: A needed checkpoint is missing
+    """
+    producers = _validate(stages)
+    names = [stage["name"] for stage in stages]
+    run_dir = Path(run_dir)
+    digest = config_digest(config)
+
+    if resume and from_stage:
+        raise ValueError("Use either resume or from_stage, not both")
+    if from_stage is not None and from_stage not in names:
+        raise ValueError(f"Unknown stage '{from_stage}'; stages: {', '.join(names)}")
+
+    if resume or from_stage:
+        manifest = _load_manifest(run_dir)
+        if resume and manifest["config_digest"] not in (None, digest):
+            raise ValueError(
+                f"Configuration changed since the run in {run_dir}; "
+                "start a fresh run or rerun the affected stages with from_stage"
+            )
+    else:
+        # A fresh run never reads checkpoints from an earlier one. Only the
+        # files this module writes are removed, whatever run_dir points to.
+        for name in names:
+            (run_dir / f"{name}.pkl").unlink(missing_ok=True)
+        (run_dir / MANIFEST_FILE).unlink(missing_ok=True)
+        manifest = {"config_digest": None, "stages": {}}
+    run_dir.mkdir(parents=True, exist_ok=True)
+    manifest.pop("ran", None)
+    manifest["config_digest"] = digest
+    manifest["order"] = names
+
+    if from_stage is not None:
+        start = names.index(from_stage)
+    else:
+        # First checkpointed stage without a completed checkpoint
+        done = manifest["stages"]
+        start = next(
+            (
+                i
+                for i, stage in enumerate(stages)
+                if stage.get("checkpoint", True)
+                and done.get(stage["name"], {}).get("status") != "done"
+            ),
+            len(stages),
+        )
+    for name in names[start:]:
+        manifest["stages"].pop(name, None)
+
+    values = {}
+    ran = []
+
+    def execute(stage: dict) -> None:
+        for name in stage["inputs"]:
+            ensure(name)
+        print(f"\n[stage {stage['name']}]")
+        reset_peak_rss()
+        start_time = time.perf_counter()
+        outputs = stage["run"](
+            config, **{name: values[name] for name in stage["inputs"]}
+        )
+        seconds = time.perf_counter() - start_time
+        outputs = outputs or {}
+        if set(outputs) != set(stage["outputs"]):
+            raise ValueError(
+                f"Stage '{stage['name']}' returned {sorted(outputs)}, "
+                f"declared {sorted(stage['outputs'])}"
+            )
+        values.update(outputs)
+        ran.append(stage["name"])
+        record = {
+            "status": "done" if stage.get("checkpoint", True) else "not checkpointed",
+            "seconds": round(seconds, 3),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "finished": datetime.now(UTC).isoformat(timespec="seconds"),
+        }
+        if stage.get("checkpoint", True):
+            checkpoint = run_dir / f"{stage['name']}.pkl"
+            tmp_path = checkpoint.with_suffix(".pkl.tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump(outputs, f, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_path.replace(checkpoint)
+        manifest["stages"][stage["name"]] = record
+        _save_manifest(run_dir, manifest)
+
+    def ensure(name: str) -> None:
+        if name in values:
+            return
+        producer = producers[name]
+        if not producer.get("checkpoint", True):
+            execute(producer)
+            return
+        values.update(load_checkpoint(run_dir, producer["name"]))
+
+    if start == len(stages):
+        print(f"All stages already completed in {run_dir}")
+    for stage in stages[start:]:
+        execute(stage)
+
+    manifest["ran"] = ran
+    _save_manifest(run_dir, manifest)
+    return manifest
+
+
+def format_stage_summary(manifest: dict) -> str:
+    """Table of wall time and peak memory per stage, in stage order."""
+    lines = [f"{'stage':12s} {'seconds':>9s} {'peak RSS MB':>12s}  status"]
+    for name in manifest["order"]:
+        record = manifest["stages"].get(name)
+        if record is None:
+            continue
+        status = "ran" if name in manifest.get("ran", []) else "previous run"
+        lines.append(
+            f"{name:12s} {record['seconds']:9.2f} {record['peak_rss_mb']:12.0f}  {status}"
+        )
+    return "\n".join(lines)
@@ -73,42 +73,39 @@ def reduce_cardinality(
     return series.apply(lambda x: x if x in kept_categories else other_name)
 
 
-def prepare_features(df: pd.DataFrame) -> pd.DataFrame:
+# Categorical and numeric model inputs, in the order the model expects them
+CATEGORICAL_FEATURES = ["Country", "EdLevel", "DevType", "Industry", "Age", "ICorPM"]
+FEATURE_COLUMNS = [
+    "Country",
+    "YearsCode",
+    "WorkExp",
+    "EdLevel",
+    "DevType",
+    "Industry",
+    "Age",
+    "ICorPM",
+]
+
+
+def _clean_feature_frame(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Apply consistent feature transformations for both training and inference.
-
-    This function ensures that the same preprocessing steps are applied
-    during training and inference, preventing data leakage and inconsistencies.
-
-    Args:
-        df: DataFrame with columns: Country, YearsCode, WorkExp, EdLevel, DevType, Industry, Age, ICorPM
-            NOTE: During training, cardinality reduction should be applied to df
-            BEFORE calling this function. During inference, valid_categories.yaml
-            ensures only valid (already-reduced) categories are used.
-
-    Returns:
-        DataFrame with one-hot encoded features ready for model input
+    Normalize, fill and select the raw feature columns shared by all encoders.
 
-    Note:
-        - Fills missing values with defaults (0 for numeric, "Unknown" for categorical)
-        - Normalizes Unicode apostrophes to regular apostrophes
-        - Applies one-hot encoding with drop_first=True to avoid multicollinearity
-        - Column names in output will be like: YearsCode, WorkExp, Country_X, EdLevel_Y, DevType_Z, Industry_W, Age_V, ICorPM_U
-        - Does NOT apply cardinality reduction (must be done before calling this)
+    Returns a new DataFrame with exactly FEATURE_COLUMNS; the input is not modified.
     """
     # Create a copy to avoid modifying the original
     df_processed = df.copy()
 
     # Normalize Unicode apostrophes to regular apostrophes for consistency
     # This handles cases where data has \u2019 (') instead of '
-    for col in ["Country", "EdLevel", "DevType", "Industry", "Age", "ICorPM"]:
+    for col in CATEGORICAL_FEATURES:
         if col in df_processed.columns:
             df_processed[col] = df_processed[col].str.replace(
                 "\u2019", "'", regex=False
             )
 
     # Normalize "Other" category variants (e.g. "Other (please specify):" -> "Other")
-    for col in ["Country", "EdLevel", "DevType", "Industry", "Age", "ICorPM"]:
+    for col in CATEGORICAL_FEATURES:
         if col in df_processed.columns:
             df_processed[col] = normalize_other_categories(df_processed[col])
 
@@ -122,29 +119,41 @@ def prepare_features(df: pd.DataFrame) -> pd.DataFrame:
     # Fill missing values with defaults
     df_processed["YearsCode"] = df_processed["YearsCode"].fillna(0)
     df_processed["WorkExp"] = df_processed["WorkExp"].fillna(0)
-    df_processed["Country"] = df_processed["Country"].fillna("Unknown")
-    df_processed["EdLevel"] = df_processed["EdLevel"].fillna("Unknown")
-    df_processed["DevType"] = df_processed["DevType"].fillna("Unknown")
-    df_processed["Industry"] = df_processed["Industry"].fillna("Unknown")
-    df_processed["Age"] = df_processed["Age"].fillna("Unknown")
-    df_processed["ICorPM"] = df_processed["ICorPM"].fillna("Unknown")
+    for col in CATEGORICAL_FEATURES:
+        df_processed[col] = df_processed[col].fillna("Unknown")
 
     # NOTE: Cardinality reduction is NOT applied here
     # It should be applied during training BEFORE calling this function
     # During inference, valid_categories.yaml ensures only valid values are used
 
     # Select only the features we need
-    feature_cols = [
-        "Country",
-        "YearsCode",
-        "WorkExp",
-        "EdLevel",
-        "DevType",
-        "Industry",
-        "Age",
-        "ICorPM",
-    ]
-    df_features = df_processed[feature_cols]
+    return df_processed[FEATURE_COLUMNS]
+
+
+def prepare_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Apply consistent feature transformations for both training and inference.
+
+    This function ensures that the same preprocessing steps are applied
+    during training and inference, preventing data leakage and inconsistencies.
+
+    Args:
+        df: DataFrame with columns: Country, YearsCode, WorkExp, EdLevel, DevType, Industry, Age, ICorPM
+            NOTE: During training, cardinality reduction should be applied to df
+            BEFORE calling this function. During inference, valid_categories.yaml
+            ensures only valid (already-reduced) categories are used.
+
+    Returns:
+        DataFrame with one-hot encoded features ready for model input
+
+    Note:
+        - Fills missing values with defaults (0 for numeric, "Unknown" for categorical)
+        - Normalizes Unicode apostrophes to regular apostrophes
+        - Applies one-hot encoding with drop_first=True to avoid multicollinearity
+        - Column names in output will be like: YearsCode, WorkExp, Country_X, EdLevel_Y, DevType_Z, Industry_W, Age_V, ICorPM_U
+        - Does NOT apply cardinality reduction (must be done before calling this)
+    """
+    df_features = _clean_feature_frame(df)
 
     # Apply one-hot encoding for categorical variables
     # For inference (single rows), we need drop_first=False to create columns
@@ -157,3 +166,37 @@ def prepare_features(df: pd.DataFrame) -> pd.DataFrame:
     df_encoded = pd.get_dummies(df_features, drop_first=drop_first)
 
     return df_encoded
+
+
+def prepare_features_native(
+    df: pd.DataFrame, categories: dict[str, list[str]]
+) -> pd.DataFrame:
+    """
+    Build the 8-column model input for XGBoost native categorical support.
+
+    Applies the same cleaning as prepare_features(), but instead of one-hot
+    encoding, each categorical column is cast to a pandas CategoricalDtype
+    with a fixed category list. Using the same lists at training and
+    inference time keeps the category codes (and so the tree splits) stable
+    regardless of which values appear in a given batch.
+
+    Args:
+        df: DataFrame with the same columns as for prepare_features()
+        categories: Mapping of categorical feature name to its ordered list
+                    of valid values (e.g. the contents of valid_categories.yaml)
+
+    Returns:
+        DataFrame with columns FEATURE_COLUMNS; values outside the category
+        lists become missing, which XGBoost routes down the default branch
+    """
+    df_features = _clean_feature_frame(df)
+    # Mask unknown values explicitly; casting them is deprecated in pandas
+    for col in CATEGORICAL_FEATURES:
+        known = df_features[col].isin(categories[col])
+        df_features[col] = df_features[col].where(known)
+    return df_features.astype(
+        {
+            col: pd.CategoricalDtype(categories[col], ordered=False)
+            for col in CATEGORICAL_FEATURES
+        }
+    )
@@ -0,0 +1,137 @@
+"""Training data profile: category frequencies and numeric summaries.
+
+The profile is computed once per training run. Each categorical column is
+counted in one pass (a bincount over category codes, or one hash pass for
+text). The numeric columns are sorted once, all together, and every
+quantile is read off the sorted values. This replaces separate
+value_counts, min, max, mean, median and quantile scans per column and a
+sum over the one-hot matrix. The result is a JSON-serializable dict saved
+with the model artifacts (and as <model>.profile.json) as a baseline for
+drift checks; printing it is optional (training.print_profile).
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.cleaning import MAIN_LABEL
+from src.preprocessing import CATEGORICAL_FEATURES
+
+NUMERIC_COLUMNS = ["YearsCode", "WorkExp", MAIN_LABEL]
+QUANTILES = {"min": 0.0, "p25": 0.25, "median": 0.5, "p75": 0.75, "max": 1.0}
+
+
+def category_frequencies(series: pd.Series) -> dict:
+    """
+    Count every value of a column in one pass.
+
+    Returns:
+        Dict with "counts" (value -> rows, most frequent first) and "missing"
+    """
+    categorical = series.array
+    if isinstance(categorical, pd.Categorical):
+        codes = categorical.codes
+        counts = pd.Series(
+            np.bincount(codes[codes >= 0], minlength=len(categorical.categories)),
+            index=categorical.categories.astype(str),
+        )
+        counts = counts[counts > 0].sort_values(ascending=False, kind="stable")
+    else:
+        # Text columns: one hash pass instead of building a Categorical first
+        counts = series.value_counts(dropna=True)
+    return {
+        "counts": {str(value): int(count) for value, count in counts.items()},
+        "missing": int(len(series) - counts.sum()),
+    }
+
+
+def numeric_summary(df: pd.DataFrame, columns: list[str]) -> dict:
+    """
+    Count, mean, standard deviation and quantiles of numeric columns at once.
+
+    The columns are fully sorted together in one np.sort call (NaN sorts
+    last; O(n log n) per column, not a single pass), and every quantile is
+    read from the sorted values by linear interpolation, as
+    Series.quantile() does.
+    """
+    values = np.sort(df[columns].to_numpy(dtype=np.float64), axis=0)
+    count = (~np.isnan(values)).sum(axis=0)
+    summary = {}
+    for j, col in enumerate(columns):
+        present = values[: count[j], j]
+        stats = {"count": int(count[j]), "missing": int(len(values) - count[j])}
+        if len(present):
+            positions = np.array(list(QUANTILES.values())) * (len(present) - 1)
+            lower = np.floor(positions).astype(int)
+            upper = np.minimum(lower + 1, len(present) - 1)
+            quantiles = present[lower] + (present[upper] - present[lower]) * (
+                positions - lower
+            )
+            stats.update(mean=float(present.mean()), std=float(present.std()))
+            stats.update(zip(QUANTILES, quantiles.tolist(), strict=True))
+        summary[col] = stats
+    return summary
+
+
+def profile_data(df: pd.DataFrame) -> dict:
+    """
+    Profile the cleaned training data.
+
+    Args:
+        df: Cleaned survey with the categorical features, YearsCode, WorkExp
+            and the salary label
+
+    Returns:
+        JSON-serializable dict with the row count, per-category frequencies
+        of each categorical feature and numeric summaries
+    """
+    return {
+        "rows": len(df),
+        "categorical": {
+            col: category_frequencies(df[col]) for col in CATEGORICAL_FEATURES
+        },
+        "numeric": numeric_summary(df, NUMERIC_COLUMNS),
+    }
+
+
+def format_profile(profile: dict, top: int = 10) -> str:
+    """Human-readable profile: top categories per feature and numeric summaries."""
+    rows = profile["rows"]
+    lines = [f"Training data profile ({rows:,} rows)"]
+    for col, frequencies in profile["categorical"].items():
+        counts = frequencies["counts"]
+        lines.append(f"\n{col} ({len(counts)} values, top {min(top, len(counts))}):")
+        for value, count in list(counts.items())[:top]:
+            lines.append(f"  {value:45s} {count:8,d} ({count / rows * 100:5.1f}%)")
+        if frequencies["missing"]:
+            lines.append(f"  {'(missing)':45s} {frequencies['missing']:8,d}")
+
+    lines.append(
+        f"\n{'column':20s} {'mean':>10s} {'std':>10s}"
+        + "".join(f" {name:>10s}" for name in QUANTILES)
+    )
+    for col, stats in profile["numeric"].items():
+        lines.append(
+            f"{col:20s}"
+            + "".join(
+                f" {stats.get(name, float('nan')):10.1f}"
+                for name in ["mean", "std", *QUANTILES]
+            )
+        )
+    return "\n".join(lines)
+
+
+def profile_path(model_path: Path) -> Path:
+    """Profile file next to a saved model (model.pkl -> model.profile.json)."""
+    model_path = Path(model_path)
+    return model_path.with_name(f"{model_path.stem}.profile.json")
+
+
+def write_profile(profile: dict, path: Path) -> None:
+    """Write a profile as indented JSON, creating the directory if needed."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(profile, f, indent=2)
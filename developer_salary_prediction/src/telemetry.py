@@ -0,0 +1,315 @@
+"""Training telemetry: per-round timing and a JSON run report.
+
+RoundTimer is an XGBoost callback that records the wall time of every
+boosting round (including evaluation on the early-stopping set). Its summary
+gives seconds per round, rounds per second and the time until early stopping
+and until the best iteration. CV folds and the final fit attach it, and
+src.train combines those numbers with the stage timings and peak memory from
+the pipeline manifest, the dataset size, thread counts and the machine into
+one report, written next to the model as <model>.report.json.
+
+Reports from different machines or configurations can be printed side by
+side:
+
+Usage:
+    uv run python -m src.telemetry models/model.report.json
+    uv run python -m src.telemetry laptop.report.json server.report.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+import numpy as np
+import xgboost as xgb
+
+
+def _throughput(rounds: int, seconds: float) -> dict:
+    return {
+        "seconds_per_round": round(seconds / rounds, 6) if rounds else None,
+        "rounds_per_second": round(rounds / seconds, 1) if seconds else None,
+    }
+
+
+class RoundTimer(xgb.callback.TrainingCallback):
+    """Record the wall time of every boosting round."""
+
+    def __init__(self):
+        super().__init__()
+        self.round_seconds = []
+        self._last = None
+
+    def before_training(self, model):
+        self._last = time.perf_counter()
+        return model
+
+    def after_iteration(self, model, epoch, evals_log) -> bool:
+        now = time.perf_counter()
+        self.round_seconds.append(now - self._last)
+        self._last = now
+        return False
+
+    def summary(
+        self, best_iteration: int | None = None, max_rounds: int | None = None
+    ) -> dict:
+        """
+        Timing of the finished training run.
+
+        Args:
+            best_iteration: Trees up to the best iteration (1-based), for
+                            the time it took to reach it
+            max_rounds: Round limit, to tell whether early stopping ended
+                        training
+
+        Returns:
+            Dict with rounds, seconds, seconds_per_round, rounds_per_second,
+            and seconds_to_best / stopped_early when the arguments are given
+        """
+        rounds = len(self.round_seconds)
+        seconds = float(np.sum(self.round_seconds))
+        summary = {
+            "rounds": rounds,
+            "seconds": round(seconds, 3),
+            **_throughput(rounds, seconds),
+        }
+        if best_iteration is not None:
+            summary["best_iteration"] = best_iteration
+            summary["seconds_to_best"] = round(
+                float(np.sum(self.round_seconds[:best_iteration])), 3
+            )
+        if max_rounds is not None:
+            summary["stopped_early"] = rounds < max_rounds
+        return summary
+
+
+def machine_info() -> dict:
+    """Platform, core count and library versions of this machine."""
+    return {
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "xgboost": xgb.__version__,
+    }
+
+
+def build_run_report(
+    config: dict,
+    manifest: dict,
+    cv_results: dict,
+    final_strategy: dict,
+    n_features: int,
+    compression: dict | None = None,
+    compaction: dict | None = None,
+) -> dict:
+    """
+    Combine stage metrics and training telemetry into one report.
+
+    Args:
+        config: Full model_parameters.yaml configuration of the run
+        manifest: Manifest returned by run_pipeline()
+        cv_results: Output of run_cross_validation()
+        final_strategy: How the final model was built (train.fit_final_model)
+        n_features: Columns of the model input
+        compression: Duplicate-row compression summary (train stage
+                     "compress"), when it was enabled
+        compaction: Size and predict timings of the saved compact model
+                    (model.compare_compact_model())
+
+    Returns:
+        JSON-serializable dict
+    """
+    stages = {
+        name: {
+            "seconds": manifest["stages"][name]["seconds"],
+            "peak_rss_mb": manifest["stages"][name]["peak_rss_mb"],
+        }
+        for name in manifest["order"]
+        if name in manifest["stages"]
+    }
+    folds = [
+        {
+            "train_rows": fold["train_rows"],
+            "train_matrix_rows": fold["train_matrix_rows"],
+            "test_rows": fold["test_rows"],
+            "test_r2": round(fold["test_r2"], 4),
+            "setup_seconds": round(fold["setup_seconds"], 3),
+            **fold["training"],
+        }
+        for fold in cv_results["folds"]
+    ]
+    cv_rounds = sum(fold["rounds"] for fold in folds)
+    cv_seconds = sum(fold["seconds"] for fold in folds)
+    report = {
+        "created": datetime.now(UTC).isoformat(timespec="seconds"),
+        "config_digest": manifest["config_digest"],
+        "machine": machine_info(),
+        "model": config["model"],
+        "data": {
+            "rows": len(cv_results["oof_predictions"]),
+            "features": n_features,
+            "encoding": config["features"]["encoding"].get("method", "onehot"),
+        },
+        "stages": stages,
+        "total_seconds": round(sum(s["seconds"] for s in stages.values()), 3),
+        "peak_rss_mb": max(s["peak_rss_mb"] for s in stages.values()),
+        "cv": {
+            "workers": cv_results["workers"],
+            "threads_per_fold": cv_results["n_jobs_per_fold"],
+            "wall_seconds": round(cv_results["wall_seconds"], 3),
+            "mean_test_r2": round(float(np.mean([f["test_r2"] for f in folds])), 4),
+            "rounds": cv_rounds,
+            **_throughput(cv_rounds, cv_seconds),
+            "folds": folds,
+        },
+        "final_fit": final_strategy,
+    }
+    if compression and compression["enabled"]:
+        report["compression"] = compression
+    if compaction:
+        report["artifact"] = compaction
+    return report
+
+
+def report_path(model_path: Path) -> Path:
+    """Run report file next to a saved model (model.pkl -> model.report.json)."""
+    model_path = Path(model_path)
+    return model_path.with_name(f"{model_path.stem}.report.json")
+
+
+def write_run_report(report: dict, path: Path) -> None:
+    """Write a run report as indented JSON, creating the directory if needed."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def format_run_report(report: dict) -> str:
+    """Human-readable summary of one run report."""
+    machine, data, cv = report["machine"], report["data"], report["cv"]
+    lines = [f"Run {report['created']} (config {report['config_digest']})"]
+    lines.append(
+        f"Machine: {machine['platform']}, {machine['cpu_count']} CPU(s), "
+        f"Python {machine['python']}, XGBoost {machine['xgboost']}"
+    )
+    lines.append(
+        f"Data: {data['rows']:,} rows x {data['features']} features "
+        f"({data['encoding']})"
+    )
+    if "compression" in report:
+        compression = report["compression"]
+        lines.append(
+            f"Duplicate rows collapsed: {compression['unique_rows']:,} distinct "
+            f"({compression['ratio']:.2f}x compression)"
+        )
+        if "check" in compression:
+            check = compression["check"]
+            lines.append(
+                f"  {check['rounds']}-round check: {check['speedup']:.2f}x faster, "
+                f"max relative difference {check['max_relative_difference']:.1e}"
+            )
+    lines.append("")
+
+    lines.append(f"{'stage':12s} {'seconds':>9s} {'peak RSS MB':>12s}")
+    for name, stage in report["stages"].items():
+        lines.append(f"{name:12s} {stage['seconds']:9.2f} {stage['peak_rss_mb']:12.0f}")
+    lines.append(
+        f"{'total':12s} {report['total_seconds']:9.2f} {report['peak_rss_mb']:12.0f}\n"
+    )
+
+    lines.append(
+        f"CV: {len(cv['folds'])} folds, {cv['workers']} worker(s) x "
+        f"{cv['threads_per_fold']} thread(s), {cv['wall_seconds']:.1f}s wall, "
+        f"mean test R2 {cv['mean_test_r2']:.4f}"
+    )
+    lines.append(
+        f"{'fold':>4s} {'train rows':>10s} {'rounds':>6s} {'best':>6s} "
+        f"{'seconds':>8s} {'ms/round':>9s} {'rounds/s':>9s} {'to best':>8s}"
+    )
+    for i, fold in enumerate(cv["folds"], 1):
+        lines.append(
+            f"{i:4d} {fold['train_rows']:10,d} {fold['rounds']:6d} "
+            f"{fold['best_iteration']:6d} {fold['seconds']:8.2f} "
+            f"{fold['seconds_per_round'] * 1000:9.2f} "
+            f"{fold['rounds_per_second']:9.1f} {fold['seconds_to_best']:8.2f}"
+        )
+
+    final = report["final_fit"]
+    lines.append(
+        f"\nFinal model ({final['strategy']}): {final['trees']} trees "
+        f"in {final['seconds']:.2f}s"
+    )
+    if "training" in final:
+        training = final["training"]
+        lines.append(
+            f"  {training['rounds']} rounds, "
+            f"{training['seconds_per_round'] * 1000:.2f} ms/round, "
+            f"{training['rounds_per_second']:.1f} rounds/s, "
+            f"{final['threads']} thread(s)"
+        )
+    if "artifact" in report:
+        artifact = report["artifact"]
+        lines.append(
+            f"Saved model: {artifact['pruned_trees']} trees, "
+            f"{artifact['compact_bytes'] / 1024:.0f} KB "
+            f"(unpruned wrapper {artifact['bytes'] / 1024:.0f} KB); "
+            f"1-row predict {artifact['compact_row_seconds'] * 1000:.2f} ms "
+            f"(was {artifact['row_seconds'] * 1000:.2f} ms)"
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(reports: dict[str, dict]) -> str:
+    """Key metrics of several run reports side by side (label -> report)."""
+    rows = [
+        ("machine", lambda r: r["machine"]["machine"]),
+        ("CPUs", lambda r: r["machine"]["cpu_count"]),
+        ("XGBoost", lambda r: r["machine"]["xgboost"]),
+        ("rows", lambda r: f"{r['data']['rows']:,}"),
+        ("features", lambda r: r["data"]["features"]),
+        ("config", lambda r: r["config_digest"]),
+        ("threads/fold", lambda r: r["cv"]["threads_per_fold"]),
+        ("total s", lambda r: f"{r['total_seconds']:.1f}"),
+        ("cv s", lambda r: f"{r['cv']['wall_seconds']:.1f}"),
+        ("cv ms/round", lambda r: f"{r['cv']['seconds_per_round'] * 1000:.2f}"),
+        ("cv rounds/s", lambda r: f"{r['cv']['rounds_per_second']:.1f}"),
+        ("final fit", lambda r: r["final_fit"]["strategy"]),
+        ("final s", lambda r: f"{r['final_fit']['seconds']:.1f}"),
+        ("peak RSS MB", lambda r: f"{r['peak_rss_mb']:.0f}"),
+        ("CV R2", lambda r: f"{r['cv']['mean_test_r2']:.4f}"),
+    ]
+    width = max(16, *(len(label) for label in reports))
+    lines = [f"{'':14s}" + "".join(f" {label:>{width}s}" for label in reports)]
+    for name, value in rows:
+        lines.append(
+            f"{name:14s}"
+            + "".join(f" {value(report)!s:>{width}s}" for report in reports.values())
+        )
+    return "\n".join(lines)
+
+
+def main():
+    """Print one run report, or compare several."""
+    parser = argparse.ArgumentParser(description="Summarize training run reports")
+    parser.add_argument(
+        "reports", type=Path, nargs="+", help="<model>.report.json files"
+    )
+    args = parser.parse_args()
+
+    reports = {}
+    for path in args.reports:
+        with open(path, "r") as f:
+            reports[str(path)] = json.load(f)
+    if len(reports) == 1:
+        print(format_run_report(next(iter(reports.values()))))
+    else:
+        print(format_comparison(reports))
+
+
+if __name__ == "__main__":
+    main()
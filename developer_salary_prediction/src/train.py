@@ -1,130 +1,97 @@
-"""Training script for salary prediction model."""
+"""Training script for salary prediction model.
 
+Training runs as named stages (see STAGES) through src.pipeline, which
+checkpoints each stage's outputs to a run directory and records its wall
+time and peak memory. A JSON run report with these and per-round training
+timings is written next to the model (see src.telemetry).
+
+Usage:
+    uv run python -m src.train                   # fresh run
+    uv run python -m src.train --resume          # skip completed stages
+    uv run python -m src.train --from-stage cv   # rerun cv and later stages
+    uv run python -m src.train --overlay config/tuned_parameters.yaml
+"""
+
+import argparse
 import pickle
+import sys
+import time
 from pathlib import Path
 
 import pandas as pd
 import numpy as np
+import xgboost as xgb
 import yaml
-from xgboost import XGBRegressor
-from sklearn.model_selection import KFold, train_test_split
-
-from src.preprocessing import prepare_features, reduce_cardinality
-
-
-def main():
-    """Train and save the salary prediction model."""
-    # Load configuration
-    print("Loading configuration...")
-    config_path = Path("config/model_parameters.yaml")
-    with open(config_path, "r") as f:
-        config = yaml.safe_load(f)
-
+from sklearn.model_selection import train_test_split
+
+from src.cache import load_cleaned_survey, survey_paths
+from src.cleaning import MAIN_LABEL
+from src.currency import derive_currency_rates
+from src.cv import plan_thread_budget, run_cross_validation
+from src.distill import distill
+from src.guardrails import category_metrics, oof_config_hash, oof_path, write_oof
+from src.ingest import YEAR_COLUMN
+from src.model import (
+    average_boosters,
+    booster_params,
+    build_reference_matrix,
+    collapsed_training_matrix,
+    compact_model,
+    compare_compact_model,
+    duplicate_groups,
+    evaluation_matrix,
+    fit_booster,
+    to_regressor,
+    training_matrix,
+)
+from src.pipeline import format_stage_summary, load_checkpoint, run_pipeline
+from src.preprocessing import prepare_features, prepare_features_native
+from src.profiling import format_profile, profile_data, profile_path, write_profile
+from src.telemetry import (
+    RoundTimer,
+    build_run_report,
+    format_run_report,
+    report_path,
+    write_run_report,
+)
+from src.tune import merge_config
+
+
+def load_data(config: dict) -> dict:
+    """Stage "load": read, filter and clean the survey (cached in data/cache/)."""
     print("Loading data...")
-    data_path = Path("data/survey_results_public.csv")
-
-    if not data_path.exists():
-        print(f"Error: Data file not found at {data_path}")
+    try:
+        data_paths = survey_paths(config)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
         print(
             "Please download the Stack Overflow Developer Survey CSV and place it in the data/ directory."
         )
         print("Download from: https://insights.stackoverflow.com/survey")
-        return
-
-    # Load only required columns to save memory
-    df = pd.read_csv(
-        data_path,
-        usecols=[
-            "Country",
-            "YearsCode",
-            "WorkExp",
-            "EdLevel",
-            "DevType",
-            "Industry",
-            "Age",
-            "ICorPM",
-            "Currency",
-            "CompTotal",
-            "ConvertedCompYearly",
-        ],
-    )
+        sys.exit(1)
 
-    print(f"Loaded {len(df):,} rows")
-
-    print("Removing null, extremely small and large reported salaries")
-    # select main label
-    main_label = "ConvertedCompYearly"
-    # select records with main label more than min_salary threshold
-    min_salary = config["data"]["min_salary"]
-    df = df[df[main_label] > min_salary]
-    # Exclude outliers based on percentile bounds PER COUNTRY
-    # This preserves records from lower-paid and higher-paid countries
-    # that would otherwise be removed by global percentile filtering
-    lower_pct = config["data"]["lower_percentile"] / 100
-    upper_pct = config["data"]["upper_percentile"] / 100
-    lower_bound = df.groupby("Country")[main_label].transform("quantile", lower_pct)
-    upper_bound = df.groupby("Country")[main_label].transform("quantile", upper_pct)
-    df = df[(df[main_label] > lower_bound) & (df[main_label] < upper_bound)]
-
-    print(df.shape)
-
-    # Drop rows with missing target
-    df = df.dropna(subset=[main_label])
-    print(f"After removing missing targets: {len(df):,} rows")
-
-    # Apply preprocessing first to get cardinality-reduced categories
-    df_copy = df.copy()
-
-    # Normalize Unicode apostrophes to regular apostrophes for consistency
-    df_copy["Country"] = df_copy["Country"].str.replace("\u2019", "'", regex=False)
-    df_copy["EdLevel"] = df_copy["EdLevel"].str.replace("\u2019", "'", regex=False)
-    df_copy["DevType"] = df_copy["DevType"].str.replace("\u2019", "'", regex=False)
-    df_copy["Industry"] = df_copy["Industry"].str.replace("\u2019", "'", regex=False)
-    df_copy["Age"] = df_copy["Age"].str.replace("\u2019", "'", regex=False)
-    df_copy["ICorPM"] = df_copy["ICorPM"].str.replace("\u2019", "'", regex=False)
-
-    # Apply cardinality reduction
-    df_copy["Country"] = reduce_cardinality(df_copy["Country"])
-    df_copy["EdLevel"] = reduce_cardinality(df_copy["EdLevel"])
-    df_copy["DevType"] = reduce_cardinality(df_copy["DevType"])
-    df_copy["Industry"] = reduce_cardinality(df_copy["Industry"])
-    df_copy["Age"] = reduce_cardinality(df_copy["Age"])
-    df_copy["ICorPM"] = reduce_cardinality(df_copy["ICorPM"])
-
-    # Apply cardinality reduction to the actual training data as well
-    # (prepare_features no longer does this internally)
-    df["Country"] = reduce_cardinality(df["Country"])
-    df["EdLevel"] = reduce_cardinality(df["EdLevel"])
-    df["DevType"] = reduce_cardinality(df["DevType"])
-    df["Industry"] = reduce_cardinality(df["Industry"])
-    df["Age"] = reduce_cardinality(df["Age"])
-    df["ICorPM"] = reduce_cardinality(df["ICorPM"])
-
-    # Drop rows with "Other" in specified features (low-quality catch-all categories)
-    other_name = config["features"]["cardinality"].get("other_category", "Other")
-    drop_other_from = config["features"]["cardinality"].get("drop_other_from", [])
-    if drop_other_from:
-        before_drop = len(df)
-        for col in drop_other_from:
-            df = df[df[col] != other_name]
-            df_copy = df_copy[df_copy[col] != other_name]
-        print(
-            f"Dropped {before_drop - len(df):,} rows with '{other_name}' in {drop_other_from}"
-        )
-        print(f"After dropping 'Other': {len(df):,} rows")
+    # Filtering, outlier trimming and cardinality reduction are cached in
+    # data/cache/ and only redone when the CSVs or their config changes
+    df = load_cleaned_survey(
+        config, data_paths, use_cache=config["data"].get("use_cache", True)
+    )
+    if len(data_paths) > 1:
+        print("Rows per survey year:")
+        for year, count in df[YEAR_COLUMN].value_counts().sort_index().items():
+            print(f"  {year}: {count:,}")
+    return {"df": df}
 
-    # Now apply full feature transformations for model training
-    X = prepare_features(df)
-    y = df[main_label]
 
+def save_valid_categories(config: dict, df: pd.DataFrame) -> dict:
+    """Stage "categories": write config/valid_categories.yaml."""
     # Save valid categories after cardinality reduction for validation during inference
     # Extract unique values from the reduced dataframe
-    country_values = df_copy["Country"].dropna().unique().tolist()
-    edlevel_values = df_copy["EdLevel"].dropna().unique().tolist()
-    devtype_values = df_copy["DevType"].dropna().unique().tolist()
-    industry_values = df_copy["Industry"].dropna().unique().tolist()
-    age_values = df_copy["Age"].dropna().unique().tolist()
-    icorpm_values = df_copy["ICorPM"].dropna().unique().tolist()
+    country_values = df["Country"].dropna().unique().tolist()
+    edlevel_values = df["EdLevel"].dropna().unique().tolist()
+    devtype_values = df["DevType"].dropna().unique().tolist()
+    industry_values = df["Industry"].dropna().unique().tolist()
+    age_values = df["Age"].dropna().unique().tolist()
+    icorpm_values = df["ICorPM"].dropna().unique().tolist()
 
     valid_categories = {
         "Country": sorted(country_values),
@@ -142,43 +109,34 @@ def main():
     print(
         f"\nSaved {len(valid_categories['Country'])} valid countries, {len(valid_categories['EdLevel'])} valid education levels, {len(valid_categories['DevType'])} valid developer types, {len(valid_categories['Industry'])} valid industries, {len(valid_categories['Age'])} valid age ranges, and {len(valid_categories['ICorPM'])} valid IC/PM values to {valid_categories_path}"
     )
+    return {"valid_categories": valid_categories}
+
 
+def encode_features(config: dict, df: pd.DataFrame, valid_categories: dict) -> dict:
+    """Stage "encode": build the feature matrix X and target y."""
+    # Now apply full feature transformations for model training
+    # "native" keeps 8 pandas categorical columns (codes fixed by the valid
+    # category lists) instead of ~90 one-hot columns
+    encoding = config["features"]["encoding"].get("method", "onehot")
+    print(f"Categorical encoding: {encoding}")
+    if encoding == "native":
+        X = prepare_features_native(df, valid_categories)
+    else:
+        X = prepare_features(df)
+    y = df[MAIN_LABEL]
+    return {"X": X, "y": y}
+
+
+def compute_currency_rates(
+    config: dict, df: pd.DataFrame, valid_categories: dict
+) -> dict:
+    """Stage "currency": write config/currency_rates.yaml."""
     # Compute currency conversion rates per country
     # Use the original data with Currency and CompTotal columns
     print("\nComputing currency conversion rates per country...")
-    currency_df = df[["Country", "Currency", "CompTotal", main_label]].dropna()
-    # Extract 3-letter currency code from values like "EUR European Euro"
-    currency_df = currency_df.copy()
-    currency_df["CurrencyCode"] = currency_df["Currency"].str.split(r"\s+", n=1).str[0]
-    currency_df["CurrencyName"] = currency_df["Currency"].str.split(r"\s+", n=1).str[1]
-    # Compute conversion rate: local currency / USD
-    currency_df["rate"] = currency_df["CompTotal"] / currency_df[main_label]
-    # Filter out unreasonable rates (negative, zero, or extreme)
-    currency_df = currency_df[
-        (currency_df["rate"] > 0.001) & (currency_df["rate"] < 100000)
-    ]
-
-    currency_rates = {}
-    for country in valid_categories["Country"]:
-        country_data = currency_df[currency_df["Country"] == country]
-        if country_data.empty:
-            continue
-        # Find the most common currency for this country
-        most_common = country_data["CurrencyCode"].mode()
-        if most_common.empty:
-            continue
-        code = most_common.iloc[0]
-        # Get the full name from the first matching record
-        name_row = country_data[country_data["CurrencyCode"] == code].iloc[0]
-        full_name = name_row["CurrencyName"]
-        # Compute median conversion rate for this country+currency pair
-        rates = country_data[country_data["CurrencyCode"] == code]["rate"]
-        median_rate = round(float(rates.median()), 2)
-        currency_rates[country] = {
-            "code": code,
-            "name": full_name,
-            "rate": median_rate,
-        }
+    start = time.perf_counter()
+    currency_rates = derive_currency_rates(df, valid_categories["Country"])
+    currency_seconds = time.perf_counter() - start
 
     currency_rates_path = Path("config/currency_rates.yaml")
     with open(currency_rates_path, "w") as f:
@@ -191,209 +149,156 @@ def main():
         )
 
     print(
-        f"Saved currency rates for {len(currency_rates)} countries to {currency_rates_path}"
+        f"Saved currency rates for {len(currency_rates)} countries to {currency_rates_path} "
+        f"({currency_seconds:.2f}s)"
     )
     for country, info in sorted(currency_rates.items()):
         print(
             f"  {country:45s} -> {info['code']} ({info['name']}, rate: {info['rate']})"
         )
+    return {"currency_rates": currency_rates}
 
-    print(f"\nFeature matrix shape: {X.shape}")
-    print(f"Total features: {X.shape[1]}")
-
-    # Display feature information for debugging and inference comparison
-    print("\n" + "=" * 60)
-    print("FEATURE ANALYSIS (for comparing with inference)")
-    print("=" * 60)
-
-    # Show top countries in the dataset
-    print("\n📍 Top 10 Countries:")
-    top_countries = df["Country"].value_counts().head(10)
-    for country, count in top_countries.items():
-        print(f"  - {country}: {count:,} ({count / len(df) * 100:.1f}%)")
-
-    # Show top education levels
-    print("\n🎓 Top Education Levels:")
-    top_edu = df["EdLevel"].value_counts().head(10)
-    for edu, count in top_edu.items():
-        print(f"  - {edu}: {count:,} ({count / len(df) * 100:.1f}%)")
-
-    # Show top developer types
-    print("\n👨‍💻 Top Developer Types:")
-    top_devtype = df["DevType"].value_counts().head(10)
-    for devtype, count in top_devtype.items():
-        print(f"  - {devtype}: {count:,} ({count / len(df) * 100:.1f}%)")
-
-    # Show top industries
-    print("\n🏢 Top Industries:")
-    top_industry = df["Industry"].value_counts().head(10)
-    for industry, count in top_industry.items():
-        print(f"  - {industry}: {count:,} ({count / len(df) * 100:.1f}%)")
-
-    # Show age distribution
-    print("\n🎂 Age Distribution:")
-    top_age = df["Age"].value_counts().head(10)
-    for age, count in top_age.items():
-        print(f"  - {age}: {count:,} ({count / len(df) * 100:.1f}%)")
-
-    # Show IC or PM distribution
-    print("\n👥 IC or PM Distribution:")
-    top_icorpm = df["ICorPM"].value_counts().head(10)
-    for icorpm, count in top_icorpm.items():
-        print(f"  - {icorpm}: {count:,} ({count / len(df) * 100:.1f}%)")
-
-    # Show YearsCode statistics
-    print("\n💼 Years of Coding Experience:")
-    print(f"  - Min: {df['YearsCode'].min():.1f}")
-    print(f"  - Max: {df['YearsCode'].max():.1f}")
-    print(f"  - Mean: {df['YearsCode'].mean():.1f}")
-    print(f"  - Median: {df['YearsCode'].median():.1f}")
-    print(f"  - 25th percentile: {df['YearsCode'].quantile(0.25):.1f}")
-    print(f"  - 75th percentile: {df['YearsCode'].quantile(0.75):.1f}")
-
-    # Show WorkExp statistics
-    print("\n💼 Years of Professional Work Experience:")
-    print(f"  - Min: {df['WorkExp'].min():.1f}")
-    print(f"  - Max: {df['WorkExp'].max():.1f}")
-    print(f"  - Mean: {df['WorkExp'].mean():.1f}")
-    print(f"  - Median: {df['WorkExp'].median():.1f}")
-    print(f"  - 25th percentile: {df['WorkExp'].quantile(0.25):.1f}")
-    print(f"  - 75th percentile: {df['WorkExp'].quantile(0.75):.1f}")
-
-    # Show most common one-hot encoded features (by frequency)
-    # Separate analysis for each categorical feature
-
-    # Calculate feature frequencies (sum of each column for one-hot encoded)
-    feature_counts = X.sum().sort_values(ascending=False)
-
-    # Exclude numeric features (YearsCode)
-    categorical_features = feature_counts[
-        ~feature_counts.index.str.startswith("YearsCode")
-    ]
-
-    # Country features
-    print("\n🌍 Top 15 Country Features (most common):")
-    country_features = categorical_features[
-        categorical_features.index.str.startswith("Country_")
-    ]
-    for i, (feature, count) in enumerate(country_features.head(15).items(), 1):
-        percentage = (count / len(X)) * 100
-        country_name = feature.replace("Country_", "")
-        print(
-            f"  {i:2d}. {country_name:45s} - {count:6.0f} occurrences ({percentage:5.1f}%)"
-        )
-
-    # Education level features
-    print("\n🎓 Top 10 Education Level Features (most common):")
-    edlevel_features = categorical_features[
-        categorical_features.index.str.startswith("EdLevel_")
-    ]
-    for i, (feature, count) in enumerate(edlevel_features.head(10).items(), 1):
-        percentage = (count / len(X)) * 100
-        edu_name = feature.replace("EdLevel_", "")
-        print(
-            f"  {i:2d}. {edu_name:45s} - {count:6.0f} occurrences ({percentage:5.1f}%)"
-        )
 
-    # Developer type features
-    print("\n👨‍💻 Top 10 Developer Type Features (most common):")
-    devtype_features = categorical_features[
-        categorical_features.index.str.startswith("DevType_")
-    ]
-    for i, (feature, count) in enumerate(devtype_features.head(10).items(), 1):
-        percentage = (count / len(X)) * 100
-        devtype_name = feature.replace("DevType_", "")
-        print(
-            f"  {i:2d}. {devtype_name:45s} - {count:6.0f} occurrences ({percentage:5.1f}%)"
-        )
+def profile_training_data(config: dict, df: pd.DataFrame, X: pd.DataFrame) -> dict:
+    """Stage "profile": category frequencies and numeric summaries of the data."""
+    print(f"\nFeature matrix shape: {X.shape}")
 
-    # Industry features
-    print("\n🏢 Top 10 Industry Features (most common):")
-    industry_features = categorical_features[
-        categorical_features.index.str.startswith("Industry_")
-    ]
-    for i, (feature, count) in enumerate(industry_features.head(10).items(), 1):
-        percentage = (count / len(X)) * 100
-        industry_name = feature.replace("Industry_", "")
-        print(
-            f"  {i:2d}. {industry_name:45s} - {count:6.0f} occurrences ({percentage:5.1f}%)"
-        )
+    # One pass per column; saved with the model as a drift baseline
+    start = time.perf_counter()
+    profile = profile_data(df)
+    print(f"Profiled {len(df):,} rows in {time.perf_counter() - start:.2f}s")
+    if config["training"].get("print_profile", False):
+        print("\n" + format_profile(profile))
+    return {"profile": profile}
+
+
+def quantize(config: dict, X: pd.DataFrame, y: pd.Series) -> dict:
+    """Stage "quantize": sketch histogram bin cuts once (not checkpointed)."""
+    encoding = config["features"]["encoding"].get("method", "onehot")
+    # Quantize once; CV folds and the final fit bin their rows with these cuts
+    start = time.perf_counter()
+    reference = build_reference_matrix(X, y, encoding)
+    print(
+        f"Quantized {len(X):,} rows in {time.perf_counter() - start:.2f}s; "
+        "CV folds and the final fit reuse the bin cuts"
+    )
+    return {"reference": reference}
+
+
+def compress_duplicates(
+    config: dict, X: pd.DataFrame, y: pd.Series, reference: object
+) -> dict:
+    """
+    Stage "compress": collapse rows with identical features (compression.enabled).
+
+    CV folds and the final fit then train on one row per distinct feature
+    vector, labelled with the mean salary and weighted by the row count.
+    Before that, compression.check_rounds rounds are fitted on all rows with
+    and without collapsing; if their predictions differ by more than
+    compression.tolerance (relative), compression is turned off for the run.
+    """
+    settings = config.get("compression", {})
+    if not settings.get("enabled", False):
+        return {"compression": {"enabled": False}, "groups": None}
+    encoding = config["features"]["encoding"].get("method", "onehot")
+
+    start = time.perf_counter()
+    groups = duplicate_groups(X)
+    unique_rows = int(groups.max()) + 1
+    compression = {
+        "enabled": True,
+        "rows": len(X),
+        "unique_rows": unique_rows,
+        "ratio": round(len(X) / unique_rows, 3),
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+    print(
+        f"Duplicate feature vectors: {len(X):,} rows -> {unique_rows:,} distinct "
+        f"({compression['ratio']:.2f}x compression, {compression['seconds']:.2f}s)"
+    )
 
-    # Age features
-    print("\n🎂 Top 10 Age Features (most common):")
-    age_features = categorical_features[
-        categorical_features.index.str.startswith("Age_")
-    ]
-    for i, (feature, count) in enumerate(age_features.head(10).items(), 1):
-        percentage = (count / len(X)) * 100
-        age_name = feature.replace("Age_", "")
-        print(
-            f"  {i:2d}. {age_name:45s} - {count:6.0f} occurrences ({percentage:5.1f}%)"
+    rounds = settings.get("check_rounds", 0)
+    if rounds:
+        params = booster_params(config["model"])
+        start = time.perf_counter()
+        full = xgb.train(params, reference, num_boost_round=rounds)
+        full_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        dcollapsed, order = collapsed_training_matrix(
+            X, y, np.arange(len(X)), groups, reference, encoding
         )
-
-    # ICorPM features
-    print("\n👥 Top 10 IC/PM Features (most common):")
-    icorpm_features = categorical_features[
-        categorical_features.index.str.startswith("ICorPM_")
-    ]
-    for i, (feature, count) in enumerate(icorpm_features.head(10).items(), 1):
-        percentage = (count / len(X)) * 100
-        icorpm_name = feature.replace("ICorPM_", "")
+        collapsed = xgb.train(params, dcollapsed, num_boost_round=rounds)
+        collapsed_seconds = time.perf_counter() - start
+
+        expected = full.predict(reference)
+        difference = np.abs(collapsed.predict(dcollapsed)[order] - expected)
+        max_relative = float(np.max(difference / np.maximum(np.abs(expected), 1.0)))
+        compression["check"] = {
+            "rounds": rounds,
+            "full_seconds": round(full_seconds, 3),
+            "collapsed_seconds": round(collapsed_seconds, 3),
+            "speedup": round(full_seconds / collapsed_seconds, 2),
+            "max_relative_difference": max_relative,
+        }
         print(
-            f"  {i:2d}. {icorpm_name:45s} - {count:6.0f} occurrences ({percentage:5.1f}%)"
+            f"{rounds}-round check: {full_seconds:.2f}s on all rows, "
+            f"{collapsed_seconds:.2f}s collapsed "
+            f"({compression['check']['speedup']:.2f}x faster); "
+            f"max relative prediction difference {max_relative:.2e}"
         )
-
-    print(f"\n📊 Total one-hot encoded features: {len(X.columns)}")
-    print("   - Numeric: 2 (YearsCode, WorkExp)")
-    print(f"   - Country: {len(country_features)}")
-    print(f"   - Education: {len(edlevel_features)}")
-    print(f"   - DevType: {len(devtype_features)}")
-    print(f"   - Industry: {len(industry_features)}")
-    print(f"   - Age: {len(age_features)}")
-    print(f"   - ICorPM: {len(icorpm_features)}")
-
-    print("=" * 60 + "\n")
-
-    # Cross-validation for robust evaluation
+        if max_relative > settings["tolerance"]:
+            print(
+                f"Warning: predictions differ by more than {settings['tolerance']}; "
+                "training on uncompressed rows"
+            )
+            compression["enabled"] = False
+            return {"compression": compression, "groups": None}
+    return {"compression": compression, "groups": groups}
+
+
+def cross_validate(
+    config: dict,
+    X: pd.DataFrame,
+    y: pd.Series,
+    reference: object,
+    groups: np.ndarray | None,
+) -> dict:
+    """Stage "cv": k-fold cross-validation for robust evaluation."""
+    encoding = config["features"]["encoding"].get("method", "onehot")
     n_splits = config["data"].get("cv_splits", 5)
-    random_state = config["data"]["random_state"]
-    model_config = config["model"]
+
+    # The fold models are only kept when they become the final model
+    keep_models = config["training"].get("final_model") == "fold_ensemble"
 
     print(f"Running {n_splits}-fold cross-validation...")
-    kf = KFold(n_splits=n_splits, shuffle=True, random_state=random_state)
-
-    train_scores = []
-    test_scores = []
-    best_iterations = []
-
-    for fold, (train_idx, test_idx) in enumerate(kf.split(X), 1):
-        X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
-        y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
-
-        model = XGBRegressor(
-            n_estimators=model_config["n_estimators"],
-            learning_rate=model_config["learning_rate"],
-            max_depth=model_config["max_depth"],
-            min_child_weight=model_config["min_child_weight"],
-            random_state=model_config["random_state"],
-            n_jobs=model_config["n_jobs"],
-            early_stopping_rounds=model_config["early_stopping_rounds"],
-        )
-        model.fit(
-            X_train,
-            y_train,
-            eval_set=[(X_test, y_test)],
-            verbose=False,
+    cv_results = run_cross_validation(
+        X,
+        y,
+        config,
+        encoding,
+        reference=reference,
+        keep_models=keep_models,
+        groups=groups,
+    )
+    train_scores = [fold["train_r2"] for fold in cv_results["folds"]]
+    test_scores = [fold["test_r2"] for fold in cv_results["folds"]]
+    best_iterations = [fold["best_iteration"] for fold in cv_results["folds"]]
+    for fold, result in enumerate(cv_results["folds"], 1):
+        print(
+            f"  Fold {fold}: Train R2 = {result['train_r2']:.4f}, Test R2 = {result['test_r2']:.4f} (best iter: {result['best_iteration']})"
         )
 
-        train_r2 = model.score(X_train, y_train)
-        test_r2 = model.score(X_test, y_test)
-        train_scores.append(train_r2)
-        test_scores.append(test_r2)
-        best_iterations.append(model.best_iteration + 1)
+    fold_seconds = sum(fold["seconds"] for fold in cv_results["folds"])
+    print(
+        f"CV wall-clock: {cv_results['wall_seconds']:.1f}s with {cv_results['workers']} worker(s) x {cv_results['n_jobs_per_fold']} thread(s)"
+    )
+    if cv_results["workers"] > 1:
         print(
-            f"  Fold {fold}: Train R2 = {train_r2:.4f}, Test R2 = {test_r2:.4f} (best iter: {model.best_iteration + 1})"
+            f"  Fold fit times add up to {fold_seconds:.1f}s; for the speedup over "
+            "sequential folds, run benchmarks/parallel_cv.py"
         )
+    fold_setup = sum(fold["setup_seconds"] for fold in cv_results["folds"])
+    print(f"Data setup: {fold_setup:.2f}s binning fold matrices")
 
     avg_train = np.mean(train_scores)
     avg_test = np.mean(test_scores)
@@ -402,44 +307,353 @@ def main():
     print(f"\nCV Average Train R2: {avg_train:.4f}")
     print(f"CV Average Test R2:  {avg_test:.4f} (+/- {std_test:.4f})")
     print(f"CV Average best iteration: {avg_best_iter}")
+    return {"cv_results": cv_results}
+
+
+def fit_final_model(
+    config: dict,
+    X: pd.DataFrame,
+    y: pd.Series,
+    reference: object,
+    cv_results: dict,
+    groups: np.ndarray | None,
+) -> dict:
+    """
+    Stage "final_fit": build the deployed model (training.final_model).
+
+    "retrain" fits a new model with early stopping on a 10% split,
+    "fold_ensemble" averages the CV fold models into one booster without
+    any further training, and "refit" trains on all rows for the mean CV
+    best iteration, with no early-stopping split. The fits train on
+    collapsed duplicate rows when the compress stage enabled it.
+    """
+    encoding = config["features"]["encoding"].get("method", "onehot")
+    model_config = config["model"]
+    random_state = config["data"]["random_state"]
+    strategy = config["training"].get("final_model", "retrain")
+    folds = cv_results["folds"]
+    timer = RoundTimer()
+
+    start = time.perf_counter()
+    if strategy == "fold_ensemble":
+        if "model" not in folds[0]:
+            raise ValueError(
+                "CV results have no fold models; rerun from the cv stage "
+                "with training.final_model: fold_ensemble"
+            )
+        print(f"\nAveraging the {len(folds)} CV fold models into the final model...")
+        booster = average_boosters(
+            [xgb.Booster(model_file=fold["model"]) for fold in folds]
+        )
+        details = {"fold_best_iterations": [fold["best_iteration"] for fold in folds]}
+    elif strategy == "refit":
+        rounds = int(np.mean([fold["best_iteration"] for fold in folds]))
+        print(f"\nRefitting on all {len(X):,} rows for {rounds} rounds (CV mean)...")
+        # The reference matrix already holds every row, binned
+        dtrain = reference
+        if groups is not None:
+            dtrain, _ = collapsed_training_matrix(
+                X, y, np.arange(len(X)), groups, reference, encoding
+            )
+        booster = xgb.train(
+            booster_params(model_config),
+            dtrain,
+            num_boost_round=rounds,
+            verbose_eval=config["training"]["verbose"],
+            callbacks=[timer],
+        )
+        booster.set_attr(best_iteration=str(rounds - 1))
+        details = {"rounds": rounds, "train_matrix_rows": dtrain.num_row()}
+    elif strategy == "retrain":
+        # Train final model on all data for deployment
+        # Use a small held-out split for early stopping only
+        print("\nTraining final model on full dataset...")
+        train_rows, es_rows = train_test_split(
+            np.arange(len(X)), test_size=0.1, random_state=random_state
+        )
 
-    # Train final model on all data for deployment
-    # Use a small held-out split for early stopping only
-    print("\nTraining final model on full dataset...")
-    X_train_final, X_es, y_train_final, y_es = train_test_split(
-        X, y, test_size=0.1, random_state=random_state
-    )
+        if groups is None:
+            dtrain = training_matrix(X, y, train_rows, reference, encoding)
+        else:
+            dtrain, _ = collapsed_training_matrix(
+                X, y, train_rows, groups, reference, encoding
+            )
+        booster = fit_booster(
+            model_config,
+            dtrain,
+            evaluation_matrix(X, y, es_rows, encoding),
+            verbose=config["training"]["verbose"],
+            callbacks=[timer],
+        )
+        details = {
+            "early_stopping_rows": len(es_rows),
+            "train_matrix_rows": dtrain.num_row(),
+        }
+    else:
+        raise ValueError(
+            f"Unknown training.final_model {strategy!r}; "
+            "use retrain, fold_ensemble or refit"
+        )
+    seconds = time.perf_counter() - start
 
-    final_model = XGBRegressor(
-        n_estimators=model_config["n_estimators"],
-        learning_rate=model_config["learning_rate"],
-        max_depth=model_config["max_depth"],
-        min_child_weight=model_config["min_child_weight"],
-        random_state=model_config["random_state"],
-        n_jobs=model_config["n_jobs"],
-        early_stopping_rounds=model_config["early_stopping_rounds"],
+    final_model = to_regressor(booster, model_config, encoding)
+    print(
+        f"Final model ({strategy}): {final_model.best_iteration + 1} trees "
+        f"in {seconds:.1f}s"
     )
-    final_model.fit(
-        X_train_final,
-        y_train_final,
-        eval_set=[(X_es, y_es)],
-        verbose=config["training"]["verbose"],
+    final_strategy = {
+        "strategy": strategy,
+        "trees": final_model.best_iteration + 1,
+        "seconds": round(seconds, 2),
+        **details,
+    }
+    if timer.round_seconds:
+        final_strategy["threads"] = plan_thread_budget(model_config, 1, 1)[1]
+        final_strategy["training"] = timer.summary(
+            booster.best_iteration + 1, model_config["n_estimators"]
+        )
+    return {"final_model": final_model, "final_strategy": final_strategy}
+
+
+def distill_fast_model(
+    config: dict,
+    df: pd.DataFrame,
+    X: pd.DataFrame,
+    valid_categories: dict,
+    final_model: object,
+) -> dict:
+    """Stage "distill": train a small student model (distillation.enabled)."""
+    if not config.get("distillation", {}).get("enabled", False):
+        return {"fast_model": None, "distillation": {"enabled": False}}
+
+    print("\nDistilling a fast student model from the final model...")
+    # Synthetic rows are encoded from the same category lists as X
+    fast_model, distillation = distill(
+        config, df, X, final_model.get_booster(), valid_categories
     )
-    print(f"Final model best iteration: {final_model.best_iteration + 1}")
+    if fast_model is None:
+        print("Student rejected by the accuracy gate (not saved):")
+        for failure in distillation["failures"]:
+            print(f"  - {failure}")
+    else:
+        print("Student passed the accuracy gate; saved as the fast path")
+    return {"fast_model": fast_model, "distillation": distillation}
+
+
+def save_model(
+    config: dict,
+    df: pd.DataFrame,
+    X: pd.DataFrame,
+    valid_categories: dict,
+    final_model: object,
+    final_strategy: dict,
+    profile: dict,
+    fast_model: bytes | None,
+    distillation: dict,
+    cv_results: dict,
+) -> dict:
+    """
+    Stage "save": pickle the model artifacts for inference.
+
+    The model is saved compact (model.compact_model()): only the trees up to
+    the best iteration, without training state or the sklearn wrapper. Its
+    predictions are checked to be bit-identical to the final model's first.
+    The CV out-of-fold predictions are saved next to it for
+    guardrail_evaluation.py (see src.guardrails), and their per-category
+    guardrail table goes into the artifacts as the baseline of src.monitor.
+    """
+    encoding = config["features"]["encoding"].get("method", "onehot")
 
     # Save model and feature columns for inference
     model_path = Path(config["training"]["model_path"])
     model_path.parent.mkdir(parents=True, exist_ok=True)
 
+    compact = compact_model(final_model.get_booster())
+    compaction = compare_compact_model(final_model, compact, X, encoding)
+    print(
+        f"Compact model: {compaction['pruned_trees']} of {compaction['trees']} trees, "
+        f"{compaction['compact_bytes'] / 1024:.0f} KB "
+        f"(was {compaction['bytes'] / 1024:.0f} KB); predictions bit-identical"
+    )
+    print(
+        f"  1-row predict {compaction['compact_row_seconds'] * 1000:.2f} ms "
+        f"(was {compaction['row_seconds'] * 1000:.2f} ms), "
+        f"{compaction['batch_rows']:,}-row predict "
+        f"{compaction['compact_batch_seconds'] * 1000:.1f} ms "
+        f"(was {compaction['batch_seconds'] * 1000:.1f} ms)"
+    )
+
     artifacts = {
-        "model": final_model,
+        "model": compact,
         "feature_columns": list(X.columns),
+        "encoding": encoding,
+        # How the final model was built (see fit_final_model)
+        "final_strategy": final_strategy,
+        # Training data distributions (see src.profiling)
+        "profile": profile,
+        "compaction": compaction,
+        # Student model and its accuracy gate (see src.distill)
+        "distillation": distillation,
+        # Per-category metrics of the CV out-of-fold predictions (src.monitor)
+        "guardrail_baseline": category_metrics(
+            df, df[MAIN_LABEL].to_numpy(), cv_results["oof_predictions"]
+        ).to_dict("records"),
     }
+    if fast_model is not None:
+        artifacts["fast_model"] = fast_model
+    if encoding == "native":
+        # Category order defines the codes the trees split on
+        artifacts["categories"] = valid_categories
 
     with open(model_path, "wb") as f:
         pickle.dump(artifacts, f)
 
+    write_profile(profile, profile_path(model_path))
+    write_oof(
+        oof_path(model_path),
+        X.index,
+        cv_results["oof_predictions"],
+        oof_config_hash(config),
+    )
     print(f"Model saved to {model_path}")
+    return {"compaction": compaction}
+
+
+# Training stages in execution order, with the values each one consumes and
+# produces. The quantized reference matrix cannot be pickled, so it is
+# rebuilt from X and y whenever a later stage needs it.
+STAGES = [
+    {"name": "load", "run": load_data, "inputs": [], "outputs": ["df"]},
+    {
+        "name": "categories",
+        "run": save_valid_categories,
+        "inputs": ["df"],
+        "outputs": ["valid_categories"],
+    },
+    {
+        "name": "encode",
+        "run": encode_features,
+        "inputs": ["df", "valid_categories"],
+        "outputs": ["X", "y"],
+    },
+    {
+        "name": "currency",
+        "run": compute_currency_rates,
+        "inputs": ["df", "valid_categories"],
+        "outputs": ["currency_rates"],
+    },
+    {
+        "name": "profile",
+        "run": profile_training_data,
+        "inputs": ["df", "X"],
+        "outputs": ["profile"],
+    },
+    {
+        "name": "quantize",
+        "run": quantize,
+        "inputs": ["X", "y"],
+        "outputs": ["reference"],
+        "checkpoint": False,
+    },
+    {
+        "name": "compress",
+        "run": compress_duplicates,
+        "inputs": ["X", "y", "reference"],
+        "outputs": ["compression", "groups"],
+    },
+    {
+        "name": "cv",
+        "run": cross_validate,
+        "inputs": ["X", "y", "reference", "groups"],
+        "outputs": ["cv_results"],
+    },
+    {
+        "name": "final_fit",
+        "run": fit_final_model,
+        "inputs": ["X", "y", "reference", "cv_results", "groups"],
+        "outputs": ["final_model", "final_strategy"],
+    },
+    {
+        "name": "distill",
+        "run": distill_fast_model,
+        "inputs": ["df", "X", "valid_categories", "final_model"],
+        "outputs": ["fast_model", "distillation"],
+    },
+    {
+        "name": "save",
+        "run": save_model,
+        "inputs": [
+            "df",
+            "X",
+            "valid_categories",
+            "final_model",
+            "final_strategy",
+            "profile",
+            "fast_model",
+            "distillation",
+            "cv_results",
+        ],
+        "outputs": ["compaction"],
+    },
+]
+
+
+def main():
+    """Train and save the salary prediction model."""
+    parser = argparse.ArgumentParser(description="Train the salary prediction model")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--resume", action="store_true", help="Skip stages completed by the last run"
+    )
+    group.add_argument(
+        "--from-stage",
+        choices=[stage["name"] for stage in STAGES],
+        help="Rerun this stage and all later ones from the last run's checkpoints",
+    )
+    parser.add_argument(
+        "--run-dir", type=Path, help="Checkpoint directory (default: training.run_dir)"
+    )
+    parser.add_argument(
+        "--overlay",
+        type=Path,
+        help="YAML whose keys override model_parameters.yaml (e.g. from src.tune)",
+    )
+    args = parser.parse_args()
+
+    # Load configuration
+    print("Loading configuration...")
+    config_path = Path("config/model_parameters.yaml")
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+    if args.overlay:
+        with open(args.overlay, "r") as f:
+            overlay = yaml.safe_load(f)
+        config = merge_config(config, overlay)
+        print(f"Applied overrides from {args.overlay}: {overlay}")
+
+    run_dir = args.run_dir or Path(config["training"].get("run_dir", "runs/train"))
+    manifest = run_pipeline(
+        STAGES, config, run_dir, resume=args.resume, from_stage=args.from_stage
+    )
+
+    print(f"\nStage timings (checkpoints in {run_dir}):")
+    print(format_stage_summary(manifest))
+
+    # Timing, memory and size of this run, to compare machines and configs
+    final = load_checkpoint(run_dir, "final_fit")
+    report = build_run_report(
+        config,
+        manifest,
+        load_checkpoint(run_dir, "cv")["cv_results"],
+        final["final_strategy"],
+        final["final_model"].n_features_in_,
+        load_checkpoint(run_dir, "compress")["compression"],
+        load_checkpoint(run_dir, "save")["compaction"],
+    )
+    path = report_path(config["training"]["model_path"])
+    write_run_report(report, path)
+    print(f"\nRun report written to {path}:\n")
+    print(format_run_report(report))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,333 @@
+"""Hyperparameter search with successive halving over CV folds.
+
+Parameter sets are sampled from `tuning.search_space` in
+model_parameters.yaml (trial 0 is the current `model` section, as a
+baseline). All trials are scored on the first CV fold; only the best
+1/reduction_factor move on to more folds, and so on until the survivors have
+been scored on every fold, so weak trials stop after one or a few fits.
+
+Fits run in parallel worker processes. Each worker quantizes the data once
+and keeps the binned matrix of every fold it has seen, so all the trials it
+runs share the same binned data instead of rebuilding it per fit.
+
+The best parameters are written as a YAML overlay holding only the tuned
+`model` keys; apply it with `python -m src.train --overlay PATH`.
+
+Usage:
+    uv run python -m src.tune [--trials 24] [--workers 4] [--output PATH]
+"""
+
+import argparse
+import copy
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import UTC, datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+from sklearn.metrics import r2_score
+from sklearn.model_selection import KFold
+
+from src.cache import load_cleaned_survey, survey_paths
+from src.cleaning import MAIN_LABEL
+from src.cv import plan_thread_budget, worker_context
+from src.model import (
+    build_reference_matrix,
+    evaluation_matrix,
+    fit_booster,
+    predict_best,
+    training_matrix,
+)
+from src.preprocessing import (
+    CATEGORICAL_FEATURES,
+    prepare_features,
+    prepare_features_native,
+)
+
+# Data and binned fold matrices of one worker process (or of the parent
+# when tuning sequentially)
+_worker_data = {}
+
+
+def sample_params(search_space: dict, rng: np.random.Generator) -> dict:
+    """
+    Draw one parameter set.
+
+    Each entry of search_space is either a list of choices or a dict with
+    "low", "high", optional "log" (sample uniformly in log space) and
+    optional "type": "int".
+    """
+    params = {}
+    for name, spec in search_space.items():
+        if isinstance(spec, list):
+            params[name] = spec[rng.integers(len(spec))]
+            continue
+        low, high = spec["low"], spec["high"]
+        if spec.get("log"):
+            value = math.exp(rng.uniform(math.log(low), math.log(high)))
+        else:
+            value = rng.uniform(low, high)
+        if spec.get("type") == "int":
+            params[name] = round(value)
+        else:
+            params[name] = float(f"{value:.4g}")
+    return params
+
+
+def halving_schedule(n_folds: int, reduction_factor: int, min_folds: int = 1) -> list:
+    """
+    Folds each rung has scored its trials on, e.g. [1, 3, 5] for 5 folds.
+
+    The fold budget grows by reduction_factor per rung, capped at n_folds.
+    """
+    budgets = [min(min_folds, n_folds)]
+    while budgets[-1] < n_folds:
+        budgets.append(min(budgets[-1] * reduction_factor, n_folds))
+    return budgets
+
+
+def merge_config(config: dict, overlay: dict) -> dict:
+    """Return a copy of config with overlay's nested keys taking precedence."""
+    merged = copy.deepcopy(config)
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _init_worker(X: pd.DataFrame, y: pd.Series, encoding: str, splits: list) -> None:
+    _worker_data.clear()
+    _worker_data.update(X=X, y=y, encoding=encoding, splits=splits, folds={})
+    # Each worker sketches all rows itself: a QuantileDMatrix cannot be sent
+    # to another process (see src.cv._init_worker), but the cuts are the same
+    _worker_data["reference"] = build_reference_matrix(X, y, encoding)
+
+
+def _fold_matrices(fold: int) -> tuple:
+    """Binned training and evaluation matrices of a fold, built once per worker."""
+    if fold not in _worker_data["folds"]:
+        X, y, encoding = _worker_data["X"], _worker_data["y"], _worker_data["encoding"]
+        train_idx, test_idx = _worker_data["splits"][fold]
+        _worker_data["folds"][fold] = (
+            training_matrix(X, y, train_idx, _worker_data["reference"], encoding),
+            evaluation_matrix(X, y, test_idx, encoding),
+        )
+    return _worker_data["folds"][fold]
+
+
+def _evaluate(task: tuple) -> dict:
+    """Fit one (trial, fold) pair and score it on the held-out fold."""
+    trial, model_config, fold, n_jobs = task
+    start = time.perf_counter()
+    dtrain, dtest = _fold_matrices(fold)
+    booster = fit_booster(model_config, dtrain, dtest, n_jobs=n_jobs)
+    _, test_idx = _worker_data["splits"][fold]
+    return {
+        "trial": trial,
+        "fold": fold,
+        "test_r2": r2_score(
+            _worker_data["y"].iloc[test_idx], predict_best(booster, dtest)
+        ),
+        "best_iteration": booster.best_iteration + 1,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def run_search(
+    X: pd.DataFrame,
+    y: pd.Series,
+    config: dict,
+    encoding: str = "onehot",
+    n_trials: int | None = None,
+    workers: int | None = None,
+    verbose: bool = True,
+) -> list[dict]:
+    """
+    Successive-halving search over tuning.search_space.
+
+    Args:
+        X: Model input
+        y: Target
+        config: Full model_parameters.yaml configuration
+        encoding: Categorical encoding of X ("onehot" or "native")
+        n_trials: Parameter sets to try (default: tuning.n_trials)
+        workers: Concurrent fits (default: tuning.workers, 1 = in-process)
+        verbose: Print progress per rung
+
+    Returns:
+        One dict per trial, best first: trial, params, folds (number scored),
+        mean_r2, std_r2, best_iteration (mean) and seconds (total fit time).
+        Trials scored on more folds rank above trials pruned earlier.
+    """
+    tuning = config["tuning"]
+    n_trials = n_trials or tuning["n_trials"]
+    if workers is None:
+        workers = tuning.get("workers", 1)
+    n_splits = config["data"].get("cv_splits", 5)
+    reduction_factor = tuning.get("reduction_factor", 3)
+
+    # Same folds as training's cross-validation
+    kf = KFold(
+        n_splits=n_splits, shuffle=True, random_state=config["data"]["random_state"]
+    )
+    splits = list(kf.split(X))
+
+    rng = np.random.default_rng(tuning.get("seed", 0))
+    space = tuning["search_space"]
+    baseline = {
+        name: config["model"][name] for name in space if name in config["model"]
+    }
+    params = [baseline] + [sample_params(space, rng) for _ in range(n_trials - 1)]
+    trials = [
+        {"trial": i, "params": p, "scores": [], "iterations": [], "seconds": 0.0}
+        for i, p in enumerate(params)
+    ]
+
+    budgets = halving_schedule(n_splits, reduction_factor, tuning.get("min_folds", 1))
+    workers, n_jobs = plan_thread_budget(config["model"], n_trials, workers)
+
+    executor = None
+    if workers == 1:
+        _init_worker(X, y, encoding, splits)
+    else:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=worker_context(),
+            initializer=_init_worker,
+            initargs=(X, y, encoding, splits),
+        )
+
+    try:
+        alive = trials
+        scored_folds = 0
+        for rung, budget in enumerate(budgets):
+            start = time.perf_counter()
+            tasks = [
+                (trial["trial"], {**config["model"], **trial["params"]}, fold, n_jobs)
+                for trial in alive
+                for fold in range(scored_folds, budget)
+            ]
+            # map() keeps submission order, so results do not depend on
+            # which worker finishes first
+            evaluated = (
+                executor.map(_evaluate, tasks) if executor else map(_evaluate, tasks)
+            )
+            for result in evaluated:
+                trial = trials[result["trial"]]
+                trial["scores"].append(result["test_r2"])
+                trial["iterations"].append(result["best_iteration"])
+                trial["seconds"] += result["seconds"]
+            scored_folds = budget
+
+            alive = sorted(alive, key=lambda t: np.mean(t["scores"]), reverse=True)
+            if verbose:
+                print(
+                    f"Rung {rung}: {len(alive)} trial(s) x {budget} fold(s), "
+                    f"best mean R2 {np.mean(alive[0]['scores']):.4f} "
+                    f"({time.perf_counter() - start:.1f}s)"
+                )
+            if budget < n_splits:
+                alive = alive[: max(1, math.ceil(len(alive) / reduction_factor))]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        _worker_data.clear()
+
+    results = [
+        {
+            "trial": trial["trial"],
+            "params": trial["params"],
+            "folds": len(trial["scores"]),
+            "mean_r2": float(np.mean(trial["scores"])),
+            "std_r2": float(np.std(trial["scores"])),
+            "best_iteration": int(np.mean(trial["iterations"])),
+            "seconds": trial["seconds"],
+        }
+        for trial in trials
+    ]
+    return sorted(results, key=lambda r: (r["folds"], r["mean_r2"]), reverse=True)
+
+
+def format_results(results: list[dict], top: int = 15) -> str:
+    """Ranked table of the best trials ("-": XGBoost default, not set)."""
+    names = list(dict.fromkeys(name for r in results for name in r["params"]))
+    header = f"{'rank':>4s} {'trial':>5s} {'folds':>5s} {'mean R2':>8s} {'std':>7s} {'iters':>6s}"
+    header += "".join(f" {name:>16s}" for name in names)
+    lines = [header]
+    for rank, result in enumerate(results[:top], 1):
+        line = (
+            f"{rank:4d} {result['trial']:5d} {result['folds']:5d} "
+            f"{result['mean_r2']:8.4f} {result['std_r2']:7.4f} {result['best_iteration']:6d}"
+        )
+        line += "".join(f" {result['params'].get(name, '-')!s:>16s}" for name in names)
+        lines.append(line + ("  (current)" if result["trial"] == 0 else ""))
+    return "\n".join(lines)
+
+
+def write_overlay(result: dict, path: Path) -> None:
+    """Write the parameters of a trial as a model_parameters.yaml overlay."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        f.write(
+            f"# Best parameters from python -m src.tune "
+            f"({datetime.now(UTC).isoformat(timespec='seconds')})\n"
+            f"# Mean CV R2 {result['mean_r2']:.4f} over {result['folds']} fold(s), "
+            f"trial {result['trial']}\n"
+            "# Apply with: python -m src.train --overlay " + str(path) + "\n"
+        )
+        yaml.dump({"model": result["params"]}, f, default_flow_style=False)
+
+
+def load_features(config: dict) -> tuple:
+    """Cleaned survey encoded as in training: (X, y, encoding)."""
+    df = load_cleaned_survey(
+        config, survey_paths(config), use_cache=config["data"].get("use_cache", True)
+    )
+    encoding = config["features"]["encoding"].get("method", "onehot")
+    if encoding == "native":
+        categories = {
+            col: sorted(df[col].dropna().unique()) for col in CATEGORICAL_FEATURES
+        }
+        X = prepare_features_native(df, categories)
+    else:
+        X = prepare_features(df)
+    return X, df[MAIN_LABEL], encoding
+
+
+def main():
+    """Run the search and write the best parameters."""
+    parser = argparse.ArgumentParser(description="Successive-halving parameter search")
+    parser.add_argument("--trials", type=int, help="Default: tuning.n_trials")
+    parser.add_argument("--workers", type=int, help="Default: tuning.workers")
+    parser.add_argument("--output", type=Path, help="Default: tuning.output_path")
+    args = parser.parse_args()
+
+    with open("config/model_parameters.yaml", "r") as f:
+        config = yaml.safe_load(f)
+
+    X, y, encoding = load_features(config)
+    print(f"Tuning on {len(X):,} rows, {X.shape[1]} features ({encoding} encoding)")
+
+    start = time.perf_counter()
+    results = run_search(X, y, config, encoding, args.trials, args.workers)
+    fits = sum(result["folds"] for result in results)
+    full = len(results) * config["data"].get("cv_splits", 5)
+    print(
+        f"\n{len(results)} trials in {time.perf_counter() - start:.1f}s; "
+        f"{fits} fold fits instead of {full} without pruning\n"
+    )
+    print(format_results(results))
+
+    output = args.output or Path(config["tuning"]["output_path"])
+    write_overlay(results[0], output)
+    print(f"\nBest parameters written to {output}")
+
+
+if __name__ == "__main__":
+    main()
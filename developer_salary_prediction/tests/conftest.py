@@ -2,6 +2,7 @@
 
 from pathlib import Path
 
+import pandas as pd
 import pytest
 import yaml
 
@@ -35,3 +36,27 @@ def model_config():
     path = Path("config/model_parameters.yaml")
     with open(path, "r") as f:
         return yaml.safe_load(f)
+
+
+@pytest.fixture
+def raw_survey():
+    """Raw survey rows: two countries with salaries of 1k..100k USD each."""
+    rows = []
+    for country in ["Germany", "India"]:
+        for i in range(1, 101):
+            rows.append(
+                {
+                    "Country": country,
+                    "YearsCode": 5.0,
+                    "WorkExp": 3.0,
+                    "EdLevel": "Bachelor\u2019s degree",
+                    "DevType": "Developer, back-end",
+                    "Industry": "Software Development",
+                    "Age": "25-34 years old",
+                    "ICorPM": "Individual contributor",
+                    "Currency": "EUR European Euro",
+                    "CompTotal": i * 900.0,
+                    "ConvertedCompYearly": i * 1000.0,
+                }
+            )
+    return pd.DataFrame(rows)
@@ -0,0 +1,107 @@
+"""Tests for src/budget.py - Time-budgeted prediction."""
+
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+
+from src.budget import (
+    FULL_MODEL_ONLY,
+    calibrate,
+    check_settings,
+    choose_trees,
+    level_trees,
+    r2_by_trees,
+)
+from src.model import predict_frame
+
+SETTINGS = {"levels": [1.0, 0.5, 0.25, 0.1], "queue_depths": [0, 16, 64, 256]}
+LATENCY = {"overhead_seconds": 0.0005, "tree_seconds": 0.00001}
+
+
+@pytest.fixture
+def fitted():
+    """A 100-tree booster on a smooth one-feature target."""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"x": rng.random(1000), "z": rng.random(1000)})
+    y = pd.Series(10 * X["x"] + rng.normal(0, 0.1, 1000))
+    booster = xgb.train({"max_depth": 3, "learning_rate": 0.05}, xgb.DMatrix(X, y), 100)
+    booster.set_attr(best_iteration="99")
+    return booster, X, y
+
+
+def test_level_trees_rounds_and_keeps_one_tree():
+    assert level_trees(1000, SETTINGS["levels"]) == [1000, 500, 250, 100]
+    assert level_trees(5, [1.0, 0.01]) == [5, 1]
+
+
+def test_choose_trees_by_queue_depth():
+    levels = level_trees(1000, SETTINGS["levels"])
+    assert choose_trees(levels, SETTINGS) == 1000
+    assert choose_trees(levels, SETTINGS, queue_depth=1) == 1000
+    assert choose_trees(levels, SETTINGS, queue_depth=16) == 500
+    assert choose_trees(levels, SETTINGS, queue_depth=100) == 250
+    assert choose_trees(levels, SETTINGS, queue_depth=10_000) == 100
+
+
+def test_choose_trees_by_deadline():
+    """The largest level whose estimate fits; the smallest when none does."""
+    levels = level_trees(1000, SETTINGS["levels"])
+    # Estimates: 10.5, 5.5, 3.0 and 1.5 ms
+    assert choose_trees(levels, SETTINGS, LATENCY, deadline_ms=20) == 1000
+    assert choose_trees(levels, SETTINGS, LATENCY, deadline_ms=6) == 500
+    assert choose_trees(levels, SETTINGS, LATENCY, deadline_ms=0.1) == 100
+
+
+def test_choose_trees_takes_the_stricter_signal():
+    levels = level_trees(1000, SETTINGS["levels"])
+    assert choose_trees(levels, SETTINGS, LATENCY, queue_depth=64, deadline_ms=6) == 250
+    assert choose_trees(levels, SETTINGS, LATENCY, queue_depth=16, deadline_ms=2) == 100
+
+
+def test_full_model_only_ignores_load():
+    check_settings(FULL_MODEL_ONLY)
+    levels = level_trees(1000, FULL_MODEL_ONLY["levels"])
+    assert choose_trees(levels, FULL_MODEL_ONLY, queue_depth=10_000) == 1000
+    assert choose_trees(levels, FULL_MODEL_ONLY, deadline_ms=0.1) == 1000
+
+
+@pytest.mark.parametrize(
+    "settings, message",
+    [
+        ({"levels": [1.0, 0.5], "queue_depths": [0, 16, 64]}, "one depth per level"),
+        ({"levels": [1.0, 0.5], "queue_depths": [16, 0]}, "ascending"),
+        ({"levels": [0.5, 1.0], "queue_depths": [0, 16]}, "best first"),
+        ({"levels": [1.0, 0.0], "queue_depths": [0, 16]}, "in \\(0, 1\\]"),
+        ({"levels": [], "queue_depths": []}, "in \\(0, 1\\]"),
+    ],
+)
+def test_check_settings_rejects_bad_levels(settings, message):
+    check_settings(SETTINGS)
+    with pytest.raises(ValueError, match=message):
+        check_settings(settings)
+
+
+def test_prefix_prediction_matches_truncated_model(fitted):
+    """Predicting with a tree prefix equals a model sliced to those trees."""
+    booster, X, _ = fitted
+    np.testing.assert_array_equal(
+        predict_frame(booster, X, trees=25), booster[:25].inplace_predict(X)
+    )
+
+
+def test_calibrate_returns_non_negative_costs(fitted):
+    booster, X, _ = fitted
+    latency = calibrate(booster, X.iloc[:1], "onehot", repeats=5)
+    assert latency["tree_seconds"] >= 0
+    assert latency["overhead_seconds"] + 100 * latency["tree_seconds"] > 0
+
+
+def test_r2_by_trees_degrades_with_fewer_trees(fitted):
+    booster, X, y = fitted
+    table = r2_by_trees(booster, X, y, "onehot", [100, 50, 10, 100])
+    assert list(table["Trees"]) == [100, 50, 10]
+    assert list(table["Share"]) == [1.0, 0.5, 0.1]
+    assert table["R2"].is_monotonic_decreasing
+    assert table["R2 Loss"].iloc[0] == 0
+    assert (table["Row ms"] > 0).all()
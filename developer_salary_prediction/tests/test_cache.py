@@ -0,0 +1,80 @@
+"""Tests for src/cache.py - Cleaned dataset cache."""
+
+import pytest
+
+from src import cache
+
+
+@pytest.fixture
+def survey_csv(raw_survey, tmp_path, monkeypatch):
+    """Write a small survey CSV and point the cache at a temporary directory."""
+    monkeypatch.setattr(cache, "CACHE_DIR", tmp_path / "cache")
+    path = tmp_path / "survey.csv"
+    raw_survey.to_csv(path, index=False)
+    return path
+
+
+def test_second_load_reads_cache(survey_csv, model_config):
+    """A repeated load returns the same frame from a single cache entry."""
+    first = cache.load_cleaned_survey(model_config, survey_csv, verbose=False)
+    second = cache.load_cleaned_survey(model_config, survey_csv, verbose=False)
+    assert len(cache.list_entries()) == 1
+    assert list(second.index) == list(first.index)
+    assert (
+        second["ConvertedCompYearly"].tolist() == first["ConvertedCompYearly"].tolist()
+    )
+
+
+def test_key_changes_with_cleaning_config(survey_csv, model_config):
+    """Changing a cleaning setting invalidates the key."""
+    key = cache.cache_key(survey_csv, model_config)
+    model_config["data"]["upper_percentile"] = 95
+    assert cache.cache_key(survey_csv, model_config) != key
+
+
+def test_key_ignores_model_config(survey_csv, model_config):
+    """Model hyperparameters do not affect the cleaned data key."""
+    key = cache.cache_key(survey_csv, model_config)
+    model_config["model"]["max_depth"] = 3
+    assert cache.cache_key(survey_csv, model_config) == key
+
+
+def test_key_changes_with_csv_contents(survey_csv, model_config):
+    """Editing the CSV gives a new key."""
+    key = cache.cache_key(survey_csv, model_config)
+    with open(survey_csv, "a") as f:
+        f.write("Germany,5,3,x,y,z,a,b,150000,EUR European Euro,150000\n")
+    assert cache.cache_key(survey_csv, model_config) != key
+
+
+def test_purge_removes_entries(survey_csv, model_config):
+    """purge() deletes all cache files."""
+    cache.load_cleaned_survey(model_config, survey_csv, verbose=False)
+    assert cache.purge() > 0
+    assert cache.list_entries() == []
+
+
+def test_several_files_share_one_entry(survey_csv, model_config, tmp_path):
+    """Survey years are combined and keyed by every file."""
+    other = tmp_path / "survey_2024.csv"
+    other.write_bytes(survey_csv.read_bytes())
+    df = cache.load_cleaned_survey(model_config, [survey_csv, other], verbose=False)
+    assert sorted(df["SurveyYear"].unique()) == [2024, 2025]
+    assert cache.cache_key([survey_csv, other], model_config) != cache.cache_key(
+        survey_csv, model_config
+    )
+
+
+def test_survey_paths_expand_globs(tmp_path, model_config, monkeypatch):
+    """Patterns are expanded in sorted order; unmatched entries raise."""
+    monkeypatch.chdir(tmp_path)
+    for year in (2024, 2023):
+        (tmp_path / f"survey_{year}.csv").touch()
+    model_config["data"]["survey_files"] = ["survey_*.csv"]
+    assert [p.name for p in cache.survey_paths(model_config)] == [
+        "survey_2023.csv",
+        "survey_2024.csv",
+    ]
+    model_config["data"]["survey_files"] = ["missing_*.csv"]
+    with pytest.raises(FileNotFoundError):
+        cache.survey_paths(model_config)
@@ -0,0 +1,43 @@
+"""Tests for src/cleaning.py - Survey row filtering."""
+
+import numpy as np
+import pandas as pd
+
+from src.cleaning import clean_survey, group_percentile_bounds
+
+
+def test_trims_each_country_separately(raw_survey, model_config):
+    """Percentile bounds are computed per country."""
+    result = clean_survey(raw_survey, model_config, verbose=False)
+    for _, group in result.groupby("Country"):
+        assert group["ConvertedCompYearly"].min() > 2000
+        assert group["ConvertedCompYearly"].max() < 100000
+
+
+def test_normalizes_apostrophes(raw_survey, model_config):
+    """Curly apostrophes are replaced before cardinality reduction."""
+    result = clean_survey(raw_survey, model_config, verbose=False)
+    assert set(result["EdLevel"]) == {"Bachelor's degree"}
+
+
+def test_drops_other_rows(raw_survey, model_config):
+    """Rows with 'Other' in a drop_other_from feature are removed."""
+    raw_survey.loc[raw_survey.index[:60], "DevType"] = "Other (please specify):"
+    result = clean_survey(raw_survey, model_config, verbose=False)
+    assert "Other" not in set(result["DevType"])
+
+
+def test_group_percentile_bounds_match_pandas():
+    """Bounds equal groupby-transform quantiles, including NaNs and tiny groups."""
+    rng = np.random.default_rng(0)
+    values = pd.Series(rng.integers(1000, 200000, 5000).astype(float))
+    values[::37] = np.nan
+    groups = pd.Series(rng.choice(["A", "B", "C", "D"], 5000))
+    groups[::53] = None
+    groups[:3] = ["Solo", "Pair", "Pair"]
+
+    lower, upper = group_percentile_bounds(values, groups, 0.02, 0.98)
+
+    grouped = values.groupby(groups)
+    np.testing.assert_array_equal(lower, grouped.transform("quantile", 0.02))
+    np.testing.assert_array_equal(upper, grouped.transform("quantile", 0.98))
@@ -0,0 +1,66 @@
+"""Tests for src/currency.py - Per-country currency rate derivation."""
+
+import pandas as pd
+import pytest
+
+from src.currency import derive_currency_rates
+
+
+def _rows(country, currency, comp_total, salary):
+    return {
+        "Country": country,
+        "Currency": currency,
+        "CompTotal": comp_total,
+        "ConvertedCompYearly": salary,
+    }
+
+
+@pytest.fixture
+def currency_survey():
+    """Two countries with a dominant currency plus a few USD answers."""
+    return pd.DataFrame(
+        [
+            _rows("Germany", "EUR European Euro", 90_000, 100_000),
+            _rows("Germany", "EUR Euro", 45_000, 50_000),
+            _rows("Germany", "EUR European Euro", 100_000, 100_000),
+            _rows("Germany", "USD United States dollar", 70_000, 70_000),
+            _rows("India", "INR Indian rupee", 830_000, 10_000),
+            _rows("India", "USD United States dollar", 20_000, 20_000),
+            _rows("India", "INR Indian rupee", 0, 10_000),
+            _rows("India", "INR Indian rupee", 850_000, 10_000),
+            _rows("India", "USD United States dollar", 30_000, 30_000),
+            _rows("Japan", "JPY Japanese yen", 1_500_000, 10_000),
+        ]
+    )
+
+
+class TestDeriveCurrencyRates:
+    """Test modal currency selection and median rates."""
+
+    def test_modal_currency_and_median_rate(self, currency_survey):
+        """The most common code wins and its median rate is rounded."""
+        rates = derive_currency_rates(currency_survey, ["Germany"])
+        assert rates == {
+            "Germany": {"code": "EUR", "name": "European Euro", "rate": 0.9}
+        }
+
+    def test_tie_goes_to_first_code_alphabetically(self, currency_survey):
+        """With zero-rate rows dropped, India ties between INR and USD."""
+        rates = derive_currency_rates(currency_survey, ["India"])
+        assert rates["India"]["code"] == "INR"
+        assert rates["India"]["rate"] == 84.0
+
+    def test_only_requested_countries(self, currency_survey):
+        """Countries outside the list are skipped; missing ones are omitted."""
+        rates = derive_currency_rates(currency_survey, ["Japan", "Brazil"])
+        assert list(rates) == ["Japan"]
+
+    def test_categorical_input(self, currency_survey):
+        """Categorical columns (as read from the cache) give the same result."""
+        countries = ["Germany", "India", "Japan"]
+        categorical = currency_survey.astype(
+            {"Country": "category", "Currency": "category"}
+        )
+        assert derive_currency_rates(categorical, countries) == derive_currency_rates(
+            currency_survey, countries
+        )
@@ -0,0 +1,89 @@
+"""Tests for src/cv.py - Cross-validation."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cv import plan_thread_budget, run_cross_validation, worker_context
+from src.model import duplicate_groups
+
+
+@pytest.fixture
+def small_cv_config(model_config):
+    """Model config trimmed down so CV runs in well under a second."""
+    model_config["model"].update(n_estimators=20, n_jobs=2)
+    model_config["data"]["cv_splits"] = 3
+    return model_config
+
+
+@pytest.fixture
+def regression_data():
+    """Small numeric regression problem."""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(300, 4)), columns=list("abcd"))
+    y = pd.Series(X["a"] * 3 + X["b"] + rng.normal(scale=0.1, size=300))
+    return X, y
+
+
+class TestPlanThreadBudget:
+    """Tests for plan_thread_budget()."""
+
+    def test_splits_budget_across_workers(self):
+        """Threads per fold times workers never exceeds the budget."""
+        workers, n_jobs = plan_thread_budget({"n_jobs": 8}, n_folds=5, workers=3)
+        assert (workers, n_jobs) == (3, 2)
+
+    def test_workers_capped_by_folds(self):
+        """There are never more workers than folds."""
+        workers, n_jobs = plan_thread_budget({"n_jobs": 16}, n_folds=5, workers=10)
+        assert (workers, n_jobs) == (5, 3)
+
+    def test_at_least_one_thread(self):
+        """A budget smaller than the worker count still gives one thread each."""
+        workers, n_jobs = plan_thread_budget({"n_jobs": 2}, n_folds=5, workers=4)
+        assert (workers, n_jobs) == (2, 1)
+
+
+def test_worker_pools_never_fork():
+    """Workers start after OpenMP threads ran here, so they are not forked."""
+    assert worker_context().get_start_method() in ("forkserver", "spawn")
+
+
+class TestRunCrossValidation:
+    """Tests for run_cross_validation()."""
+
+    def test_every_row_gets_one_prediction(self, small_cv_config, regression_data):
+        """Out-of-fold predictions cover all rows."""
+        X, y = regression_data
+        result = run_cross_validation(X, y, small_cv_config, workers=1)
+        assert len(result["folds"]) == 3
+        assert not np.isnan(result["oof_predictions"]).any()
+
+    def test_parallel_matches_sequential(self, small_cv_config, regression_data):
+        """Concurrent folds merge to the same results as sequential folds."""
+        X, y = regression_data
+        sequential = run_cross_validation(X, y, small_cv_config, workers=1)
+        parallel = run_cross_validation(X, y, small_cv_config, workers=2)
+        assert parallel["workers"] == 2
+        np.testing.assert_allclose(
+            parallel["oof_predictions"], sequential["oof_predictions"], rtol=1e-5
+        )
+        assert [f["best_iteration"] for f in parallel["folds"]] == [
+            f["best_iteration"] for f in sequential["folds"]
+        ]
+
+    def test_collapsed_folds_score_original_rows(self, small_cv_config):
+        """Folds train on distinct rows but score and predict every row."""
+        rng = np.random.default_rng(0)
+        X = pd.DataFrame({"a": rng.integers(0, 10, 300), "b": rng.integers(0, 3, 300)})
+        y = pd.Series(X["a"] * 2.0 + X["b"] + rng.normal(scale=0.5, size=300))
+        plain = run_cross_validation(X, y, small_cv_config, workers=1)
+        collapsed = run_cross_validation(
+            X, y, small_cv_config, workers=1, groups=duplicate_groups(X)
+        )
+        for fold, plain_fold in zip(collapsed["folds"], plain["folds"]):
+            assert fold["train_matrix_rows"] <= 30 < fold["train_rows"]
+            assert fold["train_r2"] == pytest.approx(plain_fold["train_r2"], rel=1e-5)
+        np.testing.assert_allclose(
+            collapsed["oof_predictions"], plain["oof_predictions"], rtol=1e-5
+        )
@@ -0,0 +1,127 @@
+"""Tests for src/distill.py - Fast-path student model."""
+
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+from sklearn.metrics import r2_score
+
+from src.distill import category_scores, check_gate, distill, grid_points
+from src.model import (
+    build_reference_matrix,
+    evaluation_matrix,
+    fit_booster,
+    training_matrix,
+)
+from src.preprocessing import CATEGORICAL_FEATURES, prepare_features_native
+
+CATEGORIES = {
+    "Country": ["Brazil", "Germany", "India"],
+    "EdLevel": ["Bachelor's degree", "Master's degree"],
+    "DevType": ["Data scientist", "Developer, back-end"],
+    "Industry": ["Software Development"],
+    "Age": ["25-34 years old", "35-44 years old"],
+    "ICorPM": ["Individual contributor"],
+}
+
+
+@pytest.fixture
+def survey():
+    """Cleaned survey rows whose salary depends on country and experience."""
+    rng = np.random.default_rng(0)
+    n = 2000
+    df = pd.DataFrame(
+        {col: rng.choice(values, n) for col, values in CATEGORIES.items()}
+    )
+    work_exp = rng.integers(0, 30, n).astype(float)
+    df["YearsCode"] = work_exp + 2
+    df["WorkExp"] = work_exp
+    df["ConvertedCompYearly"] = (
+        np.select(
+            [df["Country"] == "Germany", df["Country"] == "India"],
+            [70_000, 20_000],
+            40_000,
+        )
+        + 2_000 * work_exp
+        + rng.normal(0, 3_000, n)
+    )
+    return df
+
+
+def test_grid_points_stay_in_range(survey):
+    """Synthetic rows use known categories and plausible experience."""
+    grid = grid_points(CATEGORIES, survey, 500, seed=0)
+    for col in CATEGORICAL_FEATURES:
+        assert set(grid[col]) <= set(CATEGORIES[col])
+    assert grid["YearsCode"].between(0, survey["YearsCode"].max()).all()
+    assert (grid["WorkExp"] <= grid["YearsCode"]).all()
+
+
+def test_category_scores_match_per_category_r2(survey):
+    """Grouped sums give the same R2 as scoring each category separately."""
+    rng = np.random.default_rng(1)
+    actual = survey["ConvertedCompYearly"].to_numpy()
+    predicted = actual + rng.normal(0, 5_000, len(actual))
+    scores = category_scores(survey, actual, predicted, min_rows=1)
+    for country in CATEGORIES["Country"]:
+        mask = (survey["Country"] == country).to_numpy()
+        assert scores.loc[("Country", country), "R2"] == pytest.approx(
+            r2_score(actual[mask], predicted[mask])
+        )
+        assert scores.loc[("Country", country), "Count"] == mask.sum()
+    assert category_scores(survey, actual, predicted, min_rows=len(survey) + 1).empty
+
+
+def test_gate_flags_regressed_categories():
+    """Only categories that lose more than the allowed delta are reported."""
+    index = pd.MultiIndex.from_tuples([("Country", "India"), ("Country", "Germany")])
+    teacher = pd.DataFrame({"R2": [0.5, 0.5], "Abs % Diff": [2.0, 2.0]}, index=index)
+    student = pd.DataFrame({"R2": [0.49, 0.4], "Abs % Diff": [2.5, 2.0]}, index=index)
+    settings = {"max_category_r2_drop": 0.03, "max_pct_diff_increase": 2.0}
+    failures = check_gate(teacher, student, settings)
+    assert len(failures) == 1
+    assert failures[0].startswith('Country "Germany"')
+
+
+@pytest.mark.parametrize("encoding", ["onehot", "native"])
+def test_student_passes_or_fails_gate(survey, model_config, encoding):
+    """A student is returned only when it meets the configured deltas."""
+    model_config["model"].update(
+        n_estimators=200, learning_rate=0.3, early_stopping_rounds=10, n_jobs=1
+    )
+    model_config["features"]["encoding"]["method"] = encoding
+    X = prepare_features_native(survey, CATEGORIES)
+    if encoding == "onehot":
+        X = pd.get_dummies(X)
+    y = survey["ConvertedCompYearly"]
+    rows = np.arange(len(X))
+    teacher = fit_booster(
+        model_config["model"],
+        training_matrix(
+            X, y, rows[:1800], build_reference_matrix(X, y, encoding), encoding
+        ),
+        evaluation_matrix(X, y, rows[1800:], encoding),
+    )
+    model_config["distillation"].update(
+        student={"n_estimators": 50, "max_depth": 3, "learning_rate": 0.3},
+        synthetic_rows=500,
+        max_r2_drop=0.05,
+        max_category_r2_drop=0.1,
+        max_pct_diff_increase=5.0,
+    )
+
+    student, report = distill(
+        model_config, survey, X, teacher, CATEGORIES, verbose=False
+    )
+    assert report["passed"], report["failures"]
+    assert report["student_trees"] <= 50
+    assert report["student_r2"] > 0.9
+    booster = xgb.Booster(model_file=bytearray(student))
+    assert booster.feature_names == list(X.columns)
+
+    model_config["distillation"]["max_r2_drop"] = -1.0
+    student, report = distill(
+        model_config, survey, X, teacher, CATEGORIES, verbose=False
+    )
+    assert student is None
+    assert report["failures"][0].startswith("overall R2")
@@ -0,0 +1,310 @@
+"""Tests for src/guardrails.py - Guardrail metrics and out-of-fold predictions."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import r2_score
+
+from src import cache, guardrails
+from src.guardrails import (
+    add_sums,
+    bootstrap_intervals,
+    category_metrics,
+    category_sums,
+    flag_violations,
+    interaction_metrics,
+    load_oof,
+    metrics_from_sums,
+    oof_config_hash,
+    oof_path,
+    worst_slices,
+    write_oof,
+)
+
+
+@pytest.fixture
+def survey_config(raw_survey, model_config, tmp_path, monkeypatch):
+    """Config whose survey_files is a small CSV, with the cache in tmp_path."""
+    monkeypatch.setattr(cache, "CACHE_DIR", tmp_path / "cache")
+    path = tmp_path / "survey.csv"
+    raw_survey.to_csv(path, index=False)
+    model_config["data"]["survey_files"] = [str(path)]
+    return model_config
+
+
+def test_oof_path_sits_next_to_model():
+    assert str(oof_path("models/model.pkl")) == "models/model.oof.parquet"
+
+
+def test_round_trip_aligns_to_rows(tmp_path):
+    """Predictions come back in the order of the requested row labels."""
+    path = tmp_path / "model.oof.parquet"
+    rows = pd.Index([10, 3, 7, 42])
+    write_oof(path, rows, np.array([1.0, 2.0, 3.0, 4.0]), "abc")
+    predictions = load_oof(path, "abc", pd.Index([42, 10, 7, 3]))
+    np.testing.assert_array_equal(predictions, [4.0, 1.0, 3.0, 2.0])
+
+
+def test_missing_file_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_oof(tmp_path / "model.oof.parquet", "abc", pd.Index([0]))
+
+
+def test_hash_mismatch_raises(tmp_path):
+    path = tmp_path / "model.oof.parquet"
+    write_oof(path, pd.Index([0, 1]), np.array([1.0, 2.0]), "abc")
+    with pytest.raises(ValueError, match="other data or settings"):
+        load_oof(path, "def", pd.Index([0, 1]))
+
+
+def test_other_rows_raise(tmp_path):
+    """Predictions for a different set of rows are not used."""
+    path = tmp_path / "model.oof.parquet"
+    write_oof(path, pd.Index([0, 1]), np.array([1.0, 2.0]), "abc")
+    with pytest.raises(ValueError, match="cover 2 rows"):
+        load_oof(path, "abc", pd.Index([0, 1, 2]))
+    with pytest.raises(ValueError, match="miss some rows"):
+        load_oof(path, "abc", pd.Index([0, 5]))
+
+
+def test_config_hash_tracks_model_and_cv_settings(survey_config):
+    first = oof_config_hash(survey_config)
+    assert oof_config_hash(survey_config) == first
+    survey_config["model"]["max_depth"] += 1
+    second = oof_config_hash(survey_config)
+    assert second != first
+    survey_config["data"]["cv_splits"] = 3
+    assert oof_config_hash(survey_config) != second
+
+
+def test_config_hash_ignores_training_options(survey_config):
+    """Options that do not change the predictions keep the hash."""
+    first = oof_config_hash(survey_config)
+    survey_config["training"]["verbose"] = not survey_config["training"]["verbose"]
+    survey_config["distillation"]["enabled"] = True
+    assert oof_config_hash(survey_config) == first
+
+
+def test_config_hash_tracks_the_data(survey_config, raw_survey, tmp_path):
+    first = oof_config_hash(survey_config)
+    raw_survey.iloc[:-1].to_csv(tmp_path / "survey.csv", index=False)
+    assert oof_config_hash(survey_config) != first
+
+
+@pytest.fixture
+def scored():
+    """Rows of two categorical features with noisy predictions."""
+    rng = np.random.default_rng(0)
+    n = 3000
+    df = pd.DataFrame(
+        {
+            "Country": rng.choice(["Germany", "India", "Brazil"], n),
+            "Age": rng.choice(["18-24", "25-34", "35-44", "45-54"], n),
+        }
+    )
+    df.loc[0, "Country"] = "Japan"  # single-row category
+    actual = rng.normal(60_000, 20_000, n)
+    predictions = actual + rng.normal(0, 10_000, n)
+    return df, actual, predictions
+
+
+def loop_metrics(df, actual, predictions, feature):
+    """Reference: one mask over all rows per category."""
+    rows = []
+    for cat in sorted(df[feature].dropna().unique()):
+        mask = (df[feature] == cat).to_numpy()
+        rows.append(
+            {
+                "Category": cat,
+                "Count": int(mask.sum()),
+                "R2": r2_score(actual[mask], predictions[mask])
+                if mask.sum() > 1
+                else np.nan,
+                "Mean Actual ($)": actual[mask].mean(),
+                "Mean Predicted ($)": predictions[mask].mean(),
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize("dtype", ["str", "category"])
+def test_category_metrics_match_per_category_loop(scored, dtype):
+    df, actual, predictions = scored
+    df = df.astype(dtype)
+    metrics = category_metrics(df, actual, predictions, ["Country", "Age"])
+    assert list(metrics["Feature"].unique()) == ["Country", "Age"]
+    for feature in ["Country", "Age"]:
+        got = metrics[metrics["Feature"] == feature].reset_index(drop=True)
+        expected = loop_metrics(df, actual, predictions, feature)
+        assert list(got["Category"]) == list(expected["Category"])
+        assert list(got["Count"]) == list(expected["Count"])
+        np.testing.assert_allclose(got["R2"], expected["R2"], rtol=1e-9)
+        np.testing.assert_allclose(
+            got["Mean Predicted ($)"], expected["Mean Predicted ($)"], rtol=1e-12
+        )
+        np.testing.assert_allclose(
+            got["Abs % Diff"],
+            (expected["Mean Predicted ($)"] - expected["Mean Actual ($)"]).abs()
+            / expected["Mean Actual ($)"]
+            * 100,
+            rtol=1e-9,
+        )
+    assert np.isnan(metrics.loc[metrics["Category"] == "Japan", "R2"]).all()
+
+
+def test_constant_target_categories_match_r2_score():
+    """A category with one salary gets a finite R2, like r2_score()."""
+    df = pd.DataFrame({"Country": ["Germany"] * 3 + ["India"] * 3})
+    actual = np.array([50_000.0] * 3 + [20_000.0] * 3)
+    predictions = np.array([50_000.0] * 3 + [21_000.0, 19_000.0, 20_000.0])
+    metrics = category_metrics(df, actual, predictions, ["Country"])
+    assert list(metrics["R2"]) == [
+        r2_score(actual[:3], predictions[:3]),
+        r2_score(actual[3:], predictions[3:]),
+    ]
+    assert list(metrics["R2"]) == [1.0, 0.0]
+
+
+def test_category_metrics_skip_missing_and_unused(scored):
+    """Missing values and unused categorical levels produce no rows."""
+    df, actual, predictions = scored
+    df = df.astype(
+        {
+            "Country": pd.CategoricalDtype(
+                ["Peru", "Brazil", "Germany", "India", "Japan"]
+            )
+        }
+    )
+    df.loc[1:10, "Country"] = None
+    metrics = category_metrics(df, actual, predictions, ["Country"])
+    assert list(metrics["Category"]) == ["Brazil", "Germany", "India", "Japan"]
+    assert metrics["Count"].sum() == len(df) - 10
+
+
+def test_chunk_sums_add_up_to_category_metrics(scored):
+    """Sums of chunks over fixed category lists give the one-pass table."""
+    df, actual, predictions = scored
+    categories = {
+        "Country": ["Brazil", "Germany", "India", "Japan", "Peru"],
+        "Age": ["18-24", "25-34", "35-44", "45-54"],
+    }
+    features = ["Country", "Age"]
+    total = None
+    for chunk in np.array_split(np.arange(len(df)), 4):
+        total = add_sums(
+            total,
+            category_sums(
+                df.iloc[chunk],
+                actual[chunk],
+                predictions[chunk],
+                categories,
+                shift=60_000.0,
+                features=features,
+            ),
+        )
+    metrics = metrics_from_sums(total, categories, features)
+    expected = category_metrics(df, actual, predictions, features)
+    pd.testing.assert_frame_equal(metrics, expected, check_dtype=False, rtol=1e-9)
+
+
+def test_flag_violations(scored):
+    df, actual, predictions = scored
+    metrics = category_metrics(df, actual, predictions, ["Country"])
+    flagged = flag_violations(metrics, min_r2=0.7, max_abs_pct_diff=1.0)
+    np.testing.assert_array_equal(flagged["Low R2"], metrics["R2"] < 0.7)
+    np.testing.assert_array_equal(flagged["High Diff"], metrics["Abs % Diff"] > 1.0)
+    # NaN R2 (single row) is never below the threshold
+    assert not flagged.loc[flagged["Category"] == "Japan", "Low R2"].any()
+
+
+def test_bootstrap_intervals_follow_category_metrics(scored):
+    """One interval per reported category, around its point estimate."""
+    df, actual, predictions = scored
+    metrics = category_metrics(df, actual, predictions, ["Country", "Age"])
+    intervals = bootstrap_intervals(
+        df, actual, predictions, 200, features=["Country", "Age"]
+    )
+    assert intervals[["Feature", "Category"]].equals(metrics[["Feature", "Category"]])
+    large = metrics["Count"] > 100
+    assert (intervals["R2 Low"][large] < metrics["R2"][large]).all()
+    assert (intervals["R2 High"][large] > metrics["R2"][large]).all()
+    assert (intervals["Diff Low"] <= intervals["Diff High"]).all()
+
+
+def test_bootstrap_intervals_narrow_with_more_rows(scored):
+    df, actual, predictions = scored
+    df = df.copy()
+    df.loc[:99, "Age"] = "65+"  # a small category
+    intervals = bootstrap_intervals(df, actual, predictions, 200, features=["Age"])
+    width = (intervals["R2 High"] - intervals["R2 Low"]).to_numpy()
+    assert width[intervals["Category"] == "65+"][0] > 2 * width.min()
+
+
+def test_bootstrap_intervals_do_not_depend_on_workers(scored, monkeypatch):
+    """Blocks are seeded by position, whatever process computes them."""
+    df, actual, predictions = scored
+    monkeypatch.setattr(guardrails, "BLOCK_ELEMENTS", 20 * len(df))
+    sequential = bootstrap_intervals(df, actual, predictions, 50, features=["Age"])
+    parallel = bootstrap_intervals(
+        df, actual, predictions, 50, features=["Age"], workers=2
+    )
+    pd.testing.assert_frame_equal(sequential, parallel)
+
+
+def test_flag_violations_use_the_whole_interval():
+    """With intervals, only categories entirely past a threshold are flagged."""
+    metrics = pd.DataFrame(
+        {
+            "R2": [0.1, 0.1, 0.5],
+            "Abs % Diff": [30.0, 30.0, 5.0],
+            "R2 Low": [0.0, 0.0, 0.4],
+            "R2 High": [0.15, 0.3, 0.6],
+            "Diff Low": [25.0, 15.0, 1.0],
+            "Diff High": [35.0, 40.0, 9.0],
+        }
+    )
+    flagged = flag_violations(metrics, min_r2=0.2, max_abs_pct_diff=20)
+    assert list(flagged["Low R2"]) == [True, False, False]
+    assert list(flagged["High Diff"]) == [True, False, False]
+
+
+def test_interaction_metrics_match_pandas_groupby(scored):
+    df, actual, predictions = scored
+    interactions = interaction_metrics(df, actual, predictions, ["Country", "Age"])
+    grouped = (
+        pd.DataFrame({"Country": df["Country"], "Age": df["Age"], "a": actual})
+        .groupby(["Country", "Age"])["a"]
+        .agg(["size", "mean"])
+    )
+    got = interactions.droplevel(["Feature A", "Feature B"])
+    assert list(got.index) == list(grouped.index)
+    assert list(got["Count"]) == list(grouped["size"])
+    np.testing.assert_allclose(got["Mean Actual ($)"], grouped["mean"], rtol=1e-12)
+    mask = ((df["Country"] == "India") & (df["Age"] == "25-34")).to_numpy()
+    assert got.loc[("India", "25-34"), "R2"] == pytest.approx(
+        r2_score(actual[mask], predictions[mask])
+    )
+
+
+def test_interaction_metrics_cover_all_pairs(scored):
+    """Every pair of features once, without slices below min_count."""
+    df, actual, predictions = scored
+    df = df.assign(Role=np.where(np.arange(len(df)) % 2, "IC", "PM"))
+    interactions = interaction_metrics(
+        df, actual, predictions, ["Country", "Age", "Role"], min_count=100
+    )
+    pairs = interactions.index.droplevel(["Category A", "Category B"]).unique()
+    assert list(pairs) == [("Country", "Age"), ("Country", "Role"), ("Age", "Role")]
+    assert interactions["Count"].min() >= 100
+    assert "Japan" not in interactions.index.get_level_values("Category A")
+
+
+def test_worst_slices_rank_by_metric(scored):
+    df, actual, predictions = scored
+    interactions = interaction_metrics(df, actual, predictions, ["Country", "Age"])
+    by_r2 = worst_slices(interactions, top=3)
+    assert len(by_r2) == 3
+    assert by_r2["R2"].is_monotonic_increasing
+    assert by_r2["R2"].iloc[0] == interactions["R2"].min()
+    by_diff = worst_slices(interactions, top=3, by="Abs % Diff")
+    assert by_diff["Abs % Diff"].iloc[0] == interactions["Abs % Diff"].max()
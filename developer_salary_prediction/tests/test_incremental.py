@@ -0,0 +1,150 @@
+"""Tests for src/incremental.py - Warm-start training."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.incremental import (
+    align_features,
+    check_compatibility,
+    continue_training,
+    load_new_rows,
+)
+from src.model import (
+    artifact_booster,
+    build_reference_matrix,
+    compact_model,
+    evaluation_matrix,
+    fit_booster,
+    training_matrix,
+)
+
+CATEGORIES = {
+    "Country": ["Germany", "India"],
+    "EdLevel": ["Bachelor's degree", "Master's degree"],
+    "DevType": ["Developer, back-end"],
+    "Industry": ["Software Development"],
+    "Age": ["25-34 years old"],
+    "ICorPM": ["Individual contributor"],
+}
+
+
+def _survey(n, countries, seed=0):
+    rng = np.random.default_rng(seed)
+    country = rng.choice(countries, n)
+    work_exp = rng.integers(0, 30, n).astype(float)
+    return pd.DataFrame(
+        {
+            "Country": country,
+            "YearsCode": work_exp + 2,
+            "WorkExp": work_exp,
+            "EdLevel": rng.choice(CATEGORIES["EdLevel"], n),
+            "DevType": "Developer, back-end",
+            "Industry": "Software Development",
+            "Age": "25-34 years old",
+            "ICorPM": "Individual contributor",
+            "ConvertedCompYearly": np.where(country == "Germany", 70_000, 20_000)
+            + 2_000 * work_exp
+            + rng.normal(0, 1_000, n),
+        }
+    )
+
+
+class TestAlignFeatures:
+    """Tests for align_features()."""
+
+    def test_layout_independent_of_batch_values(self):
+        """A batch without the first country keeps the model's columns."""
+        columns = ["YearsCode", "WorkExp", "Country_India", "EdLevel_Master's degree"]
+        artifacts = {"categories": CATEGORIES, "feature_columns": columns}
+        X, known = align_features(_survey(20, ["India"]), artifacts)
+        assert list(X.columns) == columns
+        assert X["Country_India"].all()
+        assert known.all()
+
+    def test_unseen_categories_flagged(self):
+        """Rows with a category outside the model's lists are not known."""
+        artifacts = {
+            "categories": CATEGORIES,
+            "feature_columns": ["YearsCode", "WorkExp"],
+            "encoding": "native",
+        }
+        df = _survey(10, ["Germany"])
+        df.loc[:2, "Country"] = "Brazil"
+        _, known = align_features(df, artifacts)
+        assert known.tolist() == [False] * 3 + [True] * 7
+
+
+class TestLoadNewRows:
+    """Tests for load_new_rows()."""
+
+    def test_small_batch_keeps_every_row(self, model_config, tmp_path):
+        """A batch far below the cardinality limits loses no rows."""
+        path = tmp_path / "new_responses.csv"
+        df = _survey(40, ["Germany", "India"])
+        df.to_csv(path, index=False)
+        artifacts = {"categories": CATEGORIES, "feature_columns": []}
+
+        new_df, dropped = load_new_rows(model_config, path, artifacts)
+        assert dropped == {"out_of_range": 0, "other": 0}
+        assert len(new_df) == 40
+        assert set(new_df["Country"]) == {"Germany", "India"}
+        assert align_features(new_df, artifacts)[1].all()
+
+
+class TestWarmStart:
+    """Tests for check_compatibility() and continue_training()."""
+
+    @pytest.fixture
+    def trained(self, model_config):
+        """Artifacts of a small model fitted on old data."""
+        model_config["model"].update(
+            n_estimators=300, learning_rate=0.3, early_stopping_rounds=5
+        )
+        columns = [
+            "YearsCode",
+            "WorkExp",
+            "Country_India",
+            "EdLevel_Master's degree",
+        ]
+        artifacts = {"categories": CATEGORIES, "feature_columns": columns}
+        df = _survey(500, ["Germany", "India"])
+        X, _ = align_features(df, artifacts)
+        y = df["ConvertedCompYearly"]
+        rows = np.arange(len(X))
+        booster = fit_booster(
+            model_config["model"],
+            training_matrix(X, y, rows[:400], build_reference_matrix(X, y)),
+            evaluation_matrix(X, y, rows[400:]),
+        )
+        artifacts["model"] = compact_model(booster)
+        return artifacts, model_config["model"]
+
+    def test_incompatible_data_rejected(self, trained):
+        """Too many rows with unseen categories raise ValueError."""
+        artifacts, _ = trained
+        df = _survey(10, ["Germany"])
+        df.loc[:4, "Country"] = "Brazil"
+        X, known = align_features(df, artifacts)
+        check_compatibility(artifacts, X, known, max_unseen=0.5)
+        with pytest.raises(ValueError, match="full retrain"):
+            check_compatibility(artifacts, X, known, max_unseen=0.1)
+
+    def test_continues_from_best_iteration(self, trained):
+        """New trees are added after the old best iteration."""
+        artifacts, model_config = trained
+        booster = artifact_booster(artifacts)
+        df = _survey(300, ["Germany", "India"], seed=1)
+        X, _ = align_features(df, artifacts)
+        y = df["ConvertedCompYearly"] * 1.1
+        rows = np.arange(len(X))
+
+        updated = continue_training(
+            booster,
+            model_config,
+            training_matrix(X, y, rows[:250], build_reference_matrix(X, y)),
+            evaluation_matrix(X, y, rows[250:]),
+            max_rounds=50,
+        )
+        assert updated.best_iteration > booster.best_iteration
+        assert updated.num_boosted_rounds() <= booster.best_iteration + 1 + 50
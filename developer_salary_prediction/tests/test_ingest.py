@@ -0,0 +1,137 @@
+"""Tests for src/ingest.py - Survey CSV ingestion."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.ingest import (
+    YEAR_COLUMN,
+    coerce_years,
+    iter_surveys,
+    read_survey,
+    read_surveys,
+    survey_year,
+)
+
+COLUMNS = ["Country", "YearsCode", "WorkExp", "Currency", "ConvertedCompYearly"]
+
+
+@pytest.fixture
+def survey_csv(tmp_path):
+    """Survey CSV with text year answers and an unused column."""
+    df = pd.DataFrame(
+        {
+            "Country": ["India", "Germany", "India", "Spain", "Germany"],
+            "YearsCode": ["3", "Less than 1 year", "More than 50 years", None, "12"],
+            "WorkExp": [1.0, 0.0, 40.0, 2.0, np.nan],
+            "Currency": ["INR Indian rupee", "EUR European Euro"] * 2 + ["EUR x"],
+            "ConvertedCompYearly": [20000.0, 60000.0, 500.0, 45000.0, 80000.0],
+            "Unused": ["a", "b", "c", "d", "e"],
+        }
+    )
+    path = tmp_path / "survey.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+def test_coerce_years_maps_text_answers():
+    """Text answers map to numbers and unparseable values become NaN."""
+    series = pd.Series(["4", "Less than 1 year", "More than 50 years", "n/a", None])
+    result = coerce_years(series)
+    assert result.dtype == "float64"
+    assert result.iloc[:3].tolist() == [4.0, 0.5, 51.0]
+    assert result.iloc[3:].isna().all()
+
+
+def test_read_survey_dtypes(survey_csv):
+    """Only requested columns are read, with explicit dtypes."""
+    df = read_survey(survey_csv, COLUMNS)
+    assert list(df.columns) == COLUMNS
+    assert isinstance(df["Country"].dtype, pd.CategoricalDtype)
+    assert df["YearsCode"].dtype == "float64"
+    assert df["YearsCode"].iloc[1] == 0.5
+
+
+def test_chunked_read_matches_single_pass(survey_csv):
+    """Chunked reading gives the same frame, including categories."""
+    single = read_survey(survey_csv, COLUMNS)
+    chunked = read_survey(survey_csv, COLUMNS, chunksize=2)
+    assert chunked.index.tolist() == single.index.tolist()
+    for col in COLUMNS:
+        assert chunked[col].astype(str).tolist() == single[col].astype(str).tolist()
+    assert isinstance(chunked["Country"].dtype, pd.CategoricalDtype)
+
+
+def test_row_filter_applied_per_chunk(survey_csv):
+    """row_filter drops rows while reading and keeps CSV row positions."""
+    df = read_survey(
+        survey_csv,
+        COLUMNS,
+        chunksize=2,
+        row_filter=lambda chunk: chunk[chunk["ConvertedCompYearly"] > 1000],
+    )
+    assert df.index.tolist() == [0, 1, 3, 4]
+
+
+SCHEMA = {
+    "current_year": 2025,
+    "years": {
+        2020: {
+            "columns": {"ConvertedComp": "ConvertedCompYearly"},
+            "values": {"Country": {"United States": "United States of America"}},
+        }
+    },
+}
+
+
+@pytest.fixture
+def survey_years(survey_csv, tmp_path):
+    """The current survey plus a 2020 file with older names and no WorkExp."""
+    old = pd.DataFrame(
+        {
+            "Country": ["United States", "Germany", "United States"],
+            "YearsCode": ["4", "10", "Less than 1 year"],
+            "Currency": ["USD United States dollar", "EUR European Euro", "USD x"],
+            "ConvertedComp": [90000.0, 50000.0, 500.0],
+        }
+    )
+    old_path = tmp_path / "2020" / "survey_results_public.csv"
+    old_path.parent.mkdir()
+    old.to_csv(old_path, index=False)
+    return [old_path, survey_csv]
+
+
+def test_survey_year_from_path():
+    """The last year in the path wins; paths without one are current."""
+    assert survey_year("data/2019/survey_2023.csv", SCHEMA) == 2023
+    assert survey_year("data/survey_results_public.csv", SCHEMA) == 2025
+
+
+@pytest.mark.parametrize("chunksize", [None, 2])
+def test_read_surveys_harmonizes_years(survey_years, chunksize):
+    """Older names and spellings map to the current schema, tagged by year."""
+    df = read_surveys(survey_years, COLUMNS, SCHEMA, chunksize=chunksize, workers=2)
+    assert list(df.columns) == [*COLUMNS, YEAR_COLUMN]
+    assert df[YEAR_COLUMN].tolist() == [2020] * 3 + [2025] * 5
+    assert df["Country"].iloc[0] == "United States of America"
+    assert "United States" not in df["Country"].cat.categories
+    assert df["ConvertedCompYearly"].iloc[:3].tolist() == [90000.0, 50000.0, 500.0]
+    assert df["WorkExp"].iloc[:3].isna().all()
+    assert df["YearsCode"].iloc[2] == 0.5
+    assert df.index.is_unique
+
+
+def test_iter_surveys_matches_combined_frame(survey_years):
+    """The chunk stream yields the same rows as read_surveys()."""
+
+    def row_filter(chunk):
+        return chunk[chunk["ConvertedCompYearly"] > 1000]
+
+    chunks = list(iter_surveys(survey_years, COLUMNS, SCHEMA, 2, row_filter))
+    combined = read_surveys(survey_years, COLUMNS, SCHEMA, row_filter=row_filter)
+    streamed = pd.concat(chunks)
+    assert all(len(chunk) <= 2 for chunk in chunks)
+    assert streamed["Country"].astype(str).tolist() == (
+        combined["Country"].astype(str).tolist()
+    )
+    assert streamed[YEAR_COLUMN].tolist() == combined[YEAR_COLUMN].tolist()
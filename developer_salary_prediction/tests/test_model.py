@@ -0,0 +1,149 @@
+"""Tests for src/model.py - XGBoost model construction."""
+
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+
+from src.cv import run_cross_validation
+from src.model import (
+    artifact_booster,
+    average_boosters,
+    build_reference_matrix,
+    collapsed_training_matrix,
+    compact_model,
+    compare_compact_model,
+    duplicate_groups,
+    evaluation_matrix,
+    fit_booster,
+    model_trees,
+    predict_best,
+    predict_frame,
+    to_regressor,
+    training_matrix,
+)
+
+
+def test_booster_wrapped_as_regressor_predicts_identically(model_config):
+    """to_regressor() keeps the booster's trees and best iteration."""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(400, 3)), columns=["a", "b", "c"])
+    y = pd.Series(2 * X["a"] + rng.normal(scale=0.1, size=400))
+    train_rows, valid_rows = np.arange(300), np.arange(300, 400)
+    model_config["model"].update(n_estimators=50, early_stopping_rounds=5)
+
+    reference = build_reference_matrix(X, y)
+    dvalid = evaluation_matrix(X, y, valid_rows)
+    booster = fit_booster(
+        model_config["model"], training_matrix(X, y, train_rows, reference), dvalid
+    )
+    model = to_regressor(booster, model_config["model"])
+
+    assert model.best_iteration == booster.best_iteration
+    np.testing.assert_array_equal(
+        model.predict(X.iloc[valid_rows]), predict_best(booster, dvalid)
+    )
+
+
+def test_fold_ensemble_predicts_mean_of_folds(model_config):
+    """average_boosters() matches averaging each fold model's predictions."""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(300, 3)), columns=["a", "b", "c"])
+    y = pd.Series(2 * X["a"] + 10 + rng.normal(scale=0.1, size=300))
+    model_config["model"].update(n_estimators=30, n_jobs=1)
+    model_config["data"]["cv_splits"] = 3
+
+    cv_results = run_cross_validation(X, y, model_config, keep_models=True)
+    boosters = [xgb.Booster(model_file=fold["model"]) for fold in cv_results["folds"]]
+    ensemble = average_boosters(boosters)
+
+    data = xgb.DMatrix(X)
+    expected = np.mean([predict_best(b, data) for b in boosters], axis=0)
+    np.testing.assert_allclose(ensemble.predict(data), expected, rtol=1e-5)
+    assert ensemble.best_iteration + 1 == sum(
+        fold["best_iteration"] for fold in cv_results["folds"]
+    )
+    model = to_regressor(ensemble, model_config["model"])
+    np.testing.assert_allclose(model.predict(X), expected, rtol=1e-5)
+
+
+def test_collapsed_duplicates_train_the_same_model(model_config):
+    """Weighted distinct rows give the predictions of the repeated rows."""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        {"a": rng.integers(0, 5, 600).astype(float), "b": rng.integers(0, 2, 600) == 1}
+    )
+    y = pd.Series(3 * X["a"] + 5 * X["b"] + rng.normal(scale=1.0, size=600))
+    model_config["model"].update(n_estimators=20, early_stopping_rounds=5)
+    rows = np.arange(500)
+
+    groups = duplicate_groups(X)
+    assert groups.max() + 1 == len(X.drop_duplicates())
+    reference = build_reference_matrix(X, y)
+    dvalid = evaluation_matrix(X, y, np.arange(500, 600))
+    dcollapsed, order = collapsed_training_matrix(X, y, rows, groups, reference)
+    assert dcollapsed.num_row() == len(X.iloc[rows].drop_duplicates())
+    assert dcollapsed.get_weight().sum() == len(rows)
+    same = groups[rows] == groups[0]
+    assert dcollapsed.get_label()[order[0]] == pytest.approx(y.iloc[rows][same].mean())
+
+    full = fit_booster(
+        model_config["model"], training_matrix(X, y, rows, reference), dvalid
+    )
+    collapsed = fit_booster(model_config["model"], dcollapsed, dvalid)
+    assert collapsed.best_iteration == full.best_iteration
+    np.testing.assert_allclose(
+        predict_best(collapsed, dvalid), predict_best(full, dvalid), rtol=1e-5
+    )
+
+
+@pytest.mark.parametrize("encoding", ["onehot", "native"])
+def test_compact_model_predicts_bit_identically(model_config, encoding):
+    """The pruned artifact drops later trees but not a bit of any prediction."""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        {
+            "a": rng.normal(size=500),
+            "b": rng.integers(0, 2, 500) == 1,
+            "c": pd.Categorical(rng.choice(["x", "y", "z"], 500)),
+        }
+    )
+    if encoding == "onehot":
+        X = pd.get_dummies(X, columns=["c"])
+    y = pd.Series(4 * X["a"] + 2 * X["b"] + rng.normal(scale=0.3, size=500))
+    model_config["model"].update(
+        n_estimators=200, learning_rate=0.5, early_stopping_rounds=5
+    )
+    reference = build_reference_matrix(X, y, encoding)
+    booster = fit_booster(
+        model_config["model"],
+        training_matrix(X, y, np.arange(400), reference, encoding),
+        evaluation_matrix(X, y, np.arange(400, 500), encoding),
+    )
+    model = to_regressor(booster, model_config["model"], encoding)
+    assert booster.num_boosted_rounds() > booster.best_iteration + 1
+
+    compact = compact_model(booster)
+    compaction = compare_compact_model(model, compact, X, encoding, repeats=2)
+    assert compaction["pruned_trees"] == booster.best_iteration + 1
+    assert compaction["compact_bytes"] < compaction["bytes"]
+
+    loaded = artifact_booster({"model": compact})
+    np.testing.assert_array_equal(predict_frame(loaded, X, encoding), model.predict(X))
+    # Older artifacts pickled the wrapper itself
+    legacy = artifact_booster({"model": model})
+    np.testing.assert_array_equal(predict_frame(legacy, X, encoding), model.predict(X))
+
+
+def test_model_trees_without_best_iteration():
+    """Boosters trained without early stopping predict with all their trees."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(100, 2))
+    dtrain = xgb.DMatrix(X, label=X[:, 0])
+    booster = xgb.train({"max_depth": 2}, dtrain, num_boost_round=7)
+    assert booster.attr("best_iteration") is None
+    assert model_trees(booster) == 7
+    frame = pd.DataFrame(X)
+    np.testing.assert_array_equal(
+        predict_frame(booster, frame), booster.predict(dtrain)
+    )
@@ -0,0 +1,156 @@
+"""Tests for src/monitor.py - Offline monitoring of new labelled responses."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.guardrails import category_metrics
+from src.incremental import align_features, map_unseen
+from src.model import (
+    artifact_booster,
+    build_reference_matrix,
+    compact_model,
+    evaluation_matrix,
+    fit_booster,
+    predict_frame,
+    training_matrix,
+)
+from src.monitor import compare_to_baseline, monitor
+
+CATEGORIES = {
+    "Country": ["Germany", "India", "Other"],
+    "EdLevel": ["Bachelor's degree", "Master's degree"],
+    "DevType": ["Developer, back-end"],
+    "Industry": ["Software Development"],
+    "Age": ["25-34 years old"],
+    "ICorPM": ["Individual contributor"],
+}
+SETTINGS = {
+    "chunk_rows": 100,
+    "min_category_rows": 20,
+    "max_r2_drop": 0.05,
+    "max_pct_diff_increase": 5.0,
+}
+
+
+def _survey(n, seed=0):
+    rng = np.random.default_rng(seed)
+    country = rng.choice(["Germany", "India"], n)
+    work_exp = rng.integers(0, 30, n).astype(float)
+    return pd.DataFrame(
+        {
+            "Country": country,
+            "YearsCode": work_exp + 2,
+            "WorkExp": work_exp,
+            "EdLevel": rng.choice(CATEGORIES["EdLevel"], n),
+            "DevType": "Developer, back-end",
+            "Industry": "Software Development",
+            "Age": "25-34 years old",
+            "ICorPM": "Individual contributor",
+            "ConvertedCompYearly": np.where(country == "Germany", 70_000, 20_000)
+            + 2_000 * work_exp
+            + rng.normal(0, 1_000, n),
+        }
+    )
+
+
+@pytest.fixture
+def deployed(model_config):
+    """Artifacts of a small native-encoded model and its monitoring config."""
+    model_config["model"].update(n_estimators=100, learning_rate=0.3)
+    model_config["monitoring"] = SETTINGS
+    artifacts = {
+        "categories": CATEGORIES,
+        "feature_columns": ["YearsCode", "WorkExp", *CATEGORIES],
+        "encoding": "native",
+    }
+    df = _survey(500)
+    X, _ = align_features(df, artifacts)
+    y = df["ConvertedCompYearly"]
+    rows = np.arange(len(X))
+    booster = fit_booster(
+        model_config["model"],
+        training_matrix(
+            X, y, rows[:400], build_reference_matrix(X, y, "native"), "native"
+        ),
+        evaluation_matrix(X, y, rows[400:], "native"),
+    )
+    artifacts["model"] = compact_model(booster)
+    return artifacts, model_config
+
+
+def test_map_unseen_uses_other_where_the_model_has_it():
+    df = _survey(4)
+    df.loc[0, "Country"] = "Brazil"
+    df.loc[1, "Country"] = "Other (please specify):"
+    df.loc[2, "EdLevel"] = "Bachelor’s degree"
+    df.loc[3, "EdLevel"] = "Something else"
+    mapped = map_unseen(df, CATEGORIES, "Other")
+    assert list(mapped["Country"][:2]) == ["Other", "Other"]
+    assert mapped.loc[2, "EdLevel"] == "Bachelor's degree"
+    # EdLevel has no Other category, so the value stays unknown
+    assert mapped.loc[3, "EdLevel"] == "Something else"
+    # unless its Other rows are dropped
+    mapped = map_unseen(df, CATEGORIES, "Other", ["EdLevel"])
+    assert mapped.loc[3, "EdLevel"] == "Other"
+
+
+def test_chunked_metrics_match_one_pass(deployed, tmp_path):
+    """Streaming sums give the category_metrics() of all scored rows."""
+    artifacts, config = deployed
+    df = _survey(350, seed=1)
+    path = tmp_path / "new_responses.csv"
+    df.to_csv(path, index=False)
+
+    metrics, report = monitor(config, [path], artifacts, verbose=False)
+    assert report["rows"]["read"] == report["rows"]["scored"] == 350
+
+    X, _ = align_features(df, artifacts)
+    expected = category_metrics(
+        df,
+        df["ConvertedCompYearly"].to_numpy(),
+        predict_frame(artifact_booster(artifacts), X, "native"),
+    )
+    seen = metrics[metrics["Count"] > 0].reset_index(drop=True)
+    assert list(seen["Category"]) == list(expected["Category"])
+    assert list(seen["Count"]) == list(expected["Count"])
+    np.testing.assert_allclose(seen["R2"], expected["R2"], rtol=1e-6)
+    np.testing.assert_allclose(seen["Abs % Diff"], expected["Abs % Diff"], rtol=1e-6)
+
+
+def test_skipped_rows_are_counted(deployed, tmp_path):
+    artifacts, config = deployed
+    df = _survey(50, seed=2)
+    df.loc[:4, "Country"] = "Brazil"  # mapped to Other, then dropped
+    df.loc[5:6, "EdLevel"] = "Something else"  # cannot be encoded
+    df.loc[8, "DevType"] = "Developer, QA"  # rare in training, dropped as Other
+    df.loc[7, "ConvertedCompYearly"] = 10.0  # below data.min_salary
+    path = tmp_path / "new_responses.csv"
+    df.to_csv(path, index=False)
+
+    _, report = monitor(config, [path], artifacts, verbose=False)
+    rows = report["rows"]
+    assert rows["other"] == 6
+    assert rows["unknown"] == 2
+    assert rows["read"] == rows["scored"] + 8 == 49
+
+
+def test_compare_to_baseline_flags_large_categories_only():
+    metrics = pd.DataFrame(
+        {
+            "Feature": "Country",
+            "Category": ["Germany", "India", "Brazil", "Japan"],
+            "Count": [500, 10, 500, 500],
+            "R2": [0.5, 0.1, 0.8, 0.7],
+            "Abs % Diff": [3.0, 3.0, 12.0, 1.0],
+        }
+    )
+    baseline = [
+        {"Feature": "Country", "Category": c, "R2": 0.8, "Abs % Diff": 2.0}
+        for c in ["Germany", "India", "Brazil"]
+    ]
+    compared = compare_to_baseline(metrics, baseline, SETTINGS)
+    # Germany lost R2, India is too small, Brazil's difference grew and
+    # Japan has no baseline
+    assert list(compared["Regressed"]) == [True, False, True, False]
+    assert compared["Baseline R2"].isna().tolist() == [False, False, False, True]
@@ -0,0 +1,110 @@
+"""Tests for src/pipeline.py - Staged runs with checkpoints."""
+
+import json
+
+import pytest
+
+from src.pipeline import MANIFEST_FILE, format_stage_summary, run_pipeline
+
+
+@pytest.fixture
+def stages():
+    """Three toy stages; calls records every executed stage name."""
+    calls = []
+
+    def numbers(config):
+        calls.append("numbers")
+        return {"values": list(range(config["n"]))}
+
+    def handle(config, values):
+        calls.append("handle")
+        return {"handle": object()}
+
+    def total(config, values, handle):
+        calls.append("total")
+        if config.get("fail"):
+            raise RuntimeError("total failed")
+        return {"total": sum(values)}
+
+    definitions = [
+        {"name": "numbers", "run": numbers, "inputs": [], "outputs": ["values"]},
+        {
+            "name": "handle",
+            "run": handle,
+            "inputs": ["values"],
+            "outputs": ["handle"],
+            "checkpoint": False,
+        },
+        {
+            "name": "total",
+            "run": total,
+            "inputs": ["values", "handle"],
+            "outputs": ["total"],
+        },
+    ]
+    return definitions, calls
+
+
+class TestRunPipeline:
+    """Test checkpointing, resume and from_stage."""
+
+    def test_fresh_run_checkpoints_every_stage(self, stages, tmp_path):
+        """All stages run; checkpointed ones are written with their metrics."""
+        definitions, calls = stages
+        manifest = run_pipeline(definitions, {"n": 4}, tmp_path)
+        assert calls == ["numbers", "handle", "total"]
+        assert (tmp_path / "numbers.pkl").exists()
+        assert not (tmp_path / "handle.pkl").exists()
+        record = manifest["stages"]["total"]
+        assert record["status"] == "done"
+        assert record["seconds"] >= 0
+        assert record["peak_rss_mb"] > 0
+        with open(tmp_path / MANIFEST_FILE) as f:
+            assert json.load(f)["ran"] == calls
+
+    def test_resume_after_failure_skips_completed_stages(self, stages, tmp_path):
+        """A failed stage is rerun; earlier outputs come from checkpoints."""
+        definitions, calls = stages
+        config = {"n": 4, "fail": True}
+        with pytest.raises(RuntimeError):
+            run_pipeline(definitions, config, tmp_path)
+        calls.clear()
+
+        definitions[2]["run"] = lambda config, values, handle: {"total": sum(values)}
+        manifest = run_pipeline(definitions, config, tmp_path, resume=True)
+        # "numbers" is loaded from its checkpoint, "handle" is rebuilt
+        assert calls == ["handle"]
+        assert manifest["ran"] == ["handle", "total"]
+
+    def test_resume_rejects_changed_config(self, stages, tmp_path):
+        """Checkpoints from a different configuration are not resumed."""
+        definitions, _ = stages
+        run_pipeline(definitions, {"n": 4}, tmp_path)
+        with pytest.raises(ValueError, match="Configuration changed"):
+            run_pipeline(definitions, {"n": 5}, tmp_path, resume=True)
+
+    def test_resume_when_complete_runs_nothing(self, stages, tmp_path):
+        """Resuming a finished run executes no stage."""
+        definitions, calls = stages
+        run_pipeline(definitions, {"n": 4}, tmp_path)
+        calls.clear()
+        manifest = run_pipeline(definitions, {"n": 4}, tmp_path, resume=True)
+        assert calls == []
+        assert "previous run" in format_stage_summary(manifest)
+
+    def test_from_stage_reruns_tail_with_new_config(self, stages, tmp_path):
+        """Stages before from_stage are loaded even if the config changed."""
+        definitions, calls = stages
+        run_pipeline(definitions, {"n": 4}, tmp_path)
+        calls.clear()
+        run_pipeline(definitions, {"n": 10}, tmp_path, from_stage="total")
+        assert calls == ["handle", "total"]
+
+    def test_unknown_stage_and_bad_outputs(self, stages, tmp_path):
+        """Invalid requests and undeclared outputs raise ValueError."""
+        definitions, _ = stages
+        with pytest.raises(ValueError, match="Unknown stage"):
+            run_pipeline(definitions, {"n": 4}, tmp_path, from_stage="missing")
+        definitions[0]["outputs"] = ["values", "extra"]
+        with pytest.raises(ValueError, match="declared"):
+            run_pipeline(definitions, {"n": 4}, tmp_path)
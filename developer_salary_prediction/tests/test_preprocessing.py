@@ -4,8 +4,10 @@ import numpy as np
 import pandas as pd
 
 from src.preprocessing import (
+    FEATURE_COLUMNS,
     normalize_other_categories,
     prepare_features,
+    prepare_features_native,
     reduce_cardinality,
 )
 
@@ -138,3 +140,48 @@ class TestPrepareFeatures:
         original_country = df["Country"].iloc[0]
         prepare_features(df)
         assert df["Country"].iloc[0] == original_country
+
+
+NATIVE_CATEGORIES = {
+    "Country": ["Germany", "India"],
+    "EdLevel": ["Other"],
+    "DevType": ["Developer, back-end", "Developer, front-end"],
+    "Industry": ["Healthcare", "Software Development"],
+    "Age": ["25-34 years old", "35-44 years old"],
+    "ICorPM": ["Individual contributor", "People manager"],
+}
+
+
+class TestPrepareFeaturesNative:
+    """Tests for prepare_features_native()."""
+
+    def _frame(self, country="India"):
+        return pd.DataFrame(
+            {
+                "Country": [country],
+                "YearsCode": [5.0],
+                "WorkExp": [3.0],
+                "EdLevel": ["Other"],
+                "DevType": ["Developer, back-end"],
+                "Industry": ["Software Development"],
+                "Age": ["25-34 years old"],
+                "ICorPM": ["Individual contributor"],
+            }
+        )
+
+    def test_returns_eight_columns(self):
+        """Output keeps one column per raw feature."""
+        result = prepare_features_native(self._frame(), NATIVE_CATEGORIES)
+        assert list(result.columns) == FEATURE_COLUMNS
+
+    def test_category_codes_fixed_by_category_list(self):
+        """Codes come from the category list, not from the values present."""
+        result = prepare_features_native(self._frame("India"), NATIVE_CATEGORIES)
+        assert isinstance(result["Country"].dtype, pd.CategoricalDtype)
+        assert list(result["Country"].cat.categories) == ["Germany", "India"]
+        assert result["Country"].cat.codes.iloc[0] == 1
+
+    def test_unknown_category_becomes_missing(self):
+        """Values outside the category list are encoded as missing."""
+        result = prepare_features_native(self._frame("Narnia"), NATIVE_CATEGORIES)
+        assert result["Country"].isna().iloc[0]
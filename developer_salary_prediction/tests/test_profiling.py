@@ -0,0 +1,65 @@
+"""Tests for src/profiling.py - Training data profile."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.profiling import (
+    category_frequencies,
+    format_profile,
+    numeric_summary,
+    profile_data,
+    profile_path,
+    write_profile,
+)
+
+
+@pytest.fixture
+def cleaned(raw_survey):
+    """raw_survey with categorical text columns, as the cleaned cache holds."""
+    df = raw_survey.copy()
+    df.loc[:9, "Country"] = "Brazil"
+    df.loc[0, "EdLevel"] = None
+    df["WorkExp"] = np.arange(len(df), dtype=float)
+    return df.astype({"Country": "category", "EdLevel": "category"})
+
+
+def test_frequencies_match_value_counts(cleaned):
+    """Counts equal value_counts() and are ordered most frequent first."""
+    for col in ["Country", "DevType"]:
+        frequencies = category_frequencies(cleaned[col])
+        assert frequencies["counts"] == cleaned[col].value_counts().to_dict()
+        assert list(frequencies["counts"]) == list(cleaned[col].value_counts().index)
+    assert category_frequencies(cleaned["EdLevel"])["missing"] == 1
+
+
+def test_numeric_summary_matches_pandas(cleaned):
+    """Quantiles and moments equal the per-column pandas results."""
+    cleaned.loc[3, "WorkExp"] = np.nan
+    summary = numeric_summary(cleaned, ["WorkExp", "ConvertedCompYearly"])
+    for col, stats in summary.items():
+        series = cleaned[col]
+        assert stats["count"] == series.count()
+        assert stats["mean"] == pytest.approx(series.mean())
+        assert stats["median"] == pytest.approx(series.median())
+        assert stats["p75"] == pytest.approx(series.quantile(0.75))
+        assert stats["max"] == series.max()
+    assert summary["WorkExp"]["missing"] == 1
+
+
+def test_profile_round_trips_as_json(cleaned, tmp_path):
+    """The profile is plain JSON; the printout lists every feature."""
+    profile = profile_data(cleaned)
+    path = profile_path(tmp_path / "model.pkl")
+    assert path.name == "model.profile.json"
+    write_profile(profile, path)
+    with open(path) as f:
+        assert json.load(f) == profile
+    assert profile["rows"] == len(cleaned)
+    text = format_profile(profile, top=1)
+    assert "Country (3 values, top 1)" in text
+    assert "ConvertedCompYearly" in text
+    assert isinstance(profile["categorical"]["Age"]["counts"], dict)
+    assert pd.Series(profile["categorical"]["Country"]["counts"]).sum() == len(cleaned)
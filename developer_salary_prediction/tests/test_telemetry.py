@@ -0,0 +1,99 @@
+"""Tests for src/telemetry.py - Training telemetry and run reports."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cv import run_cross_validation
+from src.model import build_reference_matrix, evaluation_matrix, fit_booster
+from src.telemetry import (
+    RoundTimer,
+    build_run_report,
+    format_comparison,
+    format_run_report,
+    report_path,
+    write_run_report,
+)
+
+
+@pytest.fixture
+def regression_data():
+    """Small numeric regression problem."""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(300, 4)), columns=list("abcd"))
+    y = pd.Series(X["a"] * 3 + X["b"] + rng.normal(scale=0.1, size=300))
+    return X, y
+
+
+class TestRoundTimer:
+    """Tests for RoundTimer."""
+
+    def test_records_every_round(self, model_config, regression_data):
+        """One duration per boosting round, including rounds after the best."""
+        X, y = regression_data
+        model_config["model"].update(n_estimators=500, early_stopping_rounds=5)
+        rows = np.arange(len(X))
+        timer = RoundTimer()
+        booster = fit_booster(
+            model_config["model"],
+            build_reference_matrix(X, y),
+            evaluation_matrix(X, y, rows[250:]),
+            callbacks=[timer],
+        )
+
+        summary = timer.summary(booster.best_iteration + 1, 500)
+        assert summary["rounds"] == booster.num_boosted_rounds()
+        assert summary["stopped_early"]
+        assert summary["seconds_to_best"] <= summary["seconds"]
+        assert summary["rounds_per_second"] > 0
+
+
+class TestRunReport:
+    """Tests for build_run_report() and the printers."""
+
+    @pytest.fixture
+    def report(self, model_config, regression_data):
+        """Report of a 3-fold CV run with a retrained final model."""
+        X, y = regression_data
+        model_config["model"].update(n_estimators=20, n_jobs=1)
+        model_config["data"]["cv_splits"] = 3
+        cv_results = run_cross_validation(X, y, model_config)
+        manifest = {
+            "config_digest": "abc123",
+            "order": ["encode", "cv", "final_fit"],
+            "stages": {
+                "encode": {"seconds": 0.5, "peak_rss_mb": 200.0},
+                "cv": {"seconds": 2.0, "peak_rss_mb": 350.0},
+                "final_fit": {"seconds": 1.0, "peak_rss_mb": 300.0},
+            },
+        }
+        final_strategy = {"strategy": "fold_ensemble", "trees": 60, "seconds": 0.1}
+        return build_run_report(model_config, manifest, cv_results, final_strategy, 4)
+
+    def test_report_contents(self, report, tmp_path):
+        """Sizes, stage metrics and per-fold timing are recorded as JSON."""
+        assert report["data"]["rows"] == 300
+        assert report["data"]["features"] == 4
+        assert report["total_seconds"] == 3.5
+        assert report["peak_rss_mb"] == 350.0
+        assert [fold["train_rows"] for fold in report["cv"]["folds"]] == [200] * 3
+        assert report["cv"]["rounds"] == sum(
+            fold["rounds"] for fold in report["cv"]["folds"]
+        )
+
+        path = report_path(tmp_path / "model.pkl")
+        assert path.name == "model.report.json"
+        write_run_report(report, path)
+        with open(path) as f:
+            assert json.load(f) == report
+
+    def test_printers(self, report):
+        """The summary lists every stage; the comparison has a column per run."""
+        summary = format_run_report(report)
+        for name in ("encode", "cv", "final_fit", "fold_ensemble"):
+            assert name in summary
+        comparison = format_comparison({"laptop": report, "server": report})
+        assert "laptop" in comparison.splitlines()[0]
+        assert "server" in comparison.splitlines()[0]
@@ -0,0 +1,108 @@
+"""Tests for src/tune.py - Successive-halving parameter search."""
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from src.tune import (
+    format_results,
+    halving_schedule,
+    merge_config,
+    run_search,
+    sample_params,
+    write_overlay,
+)
+
+
+@pytest.fixture
+def small_tuning_config(model_config):
+    """Six trials over 3 folds with few rounds, so the search is fast."""
+    model_config["model"].update(n_estimators=20, n_jobs=1)
+    model_config["data"]["cv_splits"] = 3
+    model_config["tuning"].update(n_trials=6, workers=1, reduction_factor=2)
+    return model_config
+
+
+class TestSampling:
+    """Tests for sample_params() and halving_schedule()."""
+
+    def test_samples_within_ranges(self, model_config):
+        """Values respect bounds and integer types, and are reproducible."""
+        space = model_config["tuning"]["search_space"]
+        first = [sample_params(space, np.random.default_rng(1)) for _ in range(2)]
+        assert first[0] == first[1]
+        for params in [
+            sample_params(space, np.random.default_rng(s)) for s in range(20)
+        ]:
+            assert isinstance(params["max_depth"], int)
+            for name, spec in space.items():
+                assert spec["low"] <= params[name] <= spec["high"]
+
+    def test_choices(self):
+        """List entries are sampled as categorical choices."""
+        params = sample_params({"max_depth": [4, 6]}, np.random.default_rng(0))
+        assert params["max_depth"] in (4, 6)
+
+    def test_schedule_ends_at_all_folds(self):
+        """Fold budgets grow by the reduction factor up to all folds."""
+        assert halving_schedule(5, 3) == [1, 3, 5]
+        assert halving_schedule(5, 2, min_folds=2) == [2, 4, 5]
+        assert halving_schedule(1, 3) == [1]
+
+
+class TestRunSearch:
+    """Tests for run_search() and its outputs."""
+
+    def test_prunes_and_ranks(self, small_tuning_config):
+        """Only survivors reach all folds, and they rank first by mean R2."""
+        rng = np.random.default_rng(0)
+        X = pd.DataFrame(rng.normal(size=(300, 4)), columns=list("abcd"))
+        y = pd.Series(X["a"] * 3 + X["b"] + rng.normal(scale=0.1, size=300))
+
+        results = run_search(X, y, small_tuning_config, verbose=False)
+
+        assert len(results) == 6
+        # Folds [1, 2, 3]: 6 trials -> best 3 -> best 2 on all folds
+        assert [r["folds"] for r in results] == [3, 3, 2, 1, 1, 1]
+        assert results[0]["mean_r2"] >= results[1]["mean_r2"]
+        baseline = next(r for r in results if r["trial"] == 0)
+        assert (
+            baseline["params"]["max_depth"] == small_tuning_config["model"]["max_depth"]
+        )
+        assert "(current)" in format_results(results)
+
+    def test_parallel_matches_sequential(self, small_tuning_config):
+        """Trials scored in worker processes rank the same as sequentially."""
+        rng = np.random.default_rng(0)
+        X = pd.DataFrame(rng.normal(size=(300, 4)), columns=list("abcd"))
+        y = pd.Series(X["a"] * 3 + X["b"] + rng.normal(scale=0.1, size=300))
+        small_tuning_config["model"]["n_jobs"] = 2
+
+        sequential = run_search(X, y, small_tuning_config, workers=1, verbose=False)
+        parallel = run_search(X, y, small_tuning_config, workers=2, verbose=False)
+        assert [r["trial"] for r in parallel] == [r["trial"] for r in sequential]
+        np.testing.assert_allclose(
+            [r["mean_r2"] for r in parallel],
+            [r["mean_r2"] for r in sequential],
+            rtol=1e-5,
+        )
+
+    def test_overlay_round_trip(self, tmp_path, model_config):
+        """The overlay only overrides the tuned model keys."""
+        result = {
+            "trial": 3,
+            "params": {"max_depth": 4, "subsample": 0.8},
+            "folds": 5,
+            "mean_r2": 0.5,
+        }
+        path = tmp_path / "tuned.yaml"
+        write_overlay(result, path)
+        with open(path) as f:
+            overlay = yaml.safe_load(f)
+
+        merged = merge_config(model_config, overlay)
+        assert merged["model"]["max_depth"] == 4
+        assert merged["model"]["subsample"] == 0.8
+        assert merged["model"]["n_estimators"] == model_config["model"]["n_estimators"]
+        assert "subsample" not in model_config["model"]